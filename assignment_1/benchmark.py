@@ -0,0 +1,494 @@
+"""Benchmarks of the market clearing models on synthetic cases.
+
+Each model is built, updated, optimized and its results extracted, with each
+phase timed separately, at several synthetic scales and with each solver
+backend. The results, including the throughput in solves per second, are
+written to a JSON report, which can be compared against a stored baseline
+report to catch regressions.
+
+Timings depend on the machine and the solver license, so the baseline is not
+shipped with the repo. Create it once on the machine that runs the
+comparisons, from a known good commit:
+
+    python -m assignment_1.benchmark --update-baseline
+
+which stores `benchmarks/baseline.json` (or the path given with `--baseline`).
+Later runs compare against it, and exit with 1 on regressions. Without the
+default baseline, a run only writes its report. A baseline path given with
+`--baseline` must exist, and the run exits with 2 if it does not.
+
+Run with `python -m assignment_1.benchmark --help`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+import scipy
+
+from assignment_1.data.synthetic import SyntheticCase
+from assignment_1.models.linear_program import SOLVERS
+from assignment_1.models.single_period_no_network import SinglePeriodNoNetwork
+from assignment_1.step_2 import multi_period_optimization_model
+from assignment_1.step_3 import optimization_model
+from assignment_1.utils.lazy import lazy_import
+from assignment_1.utils.results import get_table
+
+gp = lazy_import("gurobipy")
+
+# Synthetic case sizes (arguments of SyntheticCase)
+SCALES = {
+    "small": {"n_buses": 24, "n_gens": 20, "n_demands": 20, "T": 24},
+    "medium": {"n_buses": 100, "n_gens": 200, "n_demands": 200, "T": 24},
+    "large": {"n_buses": 500, "n_gens": 1000, "n_demands": 1000, "T": 96},
+}
+
+PHASES = ("build", "update", "optimize", "extract")
+
+DEFAULT_BASELINE = Path(__file__).parent.parent / "benchmarks" / "baseline.json"
+
+
+class PhaseTimer:
+    """Times the phases of one benchmark run."""
+
+    def __init__(self) -> None:
+        """Initialize the timer."""
+        self.times = dict.fromkeys(PHASES, 0.0)
+
+    def __call__(self, phase: str, func: Callable, *args: object) -> object:
+        """Call a function and add its wall time to a phase."""
+        start = time.perf_counter()
+        result = func(*args)
+        self.times[phase] += time.perf_counter() - start
+        return result
+
+
+def _first_hour(case: SyntheticCase) -> tuple[dict, dict]:
+    """Single period generation and demand data of the first hour of a case."""
+    gen_data = {
+        gen: {**data, "capacity": data["capacity"][0], "cost": data["cost"][0]}
+        for gen, data in case.generation_data.items()
+    }
+    demand_data = {
+        demand: {**data, "capacity": data["capacity"][0], "cost": data["cost"][0]}
+        for demand, data in case.demand_data.items()
+    }
+    return gen_data, demand_data
+
+
+def _single_period_case(case: SyntheticCase, solver: str) -> SinglePeriodNoNetwork:
+    """Single period model on the first hour of a synthetic case."""
+    return SinglePeriodNoNetwork(*_first_hour(case), solver=solver)
+
+
+def bench_dayahead(case: SyntheticCase, timer: PhaseTimer, solver: str) -> gp.Model:
+    """Day-ahead model of SinglePeriodNoNetwork.
+
+    The extract phase is `optimize_dayahead_model` on the already solved model,
+    for which Gurobi returns the stored solution without solving again (HiGHS
+    solves it again).
+    """
+    model = _single_period_case(case, solver)
+    timer("build", model.create_dayahead_model)
+    timer("update", model.model.update)
+    timer("optimize", model.model.optimize)
+    timer("extract", model.optimize_dayahead_model)
+    return model.model
+
+
+def bench_imbalance(case: SyntheticCase, timer: PhaseTimer, solver: str) -> gp.Model:
+    """Imbalance model of SinglePeriodNoNetwork, after the day-ahead model."""
+    model = _single_period_case(case, solver)
+    model.create_dayahead_model()
+    model.optimize_dayahead_model()
+    # Wind farms produce 15% less than scheduled, conventional units regulate
+    wind = [gen for gen, data in model.gen_data.items() if data["type"] == "wind"]
+    conv = [gen for gen in model.gen_data if gen not in wind]
+    timer(
+        "build",
+        lambda: (
+            model.define_imbalance(
+                gen_new_imbalance={gen: 0.85 * model.generation[gen] for gen in wind},
+                gen_regulation={
+                    gen: {
+                        "up_reg": model.gen_data[gen]["capacity"]
+                        - model.generation[gen],
+                        "down_reg": model.generation[gen],
+                        "cost_up_reg": model.day_ahead_price
+                        + 0.1 * model.gen_data[gen]["cost"],
+                        "cost_down_reg": model.day_ahead_price
+                        - 0.15 * model.gen_data[gen]["cost"],
+                    }
+                    for gen in conv
+                },
+            ),
+            model.create_imbalance_model(),
+        ),
+    )
+    timer("update", model.imbalance_model.update)
+    timer("optimize", model.imbalance_model.optimize)
+    timer("extract", model.optimize_imbalance_model)
+    return model.imbalance_model
+
+
+def bench_reserve(case: SyntheticCase, timer: PhaseTimer, solver: str) -> gp.Model:
+    """Reserve model of SinglePeriodNoNetwork."""
+    model = _single_period_case(case, solver)
+    total_demand = sum(data["capacity"] for data in model.demand_data.values())
+    conv = [gen for gen, data in model.gen_data.items() if data["type"] != "wind"]
+    timer(
+        "build",
+        lambda: (
+            model.define_reserve(0.15 * total_demand, 0.1 * total_demand, conv),
+            model.create_reserve_model(),
+        ),
+    )
+    timer("update", model.reserve_model.update)
+    timer("optimize", model.reserve_model.optimize)
+    timer("extract", model.optimize_reserve_model)
+    return model.reserve_model
+
+
+def bench_multi_period(case: SyntheticCase, timer: PhaseTimer, solver: str) -> gp.Model:
+    """Multi-period model of step 2, with storage."""
+    model, var, constr = timer(
+        "build",
+        lambda: multi_period_optimization_model(
+            case.generation_data,
+            case.demand_data,
+            case.storage_data,
+            case.T,
+            optimize=False,
+            solver=solver,
+        ),
+    )
+    timer("update", model.update)
+    timer("optimize", model.optimize)
+    timer(
+        "extract",
+        lambda: (
+            get_table(model, "Pi", constr, ["power_balance"], T=case.T),
+            get_table(model, "X", var, case.generation_data, T=case.T),
+            get_table(model, "X", var, case.demand_data, T=case.T),
+        ),
+    )
+    return model
+
+
+def _bench_network(
+    case: SyntheticCase, timer: PhaseTimer, solver: str, zonal_model: bool
+) -> gp.Model:
+    """Single period network model of step 3 on the first hour."""
+    gen_data, demand_data = _first_hour(case)
+    model, var, constr = timer(
+        "build",
+        lambda: optimization_model(
+            gen_data,
+            demand_data,
+            case.network_data,
+            zonal_model=zonal_model,
+            optimize=False,
+            solver=solver,
+        ),
+    )
+    names = (
+        sorted({data["bz"] for data in case.network_data["nodes"].values()})
+        if zonal_model
+        else list(case.network_data["nodes"])
+    )
+    timer("update", model.update)
+    timer("optimize", model.optimize)
+    timer(
+        "extract",
+        lambda: (
+            get_table(model, "Pi", constr, names, key="power_balance_{name}"),
+            get_table(model, "X", var, gen_data, key="{name}"),
+        ),
+    )
+    return model
+
+
+def bench_nodal(case: SyntheticCase, timer: PhaseTimer, solver: str) -> gp.Model:
+    """Nodal model of step 3."""
+    return _bench_network(case, timer, solver, zonal_model=False)
+
+
+def bench_zonal(case: SyntheticCase, timer: PhaseTimer, solver: str) -> gp.Model:
+    """Zonal (ATC) model of step 3."""
+    return _bench_network(case, timer, solver, zonal_model=True)
+
+
+BENCHMARKS = {
+    "dayahead": bench_dayahead,
+    "imbalance": bench_imbalance,
+    "reserve": bench_reserve,
+    "multi_period": bench_multi_period,
+    "nodal": bench_nodal,
+    "zonal": bench_zonal,
+}
+
+
+def run_benchmark(
+    name: str, scale: str, repeat: int = 3, seed: int = 0, solver: str = "gurobi"
+) -> dict[str, object]:
+    """Run one benchmark at one scale.
+
+    Args:
+        name (str): Benchmark name, a key of BENCHMARKS.
+        scale (str): Scale name, a key of SCALES.
+        repeat (int, optional): Number of runs. The phase times are the minimum
+            over the runs. Defaults to 3.
+        seed (int, optional): Seed of the synthetic case. Defaults to 0.
+        solver (str, optional): Solver backend, one of SOLVERS. Defaults to
+            "gurobi".
+
+    Returns:
+        dict[str, object]: Phase times in seconds, throughput in solves (build
+            to extract) per second, peak Python memory in bytes (traced in a
+            separate run, since tracing slows down the build), and the model
+            size and status.
+
+    """
+    case = SyntheticCase(**SCALES[scale], seed=seed)
+    bench = BENCHMARKS[name]
+
+    times = []
+    for _ in range(repeat):
+        timer = PhaseTimer()
+        model = bench(case, timer, solver)
+        times.append(timer.times)
+        result = {
+            "num_vars": model.NumVars,
+            "num_constrs": model.NumConstrs,
+            "status": model.status,
+            "iterations": model.IterCount,
+        }
+        model.dispose()
+
+    tracemalloc.start()
+    bench(case, PhaseTimer(), solver).dispose()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = min(sum(run.values()) for run in times)
+    return {
+        "name": name,
+        "scale": scale,
+        "solver": solver,
+        **{phase: min(run[phase] for run in times) for phase in PHASES},
+        "total": total,
+        "throughput": 1 / total,
+        "peak_memory": peak_memory,
+        **result,
+    }
+
+
+def run_benchmarks(
+    names: list[str] | None = None,
+    scales: list[str] | None = None,
+    repeat: int = 3,
+    solvers: list[str] | None = None,
+) -> dict[str, object]:
+    """Run benchmarks at several scales and with several solvers.
+
+    Args:
+        names (list[str] | None, optional): Benchmarks to run. Default is None,
+            which means all of them.
+        scales (list[str] | None, optional): Scales to run at. Default is None,
+            which means "small" and "medium".
+        repeat (int, optional): Number of runs of each benchmark. Defaults to 3.
+        solvers (list[str] | None, optional): Solver backends to run with.
+            Default is None, which means "gurobi".
+
+    Returns:
+        dict[str, object]: Report with metadata and one result per benchmark,
+            scale and solver.
+
+    """
+    names = names or list(BENCHMARKS)
+    scales = scales or ["small", "medium"]
+    solvers = solvers or ["gurobi"]
+    results = []
+    for scale in scales:
+        for name in names:
+            for solver in solvers:
+                print(f"Running {name} at scale {scale} with {solver}...")
+                results.append(run_benchmark(name, scale, repeat, solver=solver))
+
+    return {
+        "metadata": {
+            "timestamp": datetime.now(UTC).isoformat(),
+            "python": platform.python_version(),
+            # Only import gurobipy if it is benchmarked
+            "gurobi": ".".join(map(str, gp.gurobi.version()))
+            if "gurobi" in solvers
+            else None,
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "machine": platform.machine(),
+            "system": platform.system(),
+            "repeat": repeat,
+        },
+        "scales": {scale: SCALES[scale] for scale in scales},
+        "results": results,
+    }
+
+
+def compare_reports(
+    report: dict,
+    baseline: dict,
+    tolerance: float = 0.25,
+    min_seconds: float = 0.005,
+    min_bytes: int = 1_000_000,
+) -> list[str]:
+    """Compare a benchmark report against a baseline report.
+
+    Args:
+        report (dict): New report.
+        baseline (dict): Baseline report.
+        tolerance (float, optional): Allowed relative increase of each phase time
+            and of the peak memory. Defaults to 0.25.
+        min_seconds (float, optional): Increases of less than this many seconds
+            are ignored, as timer noise. Defaults to 0.005.
+        min_bytes (int, optional): Increases of the peak memory of less than this
+            many bytes are ignored. Defaults to 1 MB.
+
+    Returns:
+        list[str]: Description of each regression. Empty if there are none.
+
+    """
+    # Results of reports from before the solver field are Gurobi results
+    baseline_results = {
+        (result["name"], result["scale"], result.get("solver", "gurobi")): result
+        for result in baseline["results"]
+    }
+    regressions = []
+    for result in report["results"]:
+        base = baseline_results.get((result["name"], result["scale"], result["solver"]))
+        if base is None:
+            continue
+        label = f"{result['name']} ({result['scale']}, {result['solver']})"
+        for phase in (*PHASES, "total"):
+            if (
+                result[phase] > (1 + tolerance) * base[phase]
+                and result[phase] - base[phase] > min_seconds
+            ):
+                regressions.append(
+                    f"{label} {phase}: {result[phase]:.4f} s "
+                    f"(baseline {base[phase]:.4f} s)"
+                )
+        if (
+            result["peak_memory"] > (1 + tolerance) * base["peak_memory"]
+            and result["peak_memory"] - base["peak_memory"] > min_bytes
+        ):
+            regressions.append(
+                f"{label} peak memory: {result['peak_memory'] / 1e6:.1f} MB "
+                f"(baseline {base['peak_memory'] / 1e6:.1f} MB)"
+            )
+    return regressions
+
+
+def print_report(report: dict) -> None:
+    """Print a benchmark report as a table."""
+    print(
+        f"\n{'benchmark':15s} {'scale':8s} {'solver':8s} "
+        + " ".join(f"{phase:>9s}" for phase in (*PHASES, "total"))
+        + f" {'solves/s':>9s} {'memory':>9s} {'vars':>8s} {'constrs':>8s}"
+    )
+    for result in report["results"]:
+        print(
+            f"{result['name']:15s} {result['scale']:8s} {result['solver']:8s} "
+            + " ".join(f"{result[phase]:9.4f}" for phase in (*PHASES, "total"))
+            + f" {result['throughput']:9.1f}"
+            + f" {result['peak_memory'] / 1e6:7.1f}MB"
+            + f" {result['num_vars']:8d} {result['num_constrs']:8d}"
+        )
+
+
+def main(args: list[str] | None = None) -> int:
+    """Run the benchmarks from the command line.
+
+    Args:
+        args (list[str] | None, optional): Command line arguments. Default is None,
+            which means sys.argv.
+
+    Returns:
+        int: Exit code, 1 if there are regressions against the baseline, and 2
+            if the baseline given with `--baseline` does not exist.
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS))
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES))
+    parser.add_argument(
+        "--solvers", nargs="+", choices=list(SOLVERS), default=["gurobi"]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=Path("benchmark_report.json"))
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        help=f"Baseline report, which must exist. Defaults to {DEFAULT_BASELINE}"
+        " if it exists.",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store the report as the new baseline instead of comparing to it.",
+    )
+    options = parser.parse_args(args)
+
+    baseline = options.baseline or DEFAULT_BASELINE
+    if (
+        options.baseline is not None
+        and not options.update_baseline
+        and not baseline.exists()
+    ):
+        print(f"Baseline {baseline} does not exist.")
+        return 2
+
+    if "gurobi" in options.solvers:
+        gp.setParam("OutputFlag", 0)
+    report = run_benchmarks(
+        options.benchmarks, options.scales, options.repeat, options.solvers
+    )
+    print_report(report)
+    options.output.write_text(json.dumps(report, indent=2))
+    print(f"\nReport written to {options.output}")
+
+    if options.update_baseline:
+        baseline.parent.mkdir(parents=True, exist_ok=True)
+        baseline.write_text(json.dumps(report, indent=2))
+        print(f"Baseline written to {baseline}")
+        return 0
+
+    if not baseline.exists():
+        print(
+            f"No baseline at {baseline}, nothing to compare against. Create it"
+            " with --update-baseline."
+        )
+        return 0
+
+    regressions = compare_reports(
+        report, json.loads(baseline.read_text()), options.tolerance
+    )
+    if regressions:
+        print("\nREGRESSIONS:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("\nNo regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
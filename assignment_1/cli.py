@@ -0,0 +1,473 @@
+"""Batch driver running the steps and models over many input sets.
+
+Jobs are read from a JSON manifest, run in parallel, and each result is
+appended to `results.jsonl` in the output directory as soon as the job
+finishes. An interrupted batch is resumed with `--resume`, which skips the jobs
+that already finished successfully with the same specification.
+
+A manifest has a list of jobs, and optionally the number of processes and
+default model options:
+
+    {
+        "processes": 4,
+        "options": {"solver": "gurobi"},
+        "jobs": [
+            {"name": "step_2", "entry_point": "step_2.main",
+             "args": {"plot": false}},
+            {"name": "lines", "entry_point": "step_3.main_2",
+             "args": {"capacity_factors": [0.5, 1.0]},
+             "sweep": {"lines": [["L1"], ["L2"], ["L3"]]}},
+            {"name": "zonal", "model": "step_3",
+             "data": {"generation": "single_period", "demand": "single_period",
+                      "network": "24_bus"},
+             "options": {"zonal_model": true},
+             "sweep": {"atc_factor": [0.5, 0.75, 1.0]}}
+        ]
+    }
+
+An "entry_point" job calls a function of a step module (e.g. `step_3.main_2`)
+with the given keyword arguments, and stores its printed output in a log file.
+A "model" job ("dayahead", "step_2" or "step_3") builds and solves the model on
+the given data sources, and stores the objective, prices and dispatch. A
+"sweep" runs one job per combination of the listed values, which are added to
+the arguments (or options) of the job.
+
+Data sources are the types of the data classes ("single_period",
+"multi_period", "24_bus", "single_battery", "none", ...), profile files (`{"path": ..., ...}`, the
+arguments of GenerationProfile or DemandProfile), or a synthetic case
+(`"synthetic": {...}`, the arguments of SyntheticCase).
+
+Plots are never shown: the workers run in headless mode, and figures are saved
+to the `figures` directory of the output directory.
+
+Run with `python -m assignment_1.cli --help`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import importlib
+import io
+import itertools
+import json
+import os
+import re
+import time
+import traceback
+from concurrent.futures import as_completed
+from pathlib import Path
+
+import numpy as np
+
+from assignment_1.data.demand import Demand, DemandProfile
+from assignment_1.data.generation import Generation, GenerationProfile
+from assignment_1.data.network import NetworkData
+from assignment_1.data.storage import Storage
+from assignment_1.data.synthetic import SyntheticCase
+from assignment_1.models.linear_program import GRB
+from assignment_1.models.single_period_no_network import SinglePeriodNoNetwork
+from assignment_1.step_2 import multi_period_optimization_model
+from assignment_1.step_3 import optimization_model
+from assignment_1.utils.plotting import FIGURE_DIR_ENV, set_headless
+from assignment_1.utils.results import get_attr, get_table
+from assignment_1.utils.sweep import get_env, worker_pool
+
+# Step modules whose functions can be run as entry points
+STEPS = ("step_1", "step_2", "step_3", "step_5", "step_6")
+
+MODELS = ("dayahead", "step_2", "step_3")
+
+RESULTS_FILE = "results.jsonl"
+
+
+def job_key(job: dict) -> str:
+    """Get a hash of a job specification, to recognize it when resuming."""
+    return hashlib.sha256(json.dumps(job, sort_keys=True).encode()).hexdigest()
+
+
+def expand_jobs(manifest: dict) -> list[dict]:
+    """Expand the jobs of a manifest into single runs.
+
+    Args:
+        manifest (dict): Job manifest.
+
+    Returns:
+        list[dict]: Jobs, each with a unique "id", and without "sweep". The
+            default options of the manifest are merged into the model jobs.
+
+    Raises:
+        ValueError: If a job is invalid, or two jobs have the same id.
+
+    """
+    jobs = []
+    for i, spec in enumerate(manifest.get("jobs", [])):
+        name = spec.get("name", f"job_{i}")
+        if ("entry_point" in spec) == ("model" in spec):
+            raise ValueError(f"Job {name} needs either an entry_point or a model.")
+        if "entry_point" in spec:
+            _entry_point(spec["entry_point"])
+            target = "args"
+        else:
+            if spec["model"] not in MODELS:
+                raise ValueError(
+                    f"Unknown model {spec['model']} of job {name}, use one of {MODELS}."
+                )
+            target = "options"
+
+        sweep = spec.get("sweep", {})
+        for values in itertools.product(*sweep.values()):
+            point = dict(zip(sweep, values, strict=True))
+            job = {key: value for key, value in spec.items() if key != "sweep"}
+            job[target] = {
+                **(manifest.get("options", {}) if target == "options" else {}),
+                **spec.get(target, {}),
+                **point,
+            }
+            job["id"] = (
+                f"{name}[{','.join(f'{k}={json.dumps(v)}' for k, v in point.items())}]"
+                if point
+                else name
+            )
+            jobs.append(job)
+
+    ids = [job["id"] for job in jobs]
+    duplicates = sorted({job_id for job_id in ids if ids.count(job_id) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate job ids: {duplicates}.")
+    return jobs
+
+
+def _entry_point(name: str) -> object:
+    """Get the function of an entry point, e.g. "step_3.main_2"."""
+    module, _, function = name.partition(".")
+    if module not in STEPS or not function.startswith("main"):
+        raise ValueError(
+            f"Invalid entry point {name}, use <step>.main* with step in {STEPS}."
+        )
+    func = getattr(importlib.import_module(f"assignment_1.{module}"), function, None)
+    if func is None:
+        raise ValueError(f"Entry point {name} does not exist.")
+    return func
+
+
+def load_data(data: dict) -> dict:
+    """Load the data sources of a model job.
+
+    Args:
+        data (dict): Data sources, with keys "generation", "demand", "storage"
+            and "network", or "synthetic".
+
+    Returns:
+        dict: Generation, demand, storage and network data, where given.
+
+    """
+    if "synthetic" in data:
+        case = SyntheticCase(**data["synthetic"])
+        return {
+            "generation": case.generation_data,
+            "demand": case.demand_data,
+            "storage": case.storage_data,
+            "network": case.network_data,
+        }
+
+    loaded = {}
+    for key, data_class, profile_class, attr in (
+        ("generation", Generation, GenerationProfile, "generation_data"),
+        ("demand", Demand, DemandProfile, "demand_data"),
+    ):
+        if key in data:
+            source = data[key]
+            loaded[key] = getattr(
+                profile_class(**source)
+                if isinstance(source, dict)
+                else data_class(source),
+                attr,
+            )
+    if "storage" in data:
+        source = data["storage"]
+        loaded["storage"] = (
+            source if isinstance(source, dict) else Storage(source).storage_data
+        )
+    if "network" in data:
+        source = data["network"]
+        loaded["network"] = (
+            source if isinstance(source, dict) else NetworkData(source).network_data
+        )
+    return loaded
+
+
+def _run_model(model_name: str, data: dict, options: dict) -> dict:
+    """Build and solve a model job, and extract its results."""
+    loaded = load_data(data)
+    gen_data, demand_data = loaded["generation"], loaded["demand"]
+    options = {"env": get_env(), **options}
+
+    if model_name == "dayahead":
+        model = SinglePeriodNoNetwork(gen_data, demand_data, **options)
+        model.create_dayahead_model()
+        model.optimize_dayahead_model()
+        if not model.dayahead_model_optimized:
+            return {"status": model.model.status}
+        return {
+            "status": model.model.status,
+            "objective": model.social_welfare,
+            "prices": {"system": model.day_ahead_price},
+            "generation": model.generation,
+            "demand": model.demand,
+        }
+
+    if model_name == "step_2":
+        T = options.pop("T", len(next(iter(gen_data.values()))["capacity"]))
+        model, var, constr = multi_period_optimization_model(
+            gen_data, demand_data, loaded.get("storage", {}), T, **options
+        )
+        if model.status != GRB.OPTIMAL:
+            return {"status": model.status}
+        return {
+            "status": model.status,
+            "objective": model.ObjVal,
+            "prices": {
+                "system": get_table(model, "Pi", constr, ["power_balance"], T=T)
+                .iloc[0]
+                .tolist()
+            },
+            "generation": get_table(model, "X", var, gen_data, T=T).T.to_dict("list"),
+            "demand": get_table(model, "X", var, demand_data, T=T).T.to_dict("list"),
+        }
+
+    model, var, constr = optimization_model(
+        gen_data, demand_data, loaded["network"], **options
+    )
+    if model.status != GRB.OPTIMAL:
+        return {"status": model.status}
+    balances = [name for name in constr if name.startswith("power_balance_")]
+    return {
+        "status": model.status,
+        "objective": model.ObjVal,
+        "prices": dict(
+            zip(
+                (name.removeprefix("power_balance_") for name in balances),
+                get_attr(model, "Pi", [constr[name] for name in balances]).tolist(),
+                strict=True,
+            )
+        ),
+        "generation": get_table(model, "X", var, gen_data, key="{name}")["X"].to_dict(),
+        "demand": get_table(model, "X", var, demand_data, key="{name}")["X"].to_dict(),
+    }
+
+
+def _log_file(output_dir: Path, job_id: str) -> Path:
+    """Path of the log file of a job, a file name made from its id."""
+    safe_id = re.sub(r"[^\w.=-]+", "_", job_id)[:80]
+    digest = hashlib.sha256(job_id.encode()).hexdigest()[:8]
+    return output_dir / "logs" / f"{safe_id}_{digest}.log"
+
+
+def run_job(job: dict, output_dir: str | os.PathLike) -> dict:
+    """Run one job and return its result record.
+
+    Errors are caught and returned as a record with status "error", so that one
+    failing job does not stop the batch.
+
+    Args:
+        job (dict): Expanded job (see `expand_jobs`).
+        output_dir (str | os.PathLike): Output directory of the batch.
+
+    Returns:
+        dict: Result record with the job id and key, "ok" or "error" status,
+            wall time, and the results or error.
+
+    """
+    output_dir = Path(output_dir)
+    log_file = _log_file(output_dir, job["id"])
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    record = {"id": job["id"], "key": job_key(job), "pid": os.getpid()}
+
+    start = time.perf_counter()
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            if "entry_point" in job:
+                value = _entry_point(job["entry_point"])(**job.get("args", {}))
+                result = {"return": value}
+            else:
+                result = _run_model(
+                    job["model"], job.get("data", {}), job.get("options", {})
+                )
+        record.update(status="ok", result=result)
+    except Exception as e:
+        record.update(status="error", error=repr(e), traceback=traceback.format_exc())
+    record["wall_time"] = time.perf_counter() - start
+
+    log_file.write_text(output.getvalue())
+    record["log"] = str(log_file.relative_to(output_dir))
+    return record
+
+
+def _to_json(obj: object) -> object:
+    """Convert NumPy values in the results to plain data."""
+    if isinstance(obj, np.ndarray | np.generic):
+        return obj.tolist()
+    return str(obj)
+
+
+def completed_jobs(results_file: Path) -> dict[str, str]:
+    """Read the jobs that finished successfully from a results file.
+
+    Args:
+        results_file (Path): Results file of a batch.
+
+    Returns:
+        dict[str, str]: Key of each successfully finished job, by job id. A last
+            line that was cut off by an interruption is ignored.
+
+    """
+    completed = {}
+    if not results_file.exists():
+        return completed
+    with open(results_file) as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "ok":
+                completed[record["id"]] = record["key"]
+    return completed
+
+
+def run_batch(
+    manifest: dict,
+    output_dir: str | os.PathLike,
+    processes: int | None = None,
+    resume: bool = False,
+    threads: int = 1,
+) -> list[dict]:
+    """Run the jobs of a manifest, writing each result as soon as it is done.
+
+    Args:
+        manifest (dict): Job manifest.
+        output_dir (str | os.PathLike): Output directory. Results are appended to
+            results.jsonl, logs are written to logs/ and figures to figures/.
+        processes (int | None, optional): Number of worker processes. Default is
+            None, which means the "processes" of the manifest, or one per CPU
+            core. With 1, the jobs run in the current process.
+        resume (bool, optional): Whether to skip the jobs that already finished
+            successfully (with the same specification) in the output directory.
+            Defaults to False.
+        threads (int, optional): Gurobi threads per worker. Defaults to 1.
+
+    Returns:
+        list[dict]: Result records of the jobs run, in the order they finished.
+
+    Raises:
+        FileExistsError: If the output directory has results and resume is False.
+
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    results_file = output_dir / RESULTS_FILE
+    if results_file.exists() and results_file.stat().st_size and not resume:
+        raise FileExistsError(
+            f"{results_file} already exists, resume the batch or use another "
+            "output directory."
+        )
+
+    jobs = expand_jobs(manifest)
+    completed = completed_jobs(results_file) if resume else {}
+    pending = [job for job in jobs if completed.get(job["id"]) != job_key(job)]
+    print(f"{len(jobs)} jobs, {len(jobs) - len(pending)} already done.")
+
+    # Never open windows, and let the workers save their figures
+    set_headless()
+    os.environ[FIGURE_DIR_ENV] = str(output_dir / "figures")
+
+    if processes is None:
+        processes = manifest.get("processes", os.cpu_count() or 1)
+    processes = max(1, min(processes, len(pending)))
+
+    records = []
+    with open(results_file, "a+b") as file:
+        # End a line cut off by an interruption, so that new records get their own
+        if file.tell() > 0:
+            file.seek(-1, os.SEEK_END)
+            if file.read(1) != b"\n":
+                file.write(b"\n")
+
+        def write(record: dict) -> None:
+            file.write((json.dumps(record, default=_to_json) + "\n").encode())
+            file.flush()
+            os.fsync(file.fileno())
+            records.append(record)
+            print(
+                f"[{len(records)}/{len(pending)}] {record['id']}: "
+                f"{record['status']} ({record['wall_time']:.2f} s)"
+            )
+
+        if processes == 1:
+            for job in pending:
+                write(run_job(job, output_dir))
+        else:
+            with worker_pool(processes, threads, {"OutputFlag": 0}) as executor:
+                futures = [executor.submit(run_job, job, output_dir) for job in pending]
+                for future in as_completed(futures):
+                    write(future.result())
+
+    return records
+
+
+def main(args: list[str] | None = None) -> int:
+    """Run a batch from the command line.
+
+    Args:
+        args (list[str] | None, optional): Command line arguments. Default is None,
+            which means sys.argv.
+
+    Returns:
+        int: Exit code, 1 if any job failed, 2 if the batch could not start.
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("manifest", type=Path, help="JSON job manifest.")
+    parser.add_argument(
+        "-o", "--output", type=Path, default=Path("batch_results"), help="Output dir."
+    )
+    parser.add_argument("-j", "--processes", type=int, help="Worker processes.")
+    parser.add_argument("--threads", type=int, default=1, help="Threads per worker.")
+    parser.add_argument(
+        "--resume", action="store_true", help="Skip jobs that already finished."
+    )
+    parser.add_argument(
+        "--list", action="store_true", help="List the jobs without running them."
+    )
+    options = parser.parse_args(args)
+
+    manifest = json.loads(options.manifest.read_text())
+    if options.list:
+        for job in expand_jobs(manifest):
+            print(job["id"])
+        return 0
+
+    try:
+        records = run_batch(
+            manifest,
+            options.output,
+            options.processes,
+            options.resume,
+            options.threads,
+        )
+    except (FileExistsError, ValueError) as e:
+        print(e)
+        return 2
+    failed = [record["id"] for record in records if record["status"] != "ok"]
+    if failed:
+        print(f"\n{len(failed)} jobs failed: {', '.join(failed)}")
+        return 1
+    print(f"\nResults written to {options.output / RESULTS_FILE}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
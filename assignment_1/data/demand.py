@@ -1,9 +1,34 @@
 """Demand data."""
 
+from functools import cached_property
 from typing import Literal
 
 import numpy as np
 
+from assignment_1.data.profiles import ProfileFile, normalize_bid_profile
+from assignment_1.data.unit_arrays import UnitArrays
+
+# Share of the system load profile for each demand
+LOAD_SHARES = {
+    "D1": 0.038,
+    "D2": 0.034,
+    "D3": 0.063,
+    "D4": 0.026,
+    "D5": 0.025,
+    "D6": 0.048,
+    "D7": 0.044,
+    "D8": 0.06,
+    "D9": 0.061,
+    "D10": 0.068,
+    "D11": 0.093,
+    "D12": 0.068,
+    "D13": 0.111,
+    "D14": 0.035,
+    "D15": 0.117,
+    "D16": 0.064,
+    "D17": 0.045,
+}
+
 
 class Demand:
     """Demand data."""
@@ -35,7 +60,7 @@ class Demand:
 
     def get_single_period_demand(self) -> dict:
         """Get single period demand data."""
-        self.demand_data = {
+        return {
             "D1": {"type": "demand", "node": "1", "capacity": 84, "cost": 30},
             "D2": {"type": "demand", "node": "2", "capacity": 75, "cost": 28},
             "D3": {"type": "demand", "node": "3", "capacity": 139, "cost": 26},
@@ -54,7 +79,6 @@ class Demand:
             "D16": {"type": "demand", "node": "19", "capacity": 141, "cost": 12},
             "D17": {"type": "demand", "node": "20", "capacity": 100, "cost": 11},
         }
-        return self.demand_data
 
     def get_multi_period_demand(self) -> dict:
         """Get multi period demand data."""
@@ -84,172 +108,159 @@ class Demand:
             1934.865,
             1669.815,
         ]
-        bid_max = 1.5
-        bid_min = 0.5
-        bid_profile = [1.0] * len(Load_profile)
-        for i in range(len(bid_profile)):
-            bid_profile[i] = bid_min + (bid_max - bid_min) * (
-                Load_profile[i] - min(Load_profile)
-            ) / (max(Load_profile) - min(Load_profile))
+        load_profile = np.array(Load_profile)
+        self.demand_data = self.get_demand_from_load_profile(
+            load_profile, normalize_bid_profile(load_profile)
+        )
+        return self.demand_data
+
+    def get_demand_from_load_profile(
+        self, load_profile: np.ndarray, bid_profile: np.ndarray
+    ) -> dict:
+        """Get multi period demand data from a system load profile.
 
+        Each demand gets a fixed share of the system load, and bids the single
+        period bid price scaled by the bid profile.
+
+        Args:
+            load_profile (np.ndarray): System load profile.
+            bid_profile (np.ndarray): Bid factor profile.
+
+        Returns:
+            dict: Demand data.
+
+        """
         single_period_demand = self.get_single_period_demand()
 
-        self.demand_data = {
-            "D1": {
-                "type": "demand",
-                "node": "1",
-                "capacity": (0.038 * np.array(Load_profile)).tolist(),
-                "cost": [
-                    bid_profile[i] * single_period_demand["D1"]["cost"]
-                    for i in range(len(bid_profile))
-                ],
-            },
-            "D2": {
-                "type": "demand",
-                "node": "2",
-                "capacity": (0.034 * np.array(Load_profile)).tolist(),
-                "cost": [
-                    bid_profile[i] * single_period_demand["D2"]["cost"]
-                    for i in range(len(bid_profile))
-                ],
-            },
-            "D3": {
-                "type": "demand",
-                "node": "3",
-                "capacity": (0.063 * np.array(Load_profile)).tolist(),
-                "cost": [
-                    bid_profile[i] * single_period_demand["D3"]["cost"]
-                    for i in range(len(bid_profile))
-                ],
-            },
-            "D4": {
+        return {
+            demand: {
                 "type": "demand",
-                "node": "4",
-                "capacity": (0.026 * np.array(Load_profile)).tolist(),
-                "cost": [
-                    bid_profile[i] * single_period_demand["D4"]["cost"]
-                    for i in range(len(bid_profile))
-                ],
-            },
-            "D5": {
-                "type": "demand",
-                "node": "5",
-                "capacity": (0.025 * np.array(Load_profile)).tolist(),
-                "cost": [
-                    bid_profile[i] * single_period_demand["D5"]["cost"]
-                    for i in range(len(bid_profile))
-                ],
-            },
-            "D6": {
-                "type": "demand",
-                "node": "6",
-                "capacity": (0.048 * np.array(Load_profile)).tolist(),
-                "cost": [
-                    bid_profile[i] * single_period_demand["D6"]["cost"]
-                    for i in range(len(bid_profile))
-                ],
-            },
-            "D7": {
-                "type": "demand",
-                "node": "7",
-                "capacity": (0.044 * np.array(Load_profile)).tolist(),
-                "cost": [
-                    bid_profile[i] * single_period_demand["D7"]["cost"]
-                    for i in range(len(bid_profile))
-                ],
-            },
-            "D8": {
-                "type": "demand",
-                "node": "8",
-                "capacity": (0.06 * np.array(Load_profile)).tolist(),
-                "cost": [
-                    bid_profile[i] * single_period_demand["D8"]["cost"]
-                    for i in range(len(bid_profile))
-                ],
-            },
-            "D9": {
-                "type": "demand",
-                "node": "9",
-                "capacity": (0.061 * np.array(Load_profile)).tolist(),
-                "cost": [
-                    bid_profile[i] * single_period_demand["D9"]["cost"]
-                    for i in range(len(bid_profile))
-                ],
-            },
-            "D10": {
-                "type": "demand",
-                "node": "10",
-                "capacity": (0.068 * np.array(Load_profile)).tolist(),
-                "cost": [
-                    bid_profile[i] * single_period_demand["D10"]["cost"]
-                    for i in range(len(bid_profile))
-                ],
-            },
-            "D11": {
-                "type": "demand",
-                "node": "13",
-                "capacity": (0.093 * np.array(Load_profile)).tolist(),
-                "cost": [
-                    bid_profile[i] * single_period_demand["D11"]["cost"]
-                    for i in range(len(bid_profile))
-                ],
-            },
-            "D12": {
-                "type": "demand",
-                "node": "14",
-                "capacity": (0.068 * np.array(Load_profile)).tolist(),
-                "cost": [
-                    bid_profile[i] * single_period_demand["D12"]["cost"]
-                    for i in range(len(bid_profile))
-                ],
-            },
-            "D13": {
-                "type": "demand",
-                "node": "15",
-                "capacity": (0.111 * np.array(Load_profile)).tolist(),
-                "cost": [
-                    bid_profile[i] * single_period_demand["D13"]["cost"]
-                    for i in range(len(bid_profile))
-                ],
-            },
-            "D14": {
-                "type": "demand",
-                "node": "16",
-                "capacity": (0.035 * np.array(Load_profile)).tolist(),
-                "cost": [
-                    bid_profile[i] * single_period_demand["D14"]["cost"]
-                    for i in range(len(bid_profile))
-                ],
-            },
-            "D15": {
-                "type": "demand",
-                "node": "18",
-                "capacity": (0.117 * np.array(Load_profile)).tolist(),
-                "cost": [
-                    bid_profile[i] * single_period_demand["D15"]["cost"]
-                    for i in range(len(bid_profile))
-                ],
-            },
-            "D16": {
-                "type": "demand",
-                "node": "19",
-                "capacity": (0.064 * np.array(Load_profile)).tolist(),
-                "cost": [
-                    bid_profile[i] * single_period_demand["D16"]["cost"]
-                    for i in range(len(bid_profile))
-                ],
-            },
-            "D17": {
-                "type": "demand",
-                "node": "20",
-                "capacity": (0.045 * np.array(Load_profile)).tolist(),
-                "cost": [
-                    bid_profile[i] * single_period_demand["D17"]["cost"]
-                    for i in range(len(bid_profile))
-                ],
-            },
+                "node": single_period_demand[demand]["node"],
+                "capacity": (share * load_profile).tolist(),
+                "cost": (bid_profile * single_period_demand[demand]["cost"]).tolist(),
+            }
+            for demand, share in LOAD_SHARES.items()
         }
-        return self.demand_data
+
+    def as_arrays(self) -> UnitArrays:
+        """Get the demand data in the columnar (struct-of-arrays) format."""
+        return UnitArrays.from_dict(self.demand_data)
+
+
+class DemandProfile(Demand):
+    """Multi period demand data with the system load profile loaded from a file.
+
+    The demands and their load shares are the same as for the multi period
+    demand data, but the load profile can be of any length (e.g. 8760 hours)
+    and is memory-mapped, so that time windows are read from disk on access.
+    The bid profile is normalized over the full load profile.
+
+    `demand_data` is only built on first access, so that a long profile is not
+    copied into lists when only windows of it are used.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        column: str | int = 0,
+        start: int = 0,
+        T: int | None = None,
+        mmap: bool = True,
+        cache_path: str | None = None,
+    ) -> None:
+        """Initialize demand data from a load profile file.
+
+        Args:
+            path (str): Path to a CSV, .npy or .npz file with the load profile.
+            column (str | int, optional): Column name or index of the load profile.
+                Defaults to 0.
+            start (int, optional): First time period of `demand_data`. Defaults to 0.
+            T (int | None, optional): Number of time periods of `demand_data`.
+                Default is None, which means until the end of the profile.
+            mmap (bool, optional): Whether to memory-map the profile file.
+                Defaults to True.
+            cache_path (str | None, optional): Path of a .npy file to store a
+                parsed CSV file in, to memory-map it (see `ProfileFile`). Default
+                is None, which means a CSV file is read into memory.
+
+        """
+        self.type = "multi_period"
+        with ProfileFile(path, mmap=mmap, cache_path=cache_path) as profile_file:
+            self.load_profile = profile_file.column(column)
+        self.n_periods = len(self.load_profile)
+        self.load_range = (
+            float(np.min(self.load_profile)),
+            float(np.max(self.load_profile)),
+        )
+        self.start = start
+        self.T = self.n_periods - start if T is None else T
+        self._check_window(self.start, self.T)
+
+    @cached_property
+    def demand_data(self) -> dict:
+        """Demand data for the time periods [start, start + T)."""
+        return self.window(self.start, self.T)
+
+    def _check_window(self, start: int, T: int) -> None:
+        """Check that a window is inside the load profile."""
+        if start < 0 or T < 0 or start + T > self.n_periods:
+            raise ValueError(
+                f"Window [{start}, {start + T}) is outside the load profile "
+                f"of length {self.n_periods}."
+            )
+
+    def _window_profiles(self, start: int, T: int) -> tuple[np.ndarray, np.ndarray]:
+        """Load and bid profiles of a window."""
+        self._check_window(start, T)
+        load_profile = np.asarray(self.load_profile[start : start + T])
+        return load_profile, normalize_bid_profile(
+            load_profile, load_range=self.load_range
+        )
+
+    def window(self, start: int, T: int) -> dict:
+        """Get demand data for the time periods [start, start + T).
+
+        Args:
+            start (int): First time period.
+            T (int): Number of time periods.
+
+        Returns:
+            dict: Demand data for the window.
+
+        """
+        return self.get_demand_from_load_profile(*self._window_profiles(start, T))
+
+    def window_arrays(self, start: int, T: int) -> UnitArrays:
+        """Get demand data for the time periods [start, start + T) as arrays.
+
+        Unlike `window`, the profiles are not converted to lists.
+
+        Args:
+            start (int): First time period.
+            T (int): Number of time periods.
+
+        Returns:
+            UnitArrays: Demand data for the window.
+
+        """
+        load_profile, bid_profile = self._window_profiles(start, T)
+        single_period_demand = self.get_single_period_demand()
+        single_period = UnitArrays.from_dict(
+            {demand: single_period_demand[demand] for demand in LOAD_SHARES}
+        )
+        return UnitArrays(
+            ids=single_period.ids,
+            node_ids=single_period.node_ids,
+            node=single_period.node,
+            type_names=single_period.type_names,
+            type_code=single_period.type_code,
+            capacity=np.array(list(LOAD_SHARES.values()))[:, None] * load_profile,
+            cost=single_period.cost * bid_profile,
+        )
+
+    def as_arrays(self) -> UnitArrays:
+        """Get the demand data in the columnar (struct-of-arrays) format."""
+        return self.window_arrays(self.start, self.T)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,13 @@
 """Generation data."""
 
+from functools import cached_property
 from typing import Literal
 
+import numpy as np
+
+from assignment_1.data.profiles import ProfileFile
+from assignment_1.data.unit_arrays import UnitArrays
+
 
 class Generation:
     """Generation data."""
@@ -35,7 +41,7 @@ class Generation:
 
     def get_single_period_generation(self) -> dict:
         """Get single period generation data."""
-        self.generation_data = {
+        return {
             "G1": {"type": "conv", "node": "1", "capacity": 106.4, "cost": 13.32},
             "G2": {"type": "conv", "node": "2", "capacity": 106.4, "cost": 13.32},
             "G3": {"type": "conv", "node": "7", "capacity": 245, "cost": 20.7},
@@ -53,7 +59,6 @@ class Generation:
             "G15": {"type": "wind", "node": "16", "capacity": 53.34, "cost": 0},
             "G16": {"type": "wind", "node": "21", "capacity": 38.16, "cost": 0},
         }
-        return self.generation_data
 
     def get_multi_period_generation(self) -> dict:
         """Get multi period generation data.
@@ -266,6 +271,142 @@ class Generation:
         }
         return self.generation_data
 
+    def as_arrays(self) -> UnitArrays:
+        """Get the generation data in the columnar (struct-of-arrays) format."""
+        return UnitArrays.from_dict(self.generation_data)
+
+
+class GenerationProfile(Generation):
+    """Multi period generation data with wind profiles loaded from a file.
+
+    The generators are the same as for the single period generation data.
+    Conventional generators keep their capacity and cost in every time period,
+    while the capacity of the wind farms is read from a file of any length
+    (e.g. 8760 hours). The file is memory-mapped, so that time windows are read
+    from disk on access.
+
+    `generation_data` is only built on first access, so that long profiles are
+    not copied into lists when only windows of them are used.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        columns: dict[str, str | int] | None = None,
+        start: int = 0,
+        T: int | None = None,
+        mmap: bool = True,
+        cache_path: str | None = None,
+    ) -> None:
+        """Initialize generation data from a wind profile file.
+
+        Args:
+            path (str): Path to a CSV, .npy or .npz file with the wind profiles.
+            columns (dict[str, str | int] | None, optional): Column name or index of
+                the profile for each wind farm, {gen: column}. Default is None,
+                which means the columns are named after the wind farms if the file
+                has column names, and are in the order of the wind farms otherwise.
+            start (int, optional): First time period of `generation_data`.
+                Defaults to 0.
+            T (int | None, optional): Number of time periods of `generation_data`.
+                Default is None, which means until the end of the profiles.
+            mmap (bool, optional): Whether to memory-map the profile file.
+                Defaults to True.
+            cache_path (str | None, optional): Path of a .npy file to store a
+                parsed CSV file in, to memory-map it (see `ProfileFile`). Default
+                is None, which means a CSV file is read into memory.
+
+        """
+        self.type = "multi_period"
+        self.units = self.get_single_period_generation()
+        wind_gens = [gen for gen, data in self.units.items() if data["type"] == "wind"]
+
+        with ProfileFile(path, mmap=mmap, cache_path=cache_path) as profile_file:
+            if columns is None:
+                columns = {
+                    gen: gen if profile_file.columns is not None else i
+                    for i, gen in enumerate(wind_gens)
+                }
+            self.wind_profiles = {
+                gen: profile_file.column(columns[gen]) for gen in wind_gens
+            }
+        self.n_periods = min(len(profile) for profile in self.wind_profiles.values())
+        self.start = start
+        self.T = self.n_periods - start if T is None else T
+        self._check_window(self.start, self.T)
+
+    @cached_property
+    def generation_data(self) -> dict:
+        """Generation data for the time periods [start, start + T)."""
+        return self.window(self.start, self.T)
+
+    def _check_window(self, start: int, T: int) -> None:
+        """Check that a window is inside the wind profiles."""
+        if start < 0 or T < 0 or start + T > self.n_periods:
+            raise ValueError(
+                f"Window [{start}, {start + T}) is outside the wind profiles "
+                f"of length {self.n_periods}."
+            )
+
+    def window(self, start: int, T: int) -> dict:
+        """Get generation data for the time periods [start, start + T).
+
+        Args:
+            start (int): First time period.
+            T (int): Number of time periods.
+
+        Returns:
+            dict: Generation data for the window.
+
+        """
+        self._check_window(start, T)
+        return {
+            gen: {
+                "type": data["type"],
+                "node": data["node"],
+                "capacity": (
+                    self.wind_profiles[gen][start : start + T].tolist()
+                    if gen in self.wind_profiles
+                    else [data["capacity"]] * T
+                ),
+                "cost": [data["cost"]] * T,
+            }
+            for gen, data in self.units.items()
+        }
+
+    def window_arrays(self, start: int, T: int) -> UnitArrays:
+        """Get generation data for the time periods [start, start + T) as arrays.
+
+        Unlike `window`, the profiles are not converted to lists.
+
+        Args:
+            start (int): First time period.
+            T (int): Number of time periods.
+
+        Returns:
+            UnitArrays: Generation data for the window.
+
+        """
+        self._check_window(start, T)
+        single_period = UnitArrays.from_dict(self.units)
+        capacity = np.repeat(single_period.capacity, T, axis=1)
+        for i, gen in enumerate(single_period.ids):
+            if gen in self.wind_profiles:
+                capacity[i] = self.wind_profiles[gen][start : start + T]
+        return UnitArrays(
+            ids=single_period.ids,
+            node_ids=single_period.node_ids,
+            node=single_period.node,
+            type_names=single_period.type_names,
+            type_code=single_period.type_code,
+            capacity=capacity,
+            cost=np.repeat(single_period.cost, T, axis=1),
+        )
+
+    def as_arrays(self) -> UnitArrays:
+        """Get the generation data in the columnar (struct-of-arrays) format."""
+        return self.window_arrays(self.start, self.T)
+
 
 if __name__ == "__main__":
     generation = Generation(type="multi_period")
@@ -1,7 +1,352 @@
 """Network data."""
 
+from __future__ import annotations
+
+from functools import cached_property
 from typing import Literal
 
+import numpy as np
+
+from assignment_1.data.unit_arrays import UnitArrays
+from assignment_1.utils.lazy import lazy_import
+
+sp = lazy_import("scipy.sparse")
+
+
+class Topology:
+    """Index of the network topology.
+
+    Maps the node and line names of the network data to integer indices, so that
+    model builders can look up what is connected to each node directly instead
+    of scanning all lines and units.
+
+    Attributes:
+        node_ids (list[str]): Node names, in index order.
+        node_index (dict[str, int]): Index of each node name.
+        line_ids (list[str]): Line names, in index order.
+        line_index (dict[str, int]): Index of each line name.
+        line_from (np.ndarray): Index of the from-node of each line.
+        line_to (np.ndarray): Index of the to-node of each line.
+        reactance (np.ndarray): Reactance of each line.
+        node_lines (list[list[int]]): Indices of the lines attached to each node.
+        zone_ids (list[str]): Bidding zone names, in index order.
+        zone_index (dict[str, int]): Index of each bidding zone name.
+        node_zone (np.ndarray): Bidding zone index of each node.
+        border_ids (list[str]): Borders between bidding zones, "<bz_1>_<bz_2>",
+            in the order of the first line across each border (built on first
+            access, like the other border attributes).
+        border_zones (np.ndarray): From- and to-zone index of each border, shape
+            (n_borders, 2), oriented like the first line across the border.
+        line_border (np.ndarray): Border index of each line, -1 for lines inside
+            a zone.
+
+    """
+
+    def __init__(self, network_data: dict) -> None:
+        """Build the topology index.
+
+        Args:
+            network_data (dict): Network data.
+
+        """
+        self.node_ids = list(network_data["nodes"])
+        self.node_index = {node: i for i, node in enumerate(self.node_ids)}
+        self.line_ids = list(network_data["lines"])
+        self.line_index = {line: i for i, line in enumerate(self.line_ids)}
+
+        lines = network_data["lines"].values()
+        try:
+            self.line_from = np.array(
+                [self.node_index[data["from"]] for data in lines], dtype=np.int64
+            )
+            self.line_to = np.array(
+                [self.node_index[data["to"]] for data in lines], dtype=np.int64
+            )
+        except KeyError as e:
+            raise ValueError(f"Line connected to unknown node {e}.") from e
+        self.reactance = np.array([data["reactance"] for data in lines], dtype=float)
+
+        self.node_lines: list[list[int]] = [[] for _ in self.node_ids]
+        for line, (from_node, to_node) in enumerate(
+            zip(self.line_from.tolist(), self.line_to.tolist(), strict=True)
+        ):
+            self.node_lines[from_node].append(line)
+            if to_node != from_node:
+                self.node_lines[to_node].append(line)
+
+        self.zone_ids = list(
+            dict.fromkeys(data["bz"] for data in network_data["nodes"].values())
+        )
+        self.zone_index = {bz: i for i, bz in enumerate(self.zone_ids)}
+        self.node_zone = np.array(
+            [self.zone_index[data["bz"]] for data in network_data["nodes"].values()],
+            dtype=np.int64,
+        )
+
+        self._ptdf: dict[int, np.ndarray] = {}
+
+    @property
+    def n_nodes(self) -> int:
+        """Number of nodes."""
+        return len(self.node_ids)
+
+    @property
+    def n_lines(self) -> int:
+        """Number of lines."""
+        return len(self.line_ids)
+
+    @cached_property
+    def incidence(self) -> sp.csr_array:
+        """Line-node incidence matrix, +1 at the from-node and -1 at the to-node."""
+        lines = np.arange(self.n_lines)
+        return sp.csr_array(
+            (
+                np.concatenate((np.ones(self.n_lines), -np.ones(self.n_lines))),
+                (
+                    np.concatenate((lines, lines)),
+                    np.concatenate((self.line_from, self.line_to)),
+                ),
+            ),
+            shape=(self.n_lines, self.n_nodes),
+        )
+
+    @cached_property
+    def branch_susceptance(self) -> sp.csr_array:
+        """Branch susceptance matrix (lines x nodes), line flows per voltage angle."""
+        return (sp.diags(1 / self.reactance) @ self.incidence).tocsr()
+
+    @cached_property
+    def bus_susceptance(self) -> sp.csr_array:
+        """Nodal susceptance matrix (nodes x nodes), net outflows per voltage angle."""
+        return (self.incidence.T @ self.branch_susceptance).tocsr()
+
+    @cached_property
+    def _borders(self) -> tuple[list[str], np.ndarray, np.ndarray]:
+        """Borders between zones, their zones, and the border of each line."""
+        from_zone = self.node_zone[self.line_from]
+        to_zone = self.node_zone[self.line_to]
+        cross_lines = np.flatnonzero(from_zone != to_zone)
+
+        # Lines between the same two zones (in either direction) share a border
+        pair = np.minimum(from_zone, to_zone) * len(self.zone_ids) + np.maximum(
+            from_zone, to_zone
+        )
+        _, first, inverse = np.unique(
+            pair[cross_lines], return_index=True, return_inverse=True
+        )
+        # Number the borders in the order of their first line
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+
+        first_lines = cross_lines[first[order]]
+        border_zones = np.column_stack((from_zone[first_lines], to_zone[first_lines]))
+        border_ids = [
+            f"{self.zone_ids[from_bz]}_{self.zone_ids[to_bz]}"
+            for from_bz, to_bz in border_zones.tolist()
+        ]
+        line_border = np.full(self.n_lines, -1, dtype=np.int64)
+        line_border[cross_lines] = rank[inverse]
+        return border_ids, border_zones, line_border
+
+    @property
+    def border_ids(self) -> list[str]:
+        """Borders between bidding zones, see the class attributes."""
+        return self._borders[0]
+
+    @property
+    def border_zones(self) -> np.ndarray:
+        """From- and to-zone index of each border, see the class attributes."""
+        return self._borders[1]
+
+    @property
+    def line_border(self) -> np.ndarray:
+        """Border index of each line, see the class attributes."""
+        return self._borders[2]
+
+    def border_atc(
+        self,
+        network_data: dict,
+        atc_factor: float = 1.0,
+        borders: list[str] | None = None,
+    ) -> np.ndarray:
+        """Get the available transfer capacity (ATC) of each border.
+
+        The ATC of a border is the total capacity of the lines across it, with
+        the capacities of the selected borders scaled by the ATC factor.
+
+        Args:
+            network_data (dict): Network data with the line capacities.
+            atc_factor (float, optional): Factor to scale the capacities by.
+                Defaults to 1.0.
+            borders (list[str] | None, optional): Borders to apply the factor to,
+                in the format "<bz_1>_<bz_2>" (oriented as in `border_ids`).
+                Default is None, which means all borders.
+
+        Returns:
+            np.ndarray: ATC of each border, in the order of `border_ids`.
+
+        """
+        capacity = np.fromiter(
+            (data["capacity"] for data in network_data["lines"].values()),
+            dtype=float,
+            count=self.n_lines,
+        )
+        border_factor = np.ones(len(self.border_ids))
+        if borders is None:
+            border_factor[:] = atc_factor
+        else:
+            border_factor[np.isin(self.border_ids, borders)] = atc_factor
+
+        cross_lines = self.line_border >= 0
+        line_border = self.line_border[cross_lines]
+        return np.bincount(
+            line_border,
+            weights=capacity[cross_lines] * border_factor[line_border],
+            minlength=len(self.border_ids),
+        )
+
+    def ptdf(self, ref_node: int = 0) -> np.ndarray:
+        """Get the power transfer distribution factors (PTDF) of the network.
+
+        PTDF[l, n] is the flow on line l caused by injecting 1 MW at node n and
+        withdrawing it at the reference node. The matrix depends only on the
+        topology and the reactances, and is cached per reference node.
+
+        Args:
+            ref_node (int, optional): Index of the reference node. Defaults to 0.
+
+        Returns:
+            np.ndarray: Dense PTDF matrix of shape (n_lines, n_nodes).
+
+        """
+        if ref_node in self._ptdf:
+            return self._ptdf[ref_node]
+
+        branch_susceptance = self.branch_susceptance
+        bus_susceptance = self.bus_susceptance.tocsc()
+
+        other_nodes = np.delete(np.arange(self.n_nodes), ref_node)
+        try:
+            lu = sp.linalg.splu(bus_susceptance[other_nodes][:, other_nodes].tocsc())
+        except RuntimeError as e:
+            raise ValueError(
+                "Cannot compute the PTDF, the network is not connected."
+            ) from e
+
+        ptdf = np.zeros((self.n_lines, self.n_nodes))
+        if len(other_nodes) > 0:
+            ptdf[:, other_nodes] = lu.solve(
+                branch_susceptance[:, other_nodes].T.toarray()
+            ).T
+        self._ptdf[ref_node] = ptdf
+        return ptdf
+
+    @cached_property
+    def lodf(self) -> np.ndarray:
+        """Line outage distribution factors (LODF) of the network.
+
+        LODF[l, k] is the change of the flow on line l after the outage of line
+        k, per MW flowing on line k before the outage, so that the flows after
+        the outage are `flows + LODF[:, k] * flows[k]`. LODF[k, k] is -1. The
+        column of a line whose outage splits the network into islands is NaN.
+        The matrix is computed from the cached PTDF on first access.
+        """
+        ptdf = self.ptdf()
+        # Flow on each line per MW transferred from the from- to the to-node of
+        # each line
+        line_ptdf = ptdf[:, self.line_from] - ptdf[:, self.line_to]
+        denominator = 1 - np.diag(line_ptdf)
+        islanding = np.abs(denominator) < 1e-9
+
+        lodf = np.empty_like(line_ptdf)
+        np.divide(line_ptdf, denominator, out=lodf, where=~islanding)
+        np.fill_diagonal(lodf, -1.0)
+        lodf[:, islanding] = np.nan
+        return lodf
+
+    def unit_nodes(self, unit_data: dict | UnitArrays) -> np.ndarray:
+        """Get the node index of each unit.
+
+        Args:
+            unit_data (dict | UnitArrays): Generation, demand or storage data.
+
+        Returns:
+            np.ndarray: Node index of each unit, in the order of `unit_data`.
+
+        """
+        try:
+            if isinstance(unit_data, UnitArrays):
+                # Map the node names of the arrays once, not once per unit
+                node_index = np.array(
+                    [self.node_index[node] for node in unit_data.node_ids],
+                    dtype=np.int64,
+                )
+                return node_index[unit_data.node]
+            return np.array(
+                [self.node_index[data["node"]] for data in unit_data.values()],
+                dtype=np.int64,
+            )
+        except KeyError as e:
+            raise ValueError(f"Node {e} is missing in the network data.") from e
+
+    def unit_matrix(self, unit_data: dict | UnitArrays) -> sp.csr_array:
+        """Get the node-unit matrix, 1 at the node of each unit.
+
+        Args:
+            unit_data (dict | UnitArrays): Generation, demand or storage data.
+
+        Returns:
+            sp.csr_array: Matrix of shape (n_nodes, n_units), with units in the
+                order of `unit_data`.
+
+        """
+        n_units = len(_unit_ids(unit_data))
+        return sp.csr_array(
+            (np.ones(n_units), (self.unit_nodes(unit_data), np.arange(n_units))),
+            shape=(self.n_nodes, n_units),
+        )
+
+    def units_by_node(self, unit_data: dict | UnitArrays) -> list[list[str]]:
+        """Get the units attached to each node.
+
+        Args:
+            unit_data (dict | UnitArrays): Generation, demand or storage data.
+
+        Returns:
+            list[list[str]]: Names of the units at each node, in node index order.
+
+        """
+        units_by_node: list[list[str]] = [[] for _ in self.node_ids]
+        for unit, node in zip(
+            _unit_ids(unit_data), self.unit_nodes(unit_data).tolist(), strict=True
+        ):
+            units_by_node[node].append(unit)
+        return units_by_node
+
+    def units_by_zone(self, unit_data: dict | UnitArrays) -> list[list[str]]:
+        """Get the units in each bidding zone.
+
+        Args:
+            unit_data (dict | UnitArrays): Generation, demand or storage data.
+
+        Returns:
+            list[list[str]]: Names of the units in each zone, in zone index order.
+
+        """
+        units_by_zone: list[list[str]] = [[] for _ in self.zone_ids]
+        unit_zones = self.node_zone[self.unit_nodes(unit_data)]
+        for unit, zone in zip(_unit_ids(unit_data), unit_zones.tolist(), strict=True):
+            units_by_zone[zone].append(unit)
+        return units_by_zone
+
+
+def _unit_ids(unit_data: dict | UnitArrays) -> list[str]:
+    """Names of the units of generation, demand or storage data."""
+    if isinstance(unit_data, UnitArrays):
+        return unit_data.ids
+    return list(unit_data)
+
 
 class NetworkData:
     """Network data."""
@@ -15,6 +360,15 @@ class NetworkData:
         else:
             raise ValueError("Undefined network data")
 
+    @cached_property
+    def topology(self) -> Topology:
+        """Topology index of the network, built on first access.
+
+        The index is cached, so it must be rebuilt (`del network.topology`) if
+        nodes or lines are added to or removed from `network_data`.
+        """
+        return Topology(self.network_data)
+
     def get_test_network(self) -> dict:
         """Get test network data."""
         self.network_data = {
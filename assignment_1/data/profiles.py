@@ -0,0 +1,186 @@
+"""Time series profiles loaded from files."""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+
+class ProfileFile:
+    """Time series profiles stored in a CSV, .npy or .npz file.
+
+    The file holds one profile per column and one time period per row.
+    Large inputs are memory-mapped, so only the time windows that are accessed
+    are read from disk:
+        - .npy files are memory-mapped directly.
+        - .csv files are parsed into memory, or, if a cache path is given,
+          parsed once and stored in a .npy file at the cache path, which is
+          memory-mapped (and reused as long as the CSV is unchanged).
+        - .npz archives are read lazily, one array (profile) at a time.
+
+    The cache file is only ever overwritten by the loader if it created it, which
+    is recorded in a JSON file next to it (`<cache_path>.json`) together with the
+    modification time and size of the CSV it was parsed from.
+
+    An open .npz archive is closed by `close()`, or by using the profile file as
+    a context manager. Profiles read before closing stay valid.
+
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        mmap: bool = True,
+        cache_path: str | os.PathLike | None = None,
+    ) -> None:
+        """Initialize the profile file.
+
+        Args:
+            path (str | os.PathLike): Path to the file.
+            mmap (bool, optional): Whether to memory-map the data instead of
+                reading it into memory. Defaults to True.
+            cache_path (str | os.PathLike | None, optional): Path of the .npy file
+                to store a parsed CSV file in, to memory-map it. Default is None,
+                which means CSV files are read into memory.
+
+        """
+        self.path = Path(path)
+        self.mmap = mmap
+        self.cache_path = Path(cache_path) if cache_path is not None else None
+        self.columns: list[str] | None = None
+        self._npz: np.lib.npyio.NpzFile | None = None
+
+        match self.path.suffix.lower():
+            case ".npy":
+                self._data = self._load_npy(self.path)
+            case ".npz":
+                self._npz = np.load(self.path)
+                self.columns = list(self._npz.files)
+                self._data = None
+            case ".csv":
+                self._data = self._load_csv()
+            case _:
+                raise ValueError(f"Unsupported profile file format: {self.path}")
+
+    def _load_npy(self, path: Path) -> np.ndarray:
+        """Load a .npy file, memory-mapped if requested."""
+        data = np.load(path, mmap_mode="r" if self.mmap else None)
+        return data.reshape(len(data), -1)
+
+    def _load_csv(self) -> np.ndarray:
+        """Load a CSV file, with an optional header row of column names."""
+        with open(self.path) as file:
+            header = file.readline().strip().split(",")
+        try:
+            [float(value) for value in header]
+            skiprows = 0
+        except ValueError:
+            self.columns = [name.strip() for name in header]
+            skiprows = 1
+
+        if not self.mmap or self.cache_path is None:
+            return np.loadtxt(self.path, delimiter=",", skiprows=skiprows, ndmin=2)
+
+        source = self.path.resolve()
+        stat = source.stat()
+        meta = {
+            "source": str(source),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+        }
+        meta_path = self.cache_path.with_name(self.cache_path.name + ".json")
+        if self.cache_path.exists():
+            try:
+                cached_meta = json.loads(meta_path.read_text())
+            except (OSError, ValueError):
+                cached_meta = None
+            if cached_meta is None or cached_meta.get("source") != meta["source"]:
+                raise ValueError(
+                    f"Cache file {self.cache_path} was not created from "
+                    f"{self.path}, not overwriting it."
+                )
+            if cached_meta == meta:
+                return self._load_npy(self.cache_path)
+
+        # Claim the cache file before writing it, and only record the CSV it
+        # matches once it is complete, so an interrupted write is redone
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        meta_path.write_text(json.dumps({"source": meta["source"]}))
+        tmp_path = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        with open(tmp_path, "wb") as file:
+            np.save(
+                file, np.loadtxt(self.path, delimiter=",", skiprows=skiprows, ndmin=2)
+            )
+        os.replace(tmp_path, self.cache_path)
+        meta_path.write_text(json.dumps(meta))
+        return self._load_npy(self.cache_path)
+
+    def close(self) -> None:
+        """Close the .npz archive, if any. Memory-mapped data stays readable."""
+        if self._npz is not None:
+            self._npz.close()
+
+    def __enter__(self) -> "ProfileFile":
+        """Use the profile file as a context manager, closing it on exit."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the profile file."""
+        self.close()
+
+    @property
+    def n_periods(self) -> int:
+        """Number of time periods in the file."""
+        if self._npz is not None:
+            return len(self._npz[self._npz.files[0]])
+        return self._data.shape[0]
+
+    def column(self, column: str | int = 0) -> np.ndarray:
+        """Get a single profile.
+
+        Args:
+            column (str | int, optional): Column name or index. Defaults to 0.
+
+        Returns:
+            np.ndarray: The profile, of shape (n_periods,). A view of the
+                memory-mapped data when memory-mapping is used.
+
+        """
+        if isinstance(column, str):
+            if self.columns is None or column not in self.columns:
+                raise ValueError(f"Column {column} not found in {self.path}.")
+            index = self.columns.index(column)
+        else:
+            index = column
+
+        if self._npz is not None:
+            return np.asarray(self._npz[self._npz.files[index]]).reshape(-1)
+        return self._data[:, index]
+
+
+def normalize_bid_profile(
+    load_profile: np.ndarray,
+    bid_min: float = 0.5,
+    bid_max: float = 1.5,
+    load_range: tuple[float, float] | None = None,
+) -> np.ndarray:
+    """Scale a load profile linearly to the range [bid_min, bid_max].
+
+    Args:
+        load_profile (np.ndarray): Load profile.
+        bid_min (float, optional): Bid factor at minimum load. Defaults to 0.5.
+        bid_max (float, optional): Bid factor at maximum load. Defaults to 1.5.
+        load_range (tuple[float, float] | None, optional): Minimum and maximum load
+            to scale by. Default is None, which means the range of `load_profile`.
+
+    Returns:
+        np.ndarray: Bid factor profile.
+
+    """
+    if load_range is None:
+        load_range = (np.min(load_profile), np.max(load_profile))
+    load_min, load_max = load_range
+    return bid_min + (bid_max - bid_min) * (load_profile - load_min) / (
+        load_max - load_min
+    )
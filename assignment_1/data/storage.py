@@ -6,9 +6,24 @@ from typing import Literal
 class Storage:
     """Storage data."""
 
-    def __init__(self) -> None:
-        """Initialize storage data."""
-        self.storage_data = self.get_storage_data()
+    def __init__(
+        self, type: str | Literal["single_battery", "none"] = "single_battery"
+    ) -> None:
+        """Initialize storage data.
+
+        Args:
+            type ("single_battery" | "none", optional): Type of storage data to
+                generate. "none" gives no storage units. Defaults to
+                "single_battery".
+
+        """
+        self.type = type
+        if self.type == "single_battery":
+            self.storage_data = self.get_storage_data()
+        elif self.type == "none":
+            self.storage_data = {}
+        else:
+            raise ValueError("Undefined storage data")
 
     def get_storage_data(self) -> dict:
         """Get storage data."""
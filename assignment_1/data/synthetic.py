@@ -0,0 +1,210 @@
+"""Synthetic test cases of arbitrary size, for benchmarking."""
+
+import numpy as np
+
+from assignment_1.data.profiles import normalize_bid_profile
+
+
+class SyntheticCase:
+    """Seeded, synthetic test case.
+
+    Builds network, generation, demand and storage data in the same formats as
+    NetworkData, Generation, Demand and Storage, so that every step model can be
+    run on systems of any size. The same arguments always give the same case.
+
+    The network is connected (a random spanning tree plus extra lines, which
+    makes it meshed), the nodes are split into contiguous bidding zones, and
+    generation capacity exceeds peak demand so that the market always clears
+    with positive welfare.
+    """
+
+    def __init__(
+        self,
+        n_buses: int,
+        n_gens: int,
+        n_demands: int,
+        T: int | None = None,
+        n_storage: int = 1,
+        n_zones: int = 2,
+        wind_share: float = 0.25,
+        meshing: float = 0.5,
+        seed: int = 0,
+    ) -> None:
+        """Initialize the synthetic case.
+
+        Args:
+            n_buses (int): Number of buses (nodes).
+            n_gens (int): Number of generators.
+            n_demands (int): Number of demands.
+            T (int | None, optional): Number of time periods. Default is None, which
+                gives single period data (scalar capacity and cost).
+            n_storage (int, optional): Number of storage units. Defaults to 1.
+            n_zones (int, optional): Number of bidding zones. Defaults to 2.
+            wind_share (float, optional): Share of the generators that are wind farms.
+                Defaults to 0.25.
+            meshing (float, optional): Number of lines added on top of the spanning
+                tree, relative to the number of buses. Defaults to 0.5.
+            seed (int, optional): Seed of the random number generator. Defaults to 0.
+
+        """
+        if n_buses < 1 or n_gens < 1 or n_demands < 1:
+            raise ValueError("The case needs at least one bus, generator and demand.")
+        if not 1 <= n_zones <= n_buses:
+            raise ValueError("The number of zones must be between 1 and n_buses.")
+
+        self.n_buses = n_buses
+        self.n_gens = n_gens
+        self.n_demands = n_demands
+        self.T = T
+        self.wind_share = wind_share
+        self.rng = np.random.default_rng(seed)
+
+        self.demand_data = self.get_demand_data()
+        self.generation_data = self.get_generation_data()
+        self.network_data = self.get_network_data(n_zones, meshing)
+        self.storage_data = self.get_storage_data(n_storage)
+
+    def _nodes(self, n: int) -> list[str]:
+        """Draw random node names for n units."""
+        return (self.rng.integers(0, self.n_buses, size=n) + 1).astype(str).tolist()
+
+    def _daily_profile(self) -> np.ndarray:
+        """Draw a daily load shape with noise, scaled to a mean of 1."""
+        hours = np.arange(self.T)
+        profile = (
+            1
+            - 0.25 * np.cos(2 * np.pi * (hours - 3) / 24)
+            + 0.05 * self.rng.standard_normal(self.T)
+        )
+        return profile / profile.mean()
+
+    def get_demand_data(self) -> dict:
+        """Get synthetic demand data."""
+        capacity = self.rng.uniform(50, 250, size=self.n_demands)
+        cost = self.rng.uniform(10, 35, size=self.n_demands)
+        nodes = self._nodes(self.n_demands)
+        self.peak_demand = float(capacity.sum())
+
+        if self.T is None:
+            capacity_list = capacity.tolist()
+            cost_list = cost.tolist()
+        else:
+            load_profile = self._daily_profile()
+            self.peak_demand *= float(load_profile.max())
+            capacity_list = np.outer(capacity, load_profile).tolist()
+            cost_list = np.outer(cost, normalize_bid_profile(load_profile)).tolist()
+
+        self.demand_data = {
+            f"D{i + 1}": {
+                "type": "demand",
+                "node": nodes[i],
+                "capacity": capacity_list[i],
+                "cost": cost_list[i],
+            }
+            for i in range(self.n_demands)
+        }
+        return self.demand_data
+
+    def get_generation_data(self) -> dict:
+        """Get synthetic generation data."""
+        is_wind = self.rng.random(self.n_gens) < self.wind_share
+        capacity = self.rng.uniform(50, 400, size=self.n_gens)
+        # Scale conventional capacity to cover peak demand with a margin
+        conv_capacity = capacity[~is_wind].sum()
+        if conv_capacity > 0:
+            capacity[~is_wind] *= 1.3 * self.peak_demand / conv_capacity
+        cost = np.where(is_wind, 0.0, self.rng.uniform(5, 30, size=self.n_gens))
+        nodes = self._nodes(self.n_gens)
+
+        if self.T is None:
+            capacity_list = (capacity * np.where(is_wind, 0.4, 1.0)).tolist()
+            cost_list = cost.tolist()
+        else:
+            # Wind availability as a bounded random walk per wind farm
+            steps = 0.1 * self.rng.standard_normal((self.n_gens, self.T))
+            availability = np.clip(
+                self.rng.uniform(0.2, 0.8, size=(self.n_gens, 1))
+                + np.cumsum(steps, axis=1),
+                0,
+                1,
+            )
+            availability[~is_wind] = 1.0
+            capacity_list = (capacity[:, None] * availability).tolist()
+            cost_list = np.repeat(cost[:, None], self.T, axis=1).tolist()
+
+        self.generation_data = {
+            f"G{i + 1}": {
+                "type": "wind" if is_wind[i] else "conv",
+                "node": nodes[i],
+                "capacity": capacity_list[i],
+                "cost": cost_list[i],
+            }
+            for i in range(self.n_gens)
+        }
+        return self.generation_data
+
+    def get_network_data(self, n_zones: int, meshing: float) -> dict:
+        """Get synthetic network data.
+
+        Args:
+            n_zones (int): Number of bidding zones.
+            meshing (float): Number of extra lines relative to the number of buses.
+
+        """
+        n = self.n_buses
+        # Random spanning tree, connecting each bus to one of the previous buses
+        tree_to = np.arange(1, n)
+        tree_from = (self.rng.random(n - 1) * tree_to).astype(int)
+        # Extra lines between random pairs of distinct buses
+        n_extra = int(meshing * n) if n > 2 else 0
+        extra_from = self.rng.integers(0, n, size=n_extra)
+        extra_to = (extra_from + self.rng.integers(1, n, size=n_extra)) % n
+        from_bus = np.concatenate((tree_from, extra_from)) + 1
+        to_bus = np.concatenate((tree_to, extra_to)) + 1
+
+        n_lines = len(from_bus)
+        reactance = self.rng.uniform(0.01, 0.2, size=n_lines).round(4)
+        # Size the lines relative to the average load per bus
+        line_scale = self.peak_demand / n
+        capacity = (self.rng.uniform(2, 6, size=n_lines) * line_scale).round(1)
+
+        zone = np.arange(n) * n_zones // n + 1
+        self.network_data = {
+            "nodes": {str(i + 1): {"bz": f"BZ{zone[i]}"} for i in range(n)},
+            "lines": {
+                f"L{i + 1}": {
+                    "from": str(from_bus[i]),
+                    "to": str(to_bus[i]),
+                    "reactance": float(reactance[i]),
+                    "capacity": float(capacity[i]),
+                }
+                for i in range(n_lines)
+            },
+        }
+        return self.network_data
+
+    def get_storage_data(self, n_storage: int) -> dict:
+        """Get synthetic storage data.
+
+        Args:
+            n_storage (int): Number of storage units.
+
+        """
+        capacity = self.rng.uniform(100, 1000, size=n_storage)
+        power = capacity * self.rng.uniform(0.25, 1, size=n_storage)
+        nodes = self._nodes(n_storage)
+
+        self.storage_data = {
+            f"S{i + 1}": {
+                "type": "storage",
+                "node": nodes[i],
+                "capacity": float(capacity[i]),
+                "charge_cap": float(power[i]),
+                "discharge_cap": float(power[i]),
+                "charge_eff": 0.95,
+                "discharge_eff": 0.95,
+                "initial_soc": 0.5,
+            }
+            for i in range(n_storage)
+        }
+        return self.storage_data
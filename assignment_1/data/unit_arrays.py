@@ -0,0 +1,239 @@
+"""Columnar (struct-of-arrays) representation of generation and demand data."""
+
+from typing import Any
+
+import numpy as np
+
+
+class UnitArrays:
+    """Generation or demand data stored as NumPy arrays.
+
+    The dict-of-dicts format used throughout the assignment
+    ({unit: {"type", "node", "capacity", "cost"}}) is converted to one array per
+    field, so that consumers can work on all units and hours at once.
+
+    Attributes:
+        ids (list[str]): Unit ids, in the order of the rows of the arrays.
+        node_ids (list[str]): Node names referenced by `node`.
+        node (np.ndarray): Node index of each unit into `node_ids`, shape (n_units,).
+        type_names (list[str]): Unit type names referenced by `type_code`.
+        type_code (np.ndarray): Type index of each unit into `type_names`, shape (n_units,).
+        capacity (np.ndarray): Capacity, float64 of shape (n_units, T).
+        cost (np.ndarray): Cost/bid price, float64 of shape (n_units, T).
+        multi_period (bool): Whether the data is a time series. Single-period data
+            is stored with T = 1 and converted back to scalars by `to_dict`.
+
+    """
+
+    def __init__(
+        self,
+        ids: list[str],
+        node_ids: list[str],
+        node: np.ndarray,
+        type_names: list[str],
+        type_code: np.ndarray,
+        capacity: np.ndarray,
+        cost: np.ndarray,
+        multi_period: bool = True,
+    ) -> None:
+        """Initialize the unit arrays.
+
+        Args:
+            ids (list[str]): Unit ids.
+            node_ids (list[str]): Node names referenced by `node`.
+            node (np.ndarray): Node index of each unit.
+            type_names (list[str]): Unit type names referenced by `type_code`.
+            type_code (np.ndarray): Type index of each unit.
+            capacity (np.ndarray): Capacity of shape (n_units, T).
+            cost (np.ndarray): Cost of shape (n_units, T).
+            multi_period (bool, optional): Whether the data is a time series.
+                Defaults to True.
+
+        """
+        self.ids = list(ids)
+        self.node_ids = list(node_ids)
+        self.node = np.asarray(node, dtype=np.int64)
+        self.type_names = list(type_names)
+        self.type_code = np.asarray(type_code, dtype=np.int8)
+        self.capacity = np.atleast_2d(np.asarray(capacity, dtype=np.float64))
+        self.cost = np.atleast_2d(np.asarray(cost, dtype=np.float64))
+        self.multi_period = multi_period
+
+        if self.capacity.shape != self.cost.shape:
+            raise ValueError("Capacity and cost arrays must have the same shape.")
+        if self.capacity.shape[0] != len(self.ids):
+            raise ValueError("Capacity and cost arrays must have one row per unit.")
+        if not self.multi_period and self.capacity.shape[1] != 1:
+            raise ValueError("Single period data must have exactly one time period.")
+
+    @classmethod
+    def from_dict(
+        cls,
+        unit_data: dict[str, dict[str, Any]],
+        node_ids: list[str] | None = None,
+        T: int | None = None,
+    ) -> "UnitArrays":
+        """Create unit arrays from the dict format.
+
+        Args:
+            unit_data (dict): Generation or demand data.
+            node_ids (list[str], optional): Node names to index the unit nodes into,
+                e.g. the nodes of the network data. Default is None, which means the
+                nodes are indexed in order of first appearance.
+            T (int, optional): Number of time periods if there are no units, which
+                cannot be read from the data. Default is None, which means empty
+                data is single period, with arrays of shape (0, 1).
+
+        Returns:
+            UnitArrays: Columnar representation of the data.
+
+        """
+        if node_ids is None:
+            node_ids = list(dict.fromkeys(data["node"] for data in unit_data.values()))
+        node_index = {node: i for i, node in enumerate(node_ids)}
+        type_names = list(dict.fromkeys(data["type"] for data in unit_data.values()))
+        type_index = {unit_type: i for i, unit_type in enumerate(type_names)}
+
+        multi_period = any(np.ndim(data["capacity"]) > 0 for data in unit_data.values())
+        if not unit_data:
+            # No units to read the time periods from
+            multi_period = T is not None
+            capacity = np.zeros((0, 1 if T is None else T))
+            cost = np.zeros((0, 1 if T is None else T))
+        elif multi_period:
+            capacity = np.array(
+                [data["capacity"] for data in unit_data.values()], dtype=np.float64
+            )
+            cost = np.array(
+                [data["cost"] for data in unit_data.values()], dtype=np.float64
+            )
+        else:
+            capacity = np.array(
+                [[data["capacity"]] for data in unit_data.values()], dtype=np.float64
+            )
+            cost = np.array(
+                [[data["cost"]] for data in unit_data.values()], dtype=np.float64
+            )
+        if unit_data:
+            capacity = capacity.reshape(len(unit_data), -1)
+            cost = cost.reshape(len(unit_data), -1)
+
+        return cls(
+            ids=list(unit_data),
+            node_ids=node_ids,
+            node=np.array(
+                [node_index[data["node"]] for data in unit_data.values()],
+                dtype=np.int64,
+            ),
+            type_names=type_names,
+            type_code=np.array(
+                [type_index[data["type"]] for data in unit_data.values()],
+                dtype=np.int8,
+            ),
+            capacity=capacity,
+            cost=cost,
+            multi_period=multi_period,
+        )
+
+    def to_dict(self) -> dict[str, dict[str, Any]]:
+        """Convert the unit arrays back to the dict format.
+
+        Returns:
+            dict: Generation or demand data, with scalar capacity and cost for
+                single period data and lists for multi period data.
+
+        """
+        if self.multi_period:
+            capacity = self.capacity.tolist()
+            cost = self.cost.tolist()
+        else:
+            capacity = self.capacity[:, 0].tolist()
+            cost = self.cost[:, 0].tolist()
+
+        return {
+            unit: {
+                "type": self.type_names[self.type_code[i]],
+                "node": self.node_ids[self.node[i]],
+                "capacity": capacity[i],
+                "cost": cost[i],
+            }
+            for i, unit in enumerate(self.ids)
+        }
+
+    @property
+    def n_units(self) -> int:
+        """Number of units."""
+        return len(self.ids)
+
+    @property
+    def n_periods(self) -> int:
+        """Number of time periods."""
+        return self.capacity.shape[1]
+
+    @property
+    def nodes(self) -> list[str]:
+        """Node name of each unit."""
+        return [self.node_ids[i] for i in self.node]
+
+    def window(self, start: int, stop: int) -> "UnitArrays":
+        """Get the units restricted to the time periods [start, stop).
+
+        Args:
+            start (int): First time period.
+            stop (int): Time period after the last one.
+
+        Returns:
+            UnitArrays: Unit arrays for the window (views of the original arrays).
+
+        """
+        if not self.multi_period:
+            raise ValueError("Cannot take a time window of single period data.")
+
+        return UnitArrays(
+            ids=self.ids,
+            node_ids=self.node_ids,
+            node=self.node,
+            type_names=self.type_names,
+            type_code=self.type_code,
+            capacity=self.capacity[:, start:stop],
+            cost=self.cost[:, start:stop],
+            multi_period=True,
+        )
+
+
+def as_unit_dict(unit_data: dict | UnitArrays) -> dict:
+    """Get generation or demand data in the dict format.
+
+    Args:
+        unit_data (dict | UnitArrays): Generation or demand data in either format.
+
+    Returns:
+        dict: Generation or demand data in the dict format.
+
+    """
+    if isinstance(unit_data, UnitArrays):
+        return unit_data.to_dict()
+    return unit_data
+
+
+def as_unit_arrays(
+    unit_data: dict | UnitArrays,
+    node_ids: list[str] | None = None,
+    T: int | None = None,
+) -> UnitArrays:
+    """Get generation or demand data in the columnar format.
+
+    Args:
+        unit_data (dict | UnitArrays): Generation or demand data in either format.
+        node_ids (list[str], optional): Node names to index the unit nodes into,
+            when converting from the dict format. Default is None.
+        T (int, optional): Number of time periods of empty data in the dict
+            format (see `UnitArrays.from_dict`). Default is None.
+
+    Returns:
+        UnitArrays: Generation or demand data as arrays.
+
+    """
+    if isinstance(unit_data, UnitArrays):
+        return unit_data
+    return UnitArrays.from_dict(unit_data, node_ids=node_ids, T=T)
@@ -0,0 +1,307 @@
+"""N-1 contingency screening with line outage distribution factors (LODF).
+
+After the outage of line k, the flow on line l changes by LODF[l, k] times the
+flow on line k before the outage (see `Topology.lodf`). With the LODF matrix,
+which is computed once per topology from the cached PTDF, the flows of all
+lines after all single line outages are one (lines x outages) array operation
+on the base case flows, instead of one load flow (or one market clearing) per
+outage:
+
+    model, var, constr = optimization_model(gen_data, demand_data, network_data)
+    flows = dispatch_flows(model, var, gen_data, demand_data, topology)
+    result = screen_n_1(topology, flows, capacity)
+    for outage, line, loading in zip(result.outages, result.lines, result.loading):
+        print(f"Outage of {outage} overloads {line} to {loading:.0%}")
+
+Outages of lines that split the network into islands (e.g. radial lines) have
+no post-outage load flow without redispatch. They are not screened, and are
+reported in `ContingencyResult.islanding`.
+
+`secure_optimize` uses the screening for N-1 secure market clearing, adding
+only the post-outage flow limits that the current dispatch violates.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from assignment_1.data.network import Topology
+from assignment_1.data.unit_arrays import UnitArrays, as_unit_arrays
+from assignment_1.models.linear_program import GRB, LinearProgram, LinExpr
+from assignment_1.utils.lazy import lazy_import
+from assignment_1.utils.results import get_attr
+from assignment_1.utils.telemetry import track
+
+gp = lazy_import("gurobipy")
+sp = lazy_import("scipy.sparse")
+
+# Number of outages screened at once by `screen_n_1`
+_BLOCK_SIZE = 16
+
+
+class ContingencyResult:
+    """Overloads found by an N-1 screening, one entry per (outage, line) pair.
+
+    The pairs are sorted by outage and then by overloaded line, in line index
+    order.
+
+    Attributes:
+        outage_index (np.ndarray): Index of the line out of service.
+        line_index (np.ndarray): Index of the overloaded line.
+        outages (list[str]): Name of the line out of service.
+        lines (list[str]): Name of the overloaded line.
+        flows (np.ndarray): Flow on the overloaded line after the outage.
+        capacity (np.ndarray): Capacity of the overloaded line (times the
+            rating factor of the screening).
+        loading (np.ndarray): Absolute flow relative to the capacity.
+        islanding (list[str]): Lines whose outage splits the network into
+            islands, which are not screened.
+        n_outages (int): Number of outages screened.
+
+    """
+
+    def __init__(
+        self,
+        topology: Topology,
+        outage_index: np.ndarray,
+        line_index: np.ndarray,
+        flows: np.ndarray,
+        capacity: np.ndarray,
+        islanding: np.ndarray,
+    ) -> None:
+        """Initialize the result."""
+        self.outage_index = outage_index
+        self.line_index = line_index
+        self.outages = [topology.line_ids[line] for line in outage_index.tolist()]
+        self.lines = [topology.line_ids[line] for line in line_index.tolist()]
+        self.flows = flows
+        self.capacity = capacity
+        self.loading = np.abs(flows) / capacity
+        self.islanding = [
+            topology.line_ids[line] for line in np.flatnonzero(islanding).tolist()
+        ]
+        self.n_outages = topology.n_lines - len(self.islanding)
+
+    def __len__(self) -> int:
+        """Number of overloaded (outage, line) pairs."""
+        return len(self.outage_index)
+
+    @property
+    def is_secure(self) -> bool:
+        """Whether no screened outage overloads a line."""
+        return len(self) == 0
+
+
+def post_outage_flows(topology: Topology, flows: np.ndarray) -> np.ndarray:
+    """Flows of all lines after each single line outage.
+
+    Args:
+        topology (Topology): Topology index of the network.
+        flows (np.ndarray): Flow on each line before the outages.
+
+    Returns:
+        np.ndarray: Flows of shape (n_lines, n_lines), where column k holds the
+            flows after the outage of line k. Columns of islanding outages are
+            NaN.
+
+    """
+    return flows[:, None] + topology.lodf * flows[None, :]
+
+
+def screen_n_1(
+    topology: Topology,
+    flows: np.ndarray,
+    capacity: np.ndarray,
+    rating: float = 1.0,
+    tol: float = 1e-6,
+) -> ContingencyResult:
+    """Screen all single line outages for overloads.
+
+    Args:
+        topology (Topology): Topology index of the network.
+        flows (np.ndarray): Flow on each line before the outages.
+        capacity (np.ndarray): Capacity of each line.
+        rating (float, optional): Factor on the capacities after an outage, e.g.
+            1.2 for a short-term emergency rating. Defaults to 1.0.
+        tol (float, optional): Tolerance on overloads. Defaults to 1e-6.
+
+    Returns:
+        ContingencyResult: The overloads.
+
+    """
+    limit = rating * capacity
+    lodf = topology.lodf
+    islanding = np.isnan(np.diag(lodf))
+
+    # A line l is overloaded after the outage of line k if the flow change
+    # LODF[l, k] * flows[k] is above limit - flows[l] or below -limit - flows[l].
+    # The outages are screened in blocks whose changes stay in the cache, which
+    # is several times faster than the full (lines x outages) post-outage flows.
+    upper = limit + tol - flows
+    lower = -limit - tol - flows
+    n_lines = topology.n_lines
+    block = np.empty((_BLOCK_SIZE, n_lines))
+    outage_blocks = [np.empty(0, dtype=np.intp)]
+    line_blocks = [np.empty(0, dtype=np.intp)]
+    for start in range(0, n_lines, _BLOCK_SIZE):
+        stop = min(start + _BLOCK_SIZE, n_lines)
+        change = block[: stop - start]
+        # Rows of change are outages, so the pairs are sorted by outage
+        np.multiply(lodf[:, start:stop].T, flows[start:stop, None], out=change)
+        # NaN changes of islanding outages compare as False
+        overloaded = (change > upper) | (change < lower)
+        if overloaded.any():
+            outages, lines = np.nonzero(overloaded)
+            outage_blocks.append(outages + start)
+            line_blocks.append(lines)
+    outage_index = np.concatenate(outage_blocks)
+    line_index = np.concatenate(line_blocks)
+    post_flows = (
+        flows[line_index] + lodf[line_index, outage_index] * flows[outage_index]
+    )
+    return ContingencyResult(
+        topology,
+        outage_index,
+        line_index,
+        post_flows,
+        limit[line_index],
+        islanding,
+    )
+
+
+def dispatch_flows(
+    model: gp.Model,
+    var: dict,
+    gen_data: dict | UnitArrays,
+    demand_data: dict | UnitArrays,
+    topology: Topology,
+) -> np.ndarray:
+    """Line flows of a solved nodal market clearing, from the net injections.
+
+    This works for every formulation of the nodal model (voltage angles, PTDF
+    and the matrix API), since they all have one variable per unit.
+
+    Args:
+        model (gp.Model): Optimized model.
+        var (dict): Dictionary of variables, with the units by name.
+        gen_data (dict | UnitArrays): Generation data.
+        demand_data (dict | UnitArrays): Demand data.
+        topology (Topology): Topology index of the network.
+
+    Returns:
+        np.ndarray: Flow on each line.
+
+    """
+    gens = as_unit_arrays(gen_data)
+    demands = as_unit_arrays(demand_data)
+    injection = topology.unit_matrix(gens) @ get_attr(
+        model, "X", [var[gen] for gen in gens.ids]
+    ) - topology.unit_matrix(demands) @ get_attr(
+        model, "X", [var[demand] for demand in demands.ids]
+    )
+    return topology.ptdf() @ injection
+
+
+def secure_optimize(
+    model: gp.Model,
+    var: dict,
+    constr: dict,
+    network_data: dict,
+    topology: Topology,
+    rating: float = 1.0,
+    tol: float = 1e-6,
+    max_iterations: int = 100,
+) -> None:
+    """Optimize a nodal market clearing with lazy N-1 security constraints.
+
+    The base case is optimized and screened for overloads after single line
+    outages (see `screen_n_1`). For each overloaded (outage, line) pair, the
+    post-outage flow limit `flow[l] + LODF[l, k] * flow[k] <= rating *
+    capacity[l]` (or >= its negative) is added in terms of the voltage angles,
+    and the model is re-optimized from the previous basis, until no outage
+    overloads a line. Only a few of the 2 * n_lines**2 post-outage limits are
+    usually ever added.
+
+    The constraints are added to `constr` as `contingency_{outage}_{line}_pos`
+    (or `_neg`), and the number of iterations and constraints added are stored
+    in `model._iterations` and `model._contingency_limits_added`.
+
+    Args:
+        model (gp.Model): Nodal model with voltage angle variables (a
+            LinearProgram for HiGHS, which solves every iteration from scratch).
+        var (dict): Dictionary of variables, with the angles as `theta_{node}`.
+        constr (dict): Dictionary of constraints.
+        network_data (dict): Network data.
+        topology (Topology): Topology index of the network data.
+        rating (float, optional): Factor on the capacities after an outage.
+            Defaults to 1.0.
+        tol (float, optional): Tolerance on overloads. Defaults to 1e-6.
+        max_iterations (int, optional): Maximum number of times to add
+            contingency limits and re-optimize. Defaults to 100.
+
+    Raises:
+        ValueError: If contingency limits are still violated after
+            `max_iterations` iterations.
+
+    """
+    tracker = track("n_1", n_lines=topology.n_lines)
+    theta = [var[f"theta_{node}"] for node in topology.node_ids]
+    capacity = np.array(
+        [network_data["lines"][line]["capacity"] for line in topology.line_ids],
+        dtype=float,
+    )
+    branch_susceptance = topology.branch_susceptance
+    lodf = topology.lodf
+    expr_type = LinExpr if isinstance(model, LinearProgram) else gp.LinExpr
+
+    # Re-optimize with dual simplex from the previous basis after adding limits
+    model.Params.Method = 1
+
+    model._iterations = 0
+    model._contingency_limits_added = 0
+    while True:
+        model.optimize()
+        model._iterations += 1
+        tracker.lap("optimize", model, iteration=model._iterations)
+        if model.status != GRB.OPTIMAL:
+            break
+
+        flows = branch_susceptance @ get_attr(model, "X", theta)
+        result = screen_n_1(topology, flows, capacity, rating, tol)
+
+        # Post-outage flows per voltage angle, one row per overloaded pair
+        rows = sp.csr_array(
+            branch_susceptance[result.line_index]
+            + sp.diags_array(lodf[result.line_index, result.outage_index])
+            @ branch_susceptance[result.outage_index]
+        )
+        added = 0
+        for i, (outage, line) in enumerate(
+            zip(result.outages, result.lines, strict=True)
+        ):
+            nodes = rows.indices[rows.indptr[i] : rows.indptr[i + 1]]
+            expr = expr_type(
+                rows.data[rows.indptr[i] : rows.indptr[i + 1]].tolist(),
+                [theta[node] for node in nodes.tolist()],
+            )
+            if result.flows[i] > 0:
+                name = f"contingency_{outage}_{line}_pos"
+                if name not in constr:
+                    constr[name] = model.addLConstr(expr <= result.capacity[i])
+                    added += 1
+            else:
+                name = f"contingency_{outage}_{line}_neg"
+                if name not in constr:
+                    constr[name] = model.addLConstr(expr >= -result.capacity[i])
+                    added += 1
+        model._contingency_limits_added += added
+        tracker.lap("add_contingency_limits", added=added)
+
+        if added == 0:
+            break
+        if model._iterations >= max_iterations:
+            # The added limits are not in the solution, which is still OPTIMAL
+            raise ValueError(
+                f"Contingency limits still violated after {max_iterations} "
+                "iterations of the N-1 secure model."
+            )
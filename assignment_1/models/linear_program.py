@@ -0,0 +1,690 @@
+"""Solver-independent linear programs in sparse matrix form.
+
+`LinearProgram` implements the part of the gurobipy modeling API used by the
+market clearing models (addVar, addLConstr, setObjective, quicksum, optimize,
+X/Pi/RC/Slack, UB/LB/Obj/RHS updates). The models are therefore built the same
+way for every solver. Before solving, the program is assembled into the sparse
+form
+
+    optimize    c @ x + c0
+    subject to  A @ x (<=, ==, >=) rhs
+                lb <= x <= ub
+
+which is solved either with HiGHS through SciPy (no license needed) or with
+Gurobi through its matrix API.
+
+Results follow the Gurobi conventions for both backends: `Pi` is the change in
+the objective value per unit increase of the right-hand side (positive nodal
+prices for the power balances), `RC` is c - A.T @ Pi, and `status` uses the
+Gurobi status codes. On degenerate LPs the duals of the two solvers may be
+different (equally valid) vertices of the dual polytope.
+"""
+
+from __future__ import annotations
+
+import itertools
+import time
+from collections.abc import Iterable, Sequence
+from typing import Literal
+
+import numpy as np
+
+from assignment_1.utils.environment import shared_env
+from assignment_1.utils.lazy import is_loaded, lazy_import
+
+gp = lazy_import("gurobipy")
+sp = lazy_import("scipy.sparse")
+scipy_optimize = lazy_import("scipy.optimize")
+
+# Gurobi constants, so that the models can compare to GRB.* values
+MINIMIZE = 1
+MAXIMIZE = -1
+INFINITY = 1e100
+LOADED = 1
+OPTIMAL = 2
+INFEASIBLE = 3
+UNBOUNDED = 5
+ITERATION_LIMIT = 7
+NUMERIC = 12
+
+SOLVERS = ("gurobi", "highs")
+
+
+class GRB:
+    """Gurobi constants used by the models, available without loading gurobipy.
+
+    The values equal those of gurobipy.GRB, so they can be passed to Gurobi
+    models and compared to their attributes.
+    """
+
+    MINIMIZE = MINIMIZE
+    MAXIMIZE = MAXIMIZE
+    INFINITY = INFINITY
+    LOADED = LOADED
+    OPTIMAL = OPTIMAL
+    INFEASIBLE = INFEASIBLE
+    UNBOUNDED = UNBOUNDED
+    ITERATION_LIMIT = ITERATION_LIMIT
+    NUMERIC = NUMERIC
+
+
+class Var:
+    """Variable of a LinearProgram."""
+
+    __slots__ = ("model", "index")
+    # Let NumPy scalars defer to Var, e.g. np.float64(2.0) * var is a LinExpr
+    __array_ufunc__ = None
+
+    def __init__(self, model: LinearProgram, index: int) -> None:
+        """Initialize the variable."""
+        self.model = model
+        self.index = index
+
+    __hash__ = object.__hash__
+
+    def _expr(self) -> LinExpr:
+        return LinExpr([1.0], [self])
+
+    def __add__(self, other: object) -> LinExpr:
+        """Sum with another term."""
+        return self._expr() + other
+
+    __radd__ = __add__
+
+    def __sub__(self, other: object) -> LinExpr:
+        """Difference with another term."""
+        return self._expr() - other
+
+    def __rsub__(self, other: object) -> LinExpr:
+        """Difference of another term and this one."""
+        return other - self._expr()
+
+    def __mul__(self, other: float) -> LinExpr:
+        """Product with a number."""
+        return LinExpr([float(other)], [self])
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other: float) -> LinExpr:
+        """Quotient by a number."""
+        return LinExpr([1 / float(other)], [self])
+
+    def __neg__(self) -> LinExpr:
+        """Negation."""
+        return LinExpr([-1.0], [self])
+
+    def __eq__(self, other: object) -> TempConstr:  # type: ignore[override]
+        """Equality constraint."""
+        return self._expr() == other
+
+    def __le__(self, other: object) -> TempConstr:
+        """Less-than-or-equal constraint."""
+        return self._expr() <= other
+
+    def __ge__(self, other: object) -> TempConstr:
+        """Greater-than-or-equal constraint."""
+        return self._expr() >= other
+
+    @property
+    def X(self) -> float:  # noqa: N802
+        """Value in the current solution."""
+        return float(self.model._x[self.index])
+
+    @property
+    def RC(self) -> float:  # noqa: N802
+        """Reduced cost in the current solution."""
+        return float(self.model._rc[self.index])
+
+    @property
+    def LB(self) -> float:  # noqa: N802
+        """Lower bound."""
+        return self.model._lb[self.index]
+
+    @LB.setter
+    def LB(self, value: float) -> None:  # noqa: N802
+        self.model._lb[self.index] = float(value)
+
+    @property
+    def UB(self) -> float:  # noqa: N802
+        """Upper bound."""
+        return self.model._ub[self.index]
+
+    @UB.setter
+    def UB(self, value: float) -> None:  # noqa: N802
+        self.model._ub[self.index] = float(value)
+
+    @property
+    def Obj(self) -> float:  # noqa: N802
+        """Objective coefficient."""
+        return float(self.model._obj[self.index])
+
+    @Obj.setter
+    def Obj(self, value: float) -> None:  # noqa: N802
+        self.model._obj[self.index] = float(value)
+
+    def getAttr(self, attr: str) -> float:  # noqa: N802
+        """Get an attribute, like gp.Var.getAttr."""
+        return getattr(self, attr)
+
+
+class LinExpr:
+    """Linear expression, a list of (coefficient, variable) terms plus a constant."""
+
+    __slots__ = ("coeffs", "vars", "constant")
+    __array_ufunc__ = None
+
+    def __init__(
+        self,
+        coeffs: Sequence[float] | None = None,
+        vars: Sequence[Var] | None = None,  # noqa: A002
+        constant: float = 0.0,
+    ) -> None:
+        """Initialize the expression, like gp.LinExpr(coeffs, vars)."""
+        self.coeffs = list(coeffs) if coeffs is not None else []
+        self.vars = list(vars) if vars is not None else []
+        self.constant = float(constant)
+
+    def copy(self) -> LinExpr:
+        """Copy of the expression."""
+        return LinExpr(self.coeffs, self.vars, self.constant)
+
+    def _iadd(self, other: object, sign: float = 1.0) -> LinExpr:
+        """Add another expression, variable or number in place."""
+        if _is_foreign(other):
+            raise TypeError(
+                "Cannot combine LinearProgram expressions with Gurobi expressions."
+            )
+        if isinstance(other, LinExpr):
+            if sign == 1.0:
+                self.coeffs.extend(other.coeffs)
+            else:
+                self.coeffs.extend(sign * coeff for coeff in other.coeffs)
+            self.vars.extend(other.vars)
+            self.constant += sign * other.constant
+        elif isinstance(other, Var):
+            self.coeffs.append(sign)
+            self.vars.append(other)
+        else:
+            self.constant += sign * float(other)
+        return self
+
+    def __iadd__(self, other: object) -> LinExpr:
+        """Add another term in place."""
+        return self._iadd(other)
+
+    def __isub__(self, other: object) -> LinExpr:
+        """Subtract another term in place."""
+        return self._iadd(other, -1.0)
+
+    def _constant(self, other: object) -> float | None:
+        """Constant this expression stands in for next to a Gurobi term, if any."""
+        if not _is_foreign(other) or self.vars:
+            return None
+        return self.constant
+
+    def __add__(self, other: object) -> LinExpr:
+        """Sum with another term."""
+        if (constant := self._constant(other)) is not None:
+            return constant + other
+        return self.copy()._iadd(other)
+
+    __radd__ = __add__
+
+    def __sub__(self, other: object) -> LinExpr:
+        """Difference with another term."""
+        if (constant := self._constant(other)) is not None:
+            return constant - other
+        return self.copy()._iadd(other, -1.0)
+
+    def __rsub__(self, other: object) -> LinExpr:
+        """Difference of another term and this one."""
+        if (constant := self._constant(other)) is not None:
+            return other - constant
+        return (-self)._iadd(other)
+
+    def __mul__(self, other: float) -> LinExpr:
+        """Product with a number."""
+        factor = float(other)
+        return LinExpr(
+            [factor * coeff for coeff in self.coeffs],
+            self.vars,
+            factor * self.constant,
+        )
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other: float) -> LinExpr:
+        """Quotient by a number."""
+        return self * (1 / float(other))
+
+    def __neg__(self) -> LinExpr:
+        """Negation."""
+        return self * -1.0
+
+    def __eq__(self, other: object) -> TempConstr:  # type: ignore[override]
+        """Equality constraint."""
+        if (constant := self._constant(other)) is not None:
+            return constant == other
+        return TempConstr(self - other, "=")
+
+    def __le__(self, other: object) -> TempConstr:
+        """Less-than-or-equal constraint."""
+        if (constant := self._constant(other)) is not None:
+            return constant <= other
+        return TempConstr(self - other, "<")
+
+    def __ge__(self, other: object) -> TempConstr:
+        """Greater-than-or-equal constraint."""
+        if (constant := self._constant(other)) is not None:
+            return constant >= other
+        return TempConstr(self - other, ">")
+
+    __hash__ = None  # type: ignore[assignment]
+
+
+def _is_foreign(term: object) -> bool:
+    """Whether a term is not a LinearProgram term or number, i.e. from Gurobi."""
+    return not isinstance(term, Var | LinExpr | float | int | np.number)
+
+
+class TempConstr:
+    """Constraint expr (<, =, >) 0, before it is added to a program."""
+
+    __slots__ = ("expr", "sense")
+
+    def __init__(self, expr: LinExpr, sense: str) -> None:
+        """Initialize the constraint."""
+        self.expr = expr
+        self.sense = sense
+
+
+class Constr:
+    """Linear constraint of a LinearProgram."""
+
+    __slots__ = ("model", "index")
+
+    def __init__(self, model: LinearProgram, index: int) -> None:
+        """Initialize the constraint."""
+        self.model = model
+        self.index = index
+
+    @property
+    def Pi(self) -> float:  # noqa: N802
+        """Dual value in the current solution."""
+        return float(self.model._pi[self.index])
+
+    @property
+    def Slack(self) -> float:  # noqa: N802
+        """Slack (right-hand side minus left-hand side) in the current solution."""
+        return float(self.model._slack[self.index])
+
+    @property
+    def RHS(self) -> float:  # noqa: N802
+        """Right-hand side."""
+        return self.model._rhs[self.index]
+
+    @RHS.setter
+    def RHS(self, value: float) -> None:  # noqa: N802
+        self.model._rhs[self.index] = float(value)
+
+    def getAttr(self, attr: str) -> float:  # noqa: N802
+        """Get an attribute, like gp.Constr.getAttr."""
+        return getattr(self, attr)
+
+
+def quicksum(terms: Iterable) -> LinExpr:
+    """Sum of variables and expressions, like gp.quicksum.
+
+    Works for both LinearProgram and Gurobi terms: sums with Gurobi variables or
+    expressions are passed on to gp.quicksum. Sums of only numbers (or of no
+    terms) are expressions without variables, which stand in for their constant
+    when combined with Gurobi terms, so that they work with either backend.
+
+    Args:
+        terms (Iterable): Variables, expressions or numbers.
+
+    Returns:
+        LinExpr | gp.LinExpr: The sum.
+
+    """
+    terms = iter(terms)
+    constant = 0.0
+    for first in terms:
+        if isinstance(first, LinExpr) and not first.vars:
+            constant += first.constant
+            continue
+        if isinstance(first, Var | LinExpr):
+            break
+        if _is_foreign(first):
+            return constant + gp.quicksum(itertools.chain((first,), terms))
+        constant += first
+    else:
+        return LinExpr(constant=constant)
+
+    expr = LinExpr(constant=constant)
+    expr._iadd(first)
+    for term in terms:
+        expr._iadd(term)
+    return expr
+
+
+class _Params:
+    """Solver parameters. They are stored, and used by the Gurobi backend."""
+
+    def __init__(self) -> None:
+        self.__dict__["values"] = {}
+
+    def __setattr__(self, name: str, value: object) -> None:
+        self.values[name] = value
+
+    def __getattr__(self, name: str) -> object:
+        try:
+            return self.values[name]
+        except KeyError as e:
+            raise AttributeError(name) from e
+
+
+class LinearProgram:
+    """Linear program with a gurobipy-like API, solved with HiGHS or Gurobi.
+
+    Attributes:
+        name (str): Name of the program.
+        solver ("highs" | "gurobi"): Backend that solves the program.
+        status (int): Gurobi status code of the last solve (LOADED before).
+        ObjVal (float): Objective value of the last solve.
+        Runtime (float): Solve time of the last solve in seconds.
+        IterCount (float): Simplex iterations of the last solve.
+        Params: Solver parameters, e.g. `Params.Method = 1` (Gurobi backend only).
+
+    """
+
+    def __init__(
+        self,
+        name: str = "",
+        solver: str | Literal["highs", "gurobi"] = "highs",
+        env: object | None = None,
+    ) -> None:
+        """Initialize an empty program.
+
+        Args:
+            name (str, optional): Name of the program. Defaults to "".
+            solver ("highs" | "gurobi", optional): Backend. Defaults to "highs".
+            env (gp.Env, optional): Gurobi environment of the Gurobi backend.
+                Default is None, which means the shared environment of the
+                process.
+
+        """
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver {solver}, use one of {SOLVERS}.")
+        self.name = name
+        self.solver = solver
+        self.env = env
+        self.Params = _Params()
+
+        self._lb: list[float] = []
+        self._ub: list[float] = []
+        self._obj = np.zeros(0)
+        self._obj_constant = 0.0
+        self._sense = MINIMIZE
+        self._rows: list[tuple[list[float], list[Var]]] = []
+        self._row_sense: list[str] = []
+        self._rhs: list[float] = []
+        self._matrix: sp.csr_array | None = None
+
+        self.status = LOADED
+        self.ObjVal = np.nan
+        self.Runtime = 0.0
+        self.IterCount = 0.0
+
+    @property
+    def NumVars(self) -> int:  # noqa: N802
+        """Number of variables."""
+        return len(self._lb)
+
+    @property
+    def NumConstrs(self) -> int:  # noqa: N802
+        """Number of linear constraints."""
+        return len(self._rows)
+
+    def addVar(self, lb: float = 0.0, ub: float = INFINITY) -> Var:  # noqa: N802
+        """Add a variable.
+
+        Args:
+            lb (float, optional): Lower bound. Defaults to 0.
+            ub (float, optional): Upper bound. Defaults to INFINITY.
+
+        Returns:
+            Var: The variable.
+
+        """
+        self._lb.append(float(lb))
+        self._ub.append(float(ub))
+        return Var(self, len(self._lb) - 1)
+
+    def addLConstr(self, constr: TempConstr) -> Constr:  # noqa: N802
+        """Add a linear constraint, e.g. `model.addLConstr(x + y <= 1)`.
+
+        Args:
+            constr (TempConstr): Constraint.
+
+        Returns:
+            Constr: The constraint.
+
+        """
+        expr = constr.expr
+        self._rows.append((expr.coeffs, expr.vars))
+        self._row_sense.append(constr.sense)
+        self._rhs.append(-expr.constant)
+        self._matrix = None
+        return Constr(self, len(self._rows) - 1)
+
+    addConstr = addLConstr  # noqa: N815
+
+    def setObjective(self, expr: LinExpr | Var, sense: int = MINIMIZE) -> None:  # noqa: N802
+        """Set the objective.
+
+        Args:
+            expr (LinExpr | Var): Linear objective.
+            sense (int, optional): MINIMIZE (1) or MAXIMIZE (-1). Defaults to
+                MINIMIZE.
+
+        """
+        expr = quicksum((expr,))
+        self._obj = np.zeros(self.NumVars)
+        np.add.at(
+            self._obj,
+            np.array([var.index for var in expr.vars], dtype=np.int64),
+            np.array(expr.coeffs, dtype=float),
+        )
+        self._obj_constant = expr.constant
+        self._sense = sense
+
+    def update(self) -> None:
+        """Do nothing, changes are applied at the next solve."""
+
+    def dispose(self) -> None:
+        """Free the sparse matrix."""
+        self._matrix = None
+
+    def getAttr(self, attr: str, items: Sequence[Var] | Sequence[Constr]) -> list:  # noqa: N802
+        """Get an attribute of a list of variables or constraints."""
+        return [getattr(item, attr) for item in items]
+
+    def setAttr(  # noqa: N802
+        self, attr: str, items: Sequence[Var] | Sequence[Constr], values: Sequence
+    ) -> None:
+        """Set an attribute of a list of variables or constraints."""
+        for item, value in zip(items, values, strict=True):
+            setattr(item, attr, value)
+
+    def matrices(
+        self,
+    ) -> tuple[
+        np.ndarray, sp.csr_array, np.ndarray, np.ndarray, np.ndarray, np.ndarray
+    ]:
+        """Get the sparse matrix form of the program.
+
+        Returns:
+            c (np.ndarray): Objective coefficients.
+            A (sp.csr_array): Constraint matrix.
+            sense (np.ndarray): Constraint senses, "<", "=" or ">".
+            rhs (np.ndarray): Right-hand sides.
+            lb (np.ndarray): Lower bounds.
+            ub (np.ndarray): Upper bounds.
+
+        """
+        n_vars = self.NumVars
+        if self._matrix is None:
+            row_lengths = [len(coeffs) for coeffs, _ in self._rows]
+            self._matrix = sp.csr_array(
+                (
+                    np.fromiter(
+                        itertools.chain.from_iterable(c for c, _ in self._rows),
+                        dtype=float,
+                    ),
+                    np.fromiter(
+                        (var.index for _, vars in self._rows for var in vars),
+                        dtype=np.int64,
+                    ),
+                    np.concatenate(([0], np.cumsum(row_lengths, dtype=np.int64))),
+                ),
+                shape=(len(self._rows), n_vars),
+            )
+            # Sum duplicate entries of the same variable in a row
+            self._matrix.sum_duplicates()
+        obj = np.zeros(n_vars)
+        obj[: len(self._obj)] = self._obj
+        self._obj = obj
+        return (
+            obj,
+            self._matrix,
+            np.array(self._row_sense),
+            np.array(self._rhs, dtype=float),
+            np.array(self._lb, dtype=float),
+            np.array(self._ub, dtype=float),
+        )
+
+    def optimize(self) -> None:
+        """Solve the program with the chosen backend."""
+        c, A, sense, rhs, lb, ub = self.matrices()
+        start = time.perf_counter()
+        if self.solver == "highs":
+            x, pi = self._solve_highs(c, A, sense, rhs, lb, ub)
+        else:
+            x, pi = self._solve_gurobi(c, A, sense, rhs, lb, ub)
+        self.Runtime = time.perf_counter() - start
+
+        if self.status == OPTIMAL:
+            self._x = x
+            self._pi = pi
+            self._rc = c - A.T @ pi
+            self._slack = rhs - A @ x
+            self.ObjVal = float(c @ x) + self._obj_constant
+
+    def _solve_highs(
+        self,
+        c: np.ndarray,
+        A: sp.csr_array,  # noqa: N803
+        sense: np.ndarray,
+        rhs: np.ndarray,
+        lb: np.ndarray,
+        ub: np.ndarray,
+    ) -> tuple[np.ndarray | None, np.ndarray | None]:
+        """Solve with HiGHS, and convert the duals to the Gurobi convention."""
+        # linprog minimizes c @ x with A_ub @ x <= b_ub and A_eq @ x == b_eq
+        equal = sense == "="
+        row_sign = np.where(sense == ">", -1.0, 1.0)
+        A_signed = sp.diags(row_sign) @ A  # noqa: N806
+        bounds = np.column_stack(
+            (
+                np.where(lb <= -INFINITY, -np.inf, lb),
+                np.where(ub >= INFINITY, np.inf, ub),
+            )
+        )
+        result = scipy_optimize.linprog(
+            self._sense * c,
+            A_ub=A_signed[~equal] if (~equal).any() else None,
+            b_ub=(row_sign * rhs)[~equal] if (~equal).any() else None,
+            A_eq=A[equal] if equal.any() else None,
+            b_eq=rhs[equal] if equal.any() else None,
+            bounds=bounds,
+            method="highs",
+        )
+        self.IterCount = float(getattr(result, "nit", 0))
+        self.status = {0: OPTIMAL, 1: ITERATION_LIMIT, 2: INFEASIBLE, 3: UNBOUNDED}.get(
+            result.status, NUMERIC
+        )
+        if self.status != OPTIMAL:
+            return None, None
+
+        # Marginals are d(minimized objective)/d(b), convert to d(ObjVal)/d(rhs)
+        marginals = np.zeros(len(rhs))
+        if (~equal).any():
+            marginals[~equal] = result.ineqlin.marginals
+        if equal.any():
+            marginals[equal] = result.eqlin.marginals
+        return result.x, self._sense * row_sign * marginals
+
+    def _solve_gurobi(
+        self,
+        c: np.ndarray,
+        A: sp.csr_array,  # noqa: N803
+        sense: np.ndarray,
+        rhs: np.ndarray,
+        lb: np.ndarray,
+        ub: np.ndarray,
+    ) -> tuple[np.ndarray | None, np.ndarray | None]:
+        """Solve the sparse form with the Gurobi matrix API."""
+        env = self.env if self.env is not None else shared_env()
+        with gp.Model(self.name, env=env) as model:
+            for name, value in self.Params.values.items():
+                model.setParam(name, value)
+            x = model.addMVar(len(c), lb=lb, ub=ub, obj=c)
+            model.ModelSense = self._sense
+            constr = model.addMConstr(A, x, sense, rhs)
+            model.optimize()
+            self.status = model.status
+            self.IterCount = model.IterCount
+            if self.status != OPTIMAL:
+                return None, None
+            return x.X, constr.Pi
+
+
+def create_model(
+    name: str,
+    solver: str | Literal["gurobi", "highs"] = "gurobi",
+    env: object | None = None,
+) -> LinearProgram:
+    """Create an empty model for a solver.
+
+    Args:
+        name (str): Name of the model.
+        solver ("gurobi" | "highs", optional): "gurobi" gives a gp.Model, "highs"
+            a LinearProgram solved with HiGHS. Defaults to "gurobi".
+        env (gp.Env, optional): Gurobi environment. Default is None, which means
+            the shared environment of the process (see `utils.environment`).
+
+    Returns:
+        gp.Model | LinearProgram: The model.
+
+    """
+    if solver == "gurobi":
+        return gp.Model(name, env=env if env is not None else shared_env())
+    return LinearProgram(name, solver, env)
+
+
+def is_solver_model(obj: object) -> bool:
+    """Whether an object is a gp.Model or LinearProgram (and not e.g. cached).
+
+    Does not load gurobipy: if it is not loaded, there can be no Gurobi models.
+
+    Args:
+        obj (object): Object to check.
+
+    Returns:
+        bool: Whether the object is a model of one of the solvers.
+
+    """
+    return isinstance(obj, LinearProgram) or (
+        is_loaded("gurobipy") and isinstance(obj, gp.Model)
+    )
@@ -0,0 +1,332 @@
+"""Merit-order market clearing for copper-plate markets, without an LP solver.
+
+Each hour is cleared independently, so multi-period data without storage is
+cleared for all hours at once with vectorized sorts and cumulative sums.
+
+Conventions:
+    - Offers are sorted by increasing cost and bids by decreasing price. Units
+      with equal prices keep their order in the input data (stable sort), so
+      the first listed unit is dispatched first. The LP gives the same total
+      quantity at each price level, but may split it differently among units
+      with equal prices. The marginal unit follows the merit order, so it is
+      only the partially accepted unit of the LP dispatch if no other unit has
+      the same price (e.g. in step 1, G1 and G2 both offer at 13.32, and the
+      merit order loads G1 partially while the LP loads G2).
+    - A traded MW must have a bid price strictly above the offer cost. Trades
+      at equal bid and offer prices add no welfare, and are left out (the LP
+      may include them, with the same welfare and price).
+    - If the clearing quantity is inside a step of the supply curve (the
+      marginal offer is partially accepted), the price is the marginal offer
+      cost. If it is inside a step of the demand curve, the price is the
+      marginal bid price. In both cases the LP dual of the power balance is
+      unique and equal to this price.
+    - Otherwise the curves intersect at a corner, and every price in
+      `price_range` = [max(last accepted offer, first rejected bid),
+      min(last accepted bid, first rejected offer)] clears the market. The LP
+      dual is then not unique, and the solver returns one of the bounds
+      depending on its basis. The lower bound is reported as the price (or the
+      upper bound if there is no lower bound, and 0 if there are no units).
+"""
+
+import numpy as np
+
+from assignment_1.data.unit_arrays import UnitArrays, as_unit_arrays
+
+
+class MeritOrderResult:
+    """Result of a merit-order market clearing.
+
+    Attributes:
+        price (float): Market clearing price.
+        price_range (tuple[float, float]): Range of prices that clear the market.
+        quantity (float): Traded quantity.
+        generation (dict[str, float]): Accepted quantity of each offer.
+        demand (dict[str, float]): Accepted quantity of each bid.
+        social_welfare (float): Consumer utility minus generation cost.
+        total_generation_cost (float): Cost of the accepted offers.
+        total_utility (float): Utility of the accepted bids.
+        marginal_unit (str | None): The partially accepted offer or bid that sets
+            the price, in merit order (see the tie-breaking convention), or None
+            if the curves intersect at a corner.
+
+    """
+
+    def __init__(
+        self,
+        price: float,
+        price_range: tuple[float, float],
+        quantity: float,
+        generation: dict[str, float],
+        demand: dict[str, float],
+        total_generation_cost: float,
+        total_utility: float,
+        marginal_unit: str | None,
+    ) -> None:
+        """Initialize the result."""
+        self.price = price
+        self.price_range = price_range
+        self.quantity = quantity
+        self.generation = generation
+        self.demand = demand
+        self.total_generation_cost = total_generation_cost
+        self.total_utility = total_utility
+        self.social_welfare = total_utility - total_generation_cost
+        self.marginal_unit = marginal_unit
+
+
+class HourlyMeritOrderResult:
+    """Result of merit-order market clearings of several independent hours.
+
+    Attributes:
+        gen_ids (list[str]): Generator ids, in the order of the rows of `generation`.
+        demand_ids (list[str]): Demand ids, in the order of the rows of `demand`.
+        price (np.ndarray): Market clearing price of each hour, shape (T,).
+        price_range (np.ndarray): Range of prices that clear the market in each
+            hour, shape (T, 2).
+        quantity (np.ndarray): Traded quantity of each hour, shape (T,).
+        generation (np.ndarray): Accepted quantity of each offer, shape (n_gens, T).
+        demand (np.ndarray): Accepted quantity of each bid, shape (n_demands, T).
+        social_welfare (np.ndarray): Social welfare of each hour, shape (T,).
+        total_generation_cost (np.ndarray): Generation cost of each hour, shape (T,).
+        total_utility (np.ndarray): Consumer utility of each hour, shape (T,).
+        marginal_unit (list[str | None]): The unit that sets the price in each hour,
+            or None if the curves intersect at a corner.
+
+    """
+
+    def __init__(
+        self,
+        gen_ids: list[str],
+        demand_ids: list[str],
+        price: np.ndarray,
+        price_range: np.ndarray,
+        quantity: np.ndarray,
+        generation: np.ndarray,
+        demand: np.ndarray,
+        total_generation_cost: np.ndarray,
+        total_utility: np.ndarray,
+        marginal_unit: list[str | None],
+    ) -> None:
+        """Initialize the result."""
+        self.gen_ids = gen_ids
+        self.demand_ids = demand_ids
+        self.price = price
+        self.price_range = price_range
+        self.quantity = quantity
+        self.generation = generation
+        self.demand = demand
+        self.total_generation_cost = total_generation_cost
+        self.total_utility = total_utility
+        self.social_welfare = total_utility - total_generation_cost
+        self.marginal_unit = marginal_unit
+
+    @property
+    def n_periods(self) -> int:
+        """Number of hours."""
+        return len(self.price)
+
+    def hour(self, t: int) -> MeritOrderResult:
+        """Get the result of a single hour.
+
+        Args:
+            t (int): Hour.
+
+        Returns:
+            MeritOrderResult: The market clearing result of hour t.
+
+        """
+        return MeritOrderResult(
+            price=float(self.price[t]),
+            price_range=(float(self.price_range[t, 0]), float(self.price_range[t, 1])),
+            quantity=float(self.quantity[t]),
+            generation=dict(
+                zip(self.gen_ids, self.generation[:, t].tolist(), strict=True)
+            ),
+            demand=dict(zip(self.demand_ids, self.demand[:, t].tolist(), strict=True)),
+            total_generation_cost=float(self.total_generation_cost[t]),
+            total_utility=float(self.total_utility[t]),
+            marginal_unit=self.marginal_unit[t],
+        )
+
+
+def _count_per_row(sorted_keys: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """Count the keys strictly smaller than each query, row by row.
+
+    Args:
+        sorted_keys (np.ndarray): Integer keys, sorted within each row, shape (T, n).
+        queries (np.ndarray): Integer queries, shape (T, m).
+
+    Returns:
+        np.ndarray: Counts, shape (T, m).
+
+    """
+    # Shift each row above the previous one, so that one search covers all rows
+    n_periods, n_keys = sorted_keys.shape
+    low = min(sorted_keys.min(initial=0), queries.min(initial=0))
+    high = max(sorted_keys.max(initial=0), queries.max(initial=0))
+    offset = np.arange(n_periods)[:, None] * (high - low + 1) - low
+    index = np.searchsorted(
+        (sorted_keys + offset).ravel(), (queries + offset).ravel(), side="left"
+    )
+    return index.reshape(queries.shape) - np.arange(n_periods)[:, None] * n_keys
+
+
+def clear_hourly_markets(
+    gen_data: dict | UnitArrays,
+    demand_data: dict | UnitArrays,
+    tol: float = 1e-9,
+) -> HourlyMeritOrderResult:
+    """Clear independent copper-plate markets for every hour at once.
+
+    Without storage, the multi-period model of step 2 is T independent hourly
+    auctions. Here all of them are cleared together from the (units x T)
+    capacity and cost arrays, with the same conventions as `clear_merit_order`.
+    Offers and bids are sorted per hour, and each offer is accepted up to the
+    demand that bids strictly more than its cost (and vice versa for bids), so
+    there is no loop over hours or units.
+
+    Args:
+        gen_data (dict | UnitArrays): Generation data.
+        demand_data (dict | UnitArrays): Demand data, with the same number of hours.
+        tol (float, optional): Tolerance for a unit to count as (partially)
+            accepted. Defaults to 1e-9.
+
+    Returns:
+        HourlyMeritOrderResult: The market clearing results of all hours.
+
+    """
+    gens = as_unit_arrays(gen_data)
+    # Empty data has no time periods of its own, so it gets those of the other
+    demands = as_unit_arrays(demand_data, T=gens.n_periods)
+    if gens.n_units == 0:
+        gens = as_unit_arrays(gen_data, T=demands.n_periods)
+    if gens.n_periods != demands.n_periods:
+        raise ValueError("Generation and demand data have different time periods.")
+    n_periods = gens.n_periods
+    hours = np.arange(n_periods)
+
+    # Integer price levels, so that equal prices compare equal across units
+    _, levels = np.unique(
+        np.concatenate((gens.cost.ravel(), demands.cost.ravel())), return_inverse=True
+    )
+    gen_level = levels[: gens.cost.size].reshape(gens.cost.shape).T
+    demand_level = levels[gens.cost.size :].reshape(demands.cost.shape).T
+
+    # Merit orders of each hour, shape (T, n_units)
+    gen_order = np.argsort(gen_level, axis=1, kind="stable")
+    demand_order = np.argsort(-demand_level, axis=1, kind="stable")
+    offer_level = np.take_along_axis(gen_level, gen_order, axis=1)
+    bid_level = np.take_along_axis(demand_level, demand_order, axis=1)
+    offer_capacity = np.take_along_axis(gens.capacity.T, gen_order, axis=1)
+    bid_capacity = np.take_along_axis(demands.capacity.T, demand_order, axis=1)
+    supply = np.cumsum(offer_capacity, axis=1)
+    demand = np.cumsum(bid_capacity, axis=1)
+
+    # Demand bidding strictly more than each offer, and supply offering strictly
+    # less than each bid
+    zeros = np.zeros((n_periods, 1))
+    higher_demand = np.take_along_axis(
+        np.hstack((zeros, demand)), _count_per_row(-bid_level, -offer_level), axis=1
+    )
+    lower_supply = np.take_along_axis(
+        np.hstack((zeros, supply)), _count_per_row(offer_level, bid_level), axis=1
+    )
+    offer_accepted = np.clip(
+        higher_demand - (supply - offer_capacity), 0, offer_capacity
+    )
+    bid_accepted = np.clip(lower_supply - (demand - bid_capacity), 0, bid_capacity)
+
+    # Accepted quantities, back in the order of the units
+    generation = np.empty((n_periods, gens.n_units))
+    np.put_along_axis(generation, gen_order, offer_accepted, axis=1)
+    demand_accepted = np.empty((n_periods, demands.n_units))
+    np.put_along_axis(demand_accepted, demand_order, bid_accepted, axis=1)
+    generation = generation.T
+    demand_accepted = demand_accepted.T
+
+    # Price range at a corner, from the last accepted and first rejected units
+    gen_in = generation > tol
+    gen_out = ~gen_in & (gens.capacity > tol)
+    demand_in = demand_accepted > tol
+    demand_out = ~demand_in & (demands.capacity > tol)
+    price_range = np.column_stack(
+        (
+            np.maximum(
+                np.max(gens.cost, axis=0, where=gen_in, initial=-np.inf),
+                np.max(demands.cost, axis=0, where=demand_out, initial=-np.inf),
+            ),
+            np.minimum(
+                np.min(demands.cost, axis=0, where=demand_in, initial=np.inf),
+                np.min(gens.cost, axis=0, where=gen_out, initial=np.inf),
+            ),
+        )
+    )
+
+    # Price set by the first partially accepted offer or bid in merit order
+    gen_partial = (offer_accepted > tol) & (offer_accepted < offer_capacity - tol)
+    demand_partial = (bid_accepted > tol) & (bid_accepted < bid_capacity - tol)
+    has_gen_partial = gen_partial.any(axis=1)
+    has_demand_partial = demand_partial.any(axis=1) & ~has_gen_partial
+    marginal_gen = np.zeros(n_periods, dtype=np.intp)
+    marginal_demand = np.zeros(n_periods, dtype=np.intp)
+    if gens.n_units > 0:
+        marginal_gen = gen_order[hours, gen_partial.argmax(axis=1)]
+        price_range[has_gen_partial] = gens.cost[marginal_gen, hours][
+            has_gen_partial, None
+        ]
+    if demands.n_units > 0:
+        marginal_demand = demand_order[hours, demand_partial.argmax(axis=1)]
+        price_range[has_demand_partial] = demands.cost[marginal_demand, hours][
+            has_demand_partial, None
+        ]
+    price = np.where(
+        np.isfinite(price_range[:, 0]),
+        price_range[:, 0],
+        np.where(np.isfinite(price_range[:, 1]), price_range[:, 1], 0.0),
+    )
+
+    marginal_unit = [
+        gens.ids[marginal_gen[t]]
+        if has_gen_partial[t]
+        else demands.ids[marginal_demand[t]]
+        if has_demand_partial[t]
+        else None
+        for t in range(n_periods)
+    ]
+
+    return HourlyMeritOrderResult(
+        gen_ids=gens.ids,
+        demand_ids=demands.ids,
+        price=price,
+        price_range=price_range,
+        quantity=offer_accepted.sum(axis=1),
+        generation=generation,
+        demand=demand_accepted,
+        total_generation_cost=(gens.cost * generation).sum(axis=0),
+        total_utility=(demands.cost * demand_accepted).sum(axis=0),
+        marginal_unit=marginal_unit,
+    )
+
+
+def clear_merit_order(
+    gen_data: dict | UnitArrays,
+    demand_data: dict | UnitArrays,
+    tol: float = 1e-9,
+) -> MeritOrderResult:
+    """Clear a single-period copper-plate market by intersecting the merit orders.
+
+    Gives the same dispatch, price and welfare as the day-ahead model of
+    `SinglePeriodNoNetwork`, in O(n log n) time. See the module docstring for
+    the tie-breaking and price conventions.
+
+    Args:
+        gen_data (dict | UnitArrays): Single period generation data.
+        demand_data (dict | UnitArrays): Single period demand data.
+        tol (float, optional): Tolerance for a unit to count as partially accepted.
+            Defaults to 1e-9.
+
+    Returns:
+        MeritOrderResult: The market clearing result.
+
+    """
+    return clear_hourly_markets(gen_data, demand_data, tol).hour(0)
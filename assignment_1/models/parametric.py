@@ -0,0 +1,175 @@
+"""Parametric analysis of prices with respect to one right-hand side parameter.
+
+The parameter is a variable fixed by an equality constraint (`add_parameter`),
+and the constraints that depend on it get it as a term instead of a constant
+RHS, e.g. a line limit `flow <= capacity * factor` becomes
+`flow - capacity * factor <= 0`. Changing the parameter is then a change of one
+RHS, and the sensitivity ranges `SARHSLow`/`SARHSUp` of the fixing constraint
+give the interval in which the optimal basis, and with it every dual, stays the
+same.
+
+In the interval of a basis, the prices are constant, so the price curve is a
+step function. `price_curve` solves at the start of the interval, reads the
+prices and the end of their interval, and restarts just past the end with dual
+simplex from the previous basis, until the whole range is covered. This takes
+one solve per critical region (merging regions with equal prices), and the
+breakpoints are exact up to the tolerance of the step past each region.
+
+Sensitivity ranges need a basic solution from Gurobi, so the analysis is only
+available for Gurobi models.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from assignment_1.models.linear_program import GRB
+from assignment_1.utils.lazy import lazy_import
+from assignment_1.utils.telemetry import track
+
+gp = lazy_import("gurobipy")
+
+
+class PriceCurve:
+    """Piecewise-constant prices as a function of a parameter.
+
+    Region i covers the parameter values from `breakpoints[i]` to
+    `breakpoints[i + 1]`, with prices `prices[i]`. At a breakpoint itself, the
+    prices are not unique (any value between the two regions is a valid dual).
+
+    Attributes:
+        names (list[str]): Names of the prices, e.g. nodes or bidding zones.
+        breakpoints (np.ndarray): Region boundaries, shape (n_regions + 1,),
+            from the start to the end of the analyzed range.
+        prices (np.ndarray): Prices of each region, shape (n_regions, n_names).
+        solves (int): Number of LP solves used to find the curve.
+
+    """
+
+    def __init__(
+        self,
+        names: list[str],
+        breakpoints: np.ndarray,
+        prices: np.ndarray,
+        solves: int,
+    ) -> None:
+        """Initialize the curve."""
+        self.names = names
+        self.breakpoints = breakpoints
+        self.prices = prices
+        self.solves = solves
+
+    def __call__(self, values: float | np.ndarray) -> np.ndarray:
+        """Prices at parameter values, shape (n_names,) or (len(values), n_names)."""
+        index = np.searchsorted(self.breakpoints, values, side="right") - 1
+        return self.prices[np.clip(index, 0, len(self.prices) - 1)]
+
+    def to_dict(self) -> dict[str, np.ndarray]:
+        """Prices of each region by name, e.g. for `plt.stairs(prices, breakpoints)`."""
+        return {name: self.prices[:, i] for i, name in enumerate(self.names)}
+
+
+def add_parameter(model: gp.Model, value: float) -> tuple[gp.Var, gp.Constr]:
+    """Add a parameter to a model, as a free variable fixed by a constraint.
+
+    The model is updated, so that `model.chgCoeff(constr, parameter,
+    -coefficient)` can be used right away to make the RHS of a constraint depend
+    on the parameter (with its constant RHS set to 0).
+
+    Args:
+        model (gp.Model): Model.
+        value (float): Initial value of the parameter.
+
+    Returns:
+        parameter (gp.Var): The parameter variable.
+        fixing (gp.Constr): The constraint `parameter == value`, whose RHS sets
+            the value.
+
+    """
+    parameter = model.addVar(lb=-GRB.INFINITY, ub=GRB.INFINITY)
+    fixing = model.addLConstr(parameter == value)
+    model.update()
+    return parameter, fixing
+
+
+def price_curve(
+    model: gp.Model,
+    fixing: gp.Constr,
+    price_constrs: dict[str, gp.Constr],
+    start: float,
+    stop: float,
+    tol: float = 1e-6,
+    max_solves: int = 1000,
+) -> PriceCurve:
+    """Exact prices as a step function of a parameter, from sensitivity ranges.
+
+    Args:
+        model (gp.Model): Gurobi model with a parameter (see `add_parameter`).
+        fixing (gp.Constr): Constraint that fixes the parameter.
+        price_constrs (dict[str, gp.Constr]): Constraints whose duals are the
+            prices, by name.
+        start (float): Start of the parameter range.
+        stop (float): End of the parameter range.
+        tol (float, optional): Step past the end of a region to get into the
+            next one, relative to the length of the range. Regions shorter than
+            this are merged into the next one. Defaults to 1e-6.
+        max_solves (int, optional): Maximum number of solves. Defaults to 1000.
+
+    Returns:
+        PriceCurve: Prices of each region between start and stop.
+
+    Raises:
+        ValueError: If the model is not a Gurobi model, the range is empty, the
+            model has no optimal solution for a parameter value, or the curve
+            needs more than `max_solves` solves.
+
+    """
+    if not isinstance(model, gp.Model):
+        raise ValueError("Parametric analysis needs a Gurobi model.")
+    if stop <= start:
+        raise ValueError(f"Empty parameter range [{start}, {stop}].")
+
+    tracker = track("parametric", n_prices=len(price_constrs))
+    constrs = list(price_constrs.values())
+    step = tol * (stop - start)
+    # Dual simplex re-optimizes from the previous basis after an RHS change
+    model.Params.Method = 1
+
+    breakpoints = [start]
+    prices: list[list[float]] = []
+    value = region_start = start
+    solves = 0
+    while True:
+        if solves == max_solves:
+            raise ValueError(
+                f"Price curve not finished after {max_solves} solves, at {value}."
+            )
+        fixing.RHS = value
+        model.optimize()
+        solves += 1
+        if model.status != GRB.OPTIMAL:
+            raise ValueError(
+                f"No optimal solution found for parameter value {value}"
+                f" (status {model.status})."
+            )
+
+        region_prices = model.getAttr("Pi", constrs)
+        if not prices or not np.allclose(region_prices, prices[-1]):
+            if prices:
+                breakpoints.append(region_start)
+            prices.append(region_prices)
+
+        region_end = fixing.SARHSUp
+        if region_end >= stop:
+            break
+        region_start = region_end
+        value = region_end + step
+
+    breakpoints.append(stop)
+    tracker.lap("optimize", model, solves=solves, regions=len(prices))
+    return PriceCurve(
+        list(price_constrs),
+        np.array(breakpoints, dtype=float),
+        np.array(prices, dtype=float),
+        solves,
+    )
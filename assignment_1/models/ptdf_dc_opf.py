@@ -0,0 +1,166 @@
+"""Nodal market clearing with a PTDF-based DC power flow and lazy line limits."""
+
+from __future__ import annotations
+
+from typing import Literal
+
+import numpy as np
+
+from assignment_1.data.network import Topology
+from assignment_1.data.unit_arrays import UnitArrays, as_unit_arrays
+from assignment_1.models.linear_program import GRB, LinExpr, create_model, quicksum
+from assignment_1.utils.lazy import lazy_import
+from assignment_1.utils.telemetry import track
+
+gp = lazy_import("gurobipy")
+
+
+def ptdf_optimization_model(
+    gen_data: dict | UnitArrays,
+    demand_data: dict | UnitArrays,
+    network_data: dict,
+    topology: Topology | None = None,
+    tol: float = 1e-6,
+    ptdf_tol: float = 1e-10,
+    max_iterations: int = 100,
+    env: gp.Env | None = None,
+    solver: str | Literal["gurobi", "highs"] = "gurobi",
+) -> tuple[gp.Model, dict, dict]:
+    """Nodal market clearing model using power transfer distribution factors.
+
+    Instead of voltage angles, each node gets a net injection variable, and line
+    flows are given by the PTDF matrix times the injections. The model starts
+    with only the nodal and system power balances, and line limits are added
+    for the lines that are overloaded in the current solution, re-optimizing
+    from the previous basis, until no line is overloaded. On meshed networks
+    with sparse congestion, only a few of the line limits are ever added.
+
+    Nodal prices are the duals of the nodal power balances, and equal those of
+    the voltage angle formulation.
+
+    Args:
+        gen_data (dict | UnitArrays): Generation data (single period).
+        demand_data (dict | UnitArrays): Demand data (single period).
+        network_data (dict): Network data.
+        topology (Topology, optional): Topology index of the network data.
+            Default is None, which means it is built from the network data.
+        tol (float, optional): Tolerance on line overloads. Defaults to 1e-6.
+        ptdf_tol (float, optional): PTDF entries smaller than this in absolute value
+            are left out of the line flow constraints. Defaults to 1e-10.
+        max_iterations (int, optional): Maximum number of times to add line
+            limits and re-optimize. Defaults to 100.
+        env (gp.Env, optional): Gurobi environment to create the model in.
+            Default is None, which means the shared environment.
+        solver ("gurobi" | "highs", optional): Solver of the model. With "highs",
+            every iteration is solved from scratch. Defaults to "gurobi".
+
+    Returns:
+        model (gp.Model): Gurobi optimization model (a LinearProgram for HiGHS).
+            The number of iterations and line limits added are stored in
+            `model._iterations` and `model._line_limits_added`.
+        var (dict): Dictionary of variables.
+        constr (dict): Dictionary of constraints.
+
+    Raises:
+        ValueError: If line limits are still violated after `max_iterations`
+            iterations.
+
+    """
+    tracker = track("ptdf", solver=solver)
+    gens = as_unit_arrays(gen_data)
+    demands = as_unit_arrays(demand_data)
+    if topology is None:
+        topology = Topology(network_data)
+    ptdf = topology.ptdf()
+    capacity = np.array(
+        [network_data["lines"][line]["capacity"] for line in topology.line_ids],
+        dtype=float,
+    )
+
+    # Create a new model
+    model = create_model("step_3_ptdf", solver, env)
+    var = {}
+    constr = {}
+
+    # Add demand and generation variables
+    for units in (demands, gens):
+        for unit, unit_capacity in zip(
+            units.ids, units.capacity[:, 0].tolist(), strict=True
+        ):
+            var[unit] = model.addVar(lb=0, ub=unit_capacity)
+
+    # Add net injection variables
+    injection = [
+        model.addVar(lb=-GRB.INFINITY, ub=GRB.INFINITY) for _ in topology.node_ids
+    ]
+    for node, injection_var in zip(topology.node_ids, injection, strict=True):
+        var[f"injection_{node}"] = injection_var
+
+    model.update()
+
+    # Set objective to maximize social welfare (consumer utility - generation cost)
+    expr_type = gp.LinExpr if solver == "gurobi" else LinExpr
+    model.setObjective(
+        expr_type(
+            np.concatenate((demands.cost[:, 0], -gens.cost[:, 0])).tolist(),
+            [var[unit] for unit in (*demands.ids, *gens.ids)],
+        ),
+        GRB.MAXIMIZE,
+    )
+
+    # Add nodal power balance constraints (net injection = generation - demand)
+    demands_at_node = topology.units_by_node(demands)
+    gens_at_node = topology.units_by_node(gens)
+    for i, node in enumerate(topology.node_ids):
+        constr[f"power_balance_{node}"] = model.addLConstr(
+            quicksum(var[demand] for demand in demands_at_node[i])
+            + injection[i]
+            - quicksum(var[gen] for gen in gens_at_node[i])
+            == 0,
+        )
+
+    # Add system power balance constraint (injections sum to zero)
+    constr["system_balance"] = model.addLConstr(quicksum(injection) == 0)
+
+    # Re-optimize with dual simplex from the previous basis after adding limits
+    model.Params.Method = 1
+    tracker.lap("build")
+
+    def line_flow(line: int) -> gp.LinExpr | LinExpr:
+        nodes = np.flatnonzero(np.abs(ptdf[line]) > ptdf_tol)
+        return expr_type(ptdf[line, nodes].tolist(), [injection[i] for i in nodes])
+
+    model._iterations = 0
+    model._line_limits_added = 0
+    while True:
+        model.optimize()
+        model._iterations += 1
+        tracker.lap("optimize", model, iteration=model._iterations)
+        if model.status != GRB.OPTIMAL:
+            break
+
+        flows = ptdf @ np.array(model.getAttr("X", injection))
+        added = 0
+        for line in np.flatnonzero(flows > capacity + tol):
+            name = f"line_flow_{topology.line_ids[line]}_pos"
+            if name not in constr:
+                constr[name] = model.addLConstr(line_flow(line) <= capacity[line])
+                added += 1
+        for line in np.flatnonzero(flows < -capacity - tol):
+            name = f"line_flow_{topology.line_ids[line]}_neg"
+            if name not in constr:
+                constr[name] = model.addLConstr(line_flow(line) >= -capacity[line])
+                added += 1
+        model._line_limits_added += added
+        tracker.lap("add_line_limits", added=added)
+
+        if added == 0:
+            break
+        if model._iterations >= max_iterations:
+            # The added limits are not in the solution, which is still OPTIMAL
+            raise ValueError(
+                f"Line limits still violated after {max_iterations} iterations "
+                "of the PTDF model."
+            )
+
+    return model, var, constr
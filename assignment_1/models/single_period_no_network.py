@@ -1,7 +1,25 @@
 """Single market clearing model, without network constraints."""
 
-import gurobipy as gp
-from gurobipy import GRB
+from __future__ import annotations
+
+from typing import Literal
+
+import numpy as np
+
+from assignment_1.data.unit_arrays import UnitArrays, as_unit_arrays, as_unit_dict
+from assignment_1.models.linear_program import (
+    GRB,
+    create_model,
+    is_solver_model,
+    quicksum,
+)
+from assignment_1.utils.cache import SolutionCache
+from assignment_1.utils.environment import ModelPool
+from assignment_1.utils.lazy import lazy_import
+from assignment_1.utils.results import get_attr
+from assignment_1.utils.telemetry import track, tracked
+
+gp = lazy_import("gurobipy")
 
 
 class SinglePeriodNoNetwork:
@@ -9,12 +27,61 @@ class SinglePeriodNoNetwork:
 
     def __init__(
         self,
-        gen_data: dict[str, dict[str, float]],
-        demand_data: dict[str, dict[str, float]],
+        gen_data: dict[str, dict[str, float]] | UnitArrays,
+        demand_data: dict[str, dict[str, float]] | UnitArrays,
+        matrix_api: bool = False,
+        env: gp.Env | None = None,
+        cache: SolutionCache | None = None,
+        solver: str | Literal["gurobi", "highs"] = "gurobi",
+        pool: ModelPool | None = None,
     ) -> None:
-        """Initialize the model."""
-        self.gen_data = gen_data
-        self.demand_data = demand_data
+        """Initialize the model.
+
+        Args:
+            gen_data (dict | UnitArrays): Generation data.
+            demand_data (dict | UnitArrays): Demand data.
+            matrix_api (bool, optional): Whether to build the models with the
+                Gurobi matrix API (addMVar/matrix expressions) instead of one
+                addVar per unit. Results are identical, but model construction
+                scales much better for large numbers of bids.
+                Defaults to False.
+            env (gp.Env, optional): Gurobi environment to create the models in.
+                Default is None, which means the shared environment.
+            cache (SolutionCache, optional): Cache of solutions. Models whose
+                inputs are cached are not built or solved, and their results are
+                read from the cache. Default is None, which means no caching.
+            solver ("gurobi" | "highs", optional): Solver of the models. "highs"
+                builds LinearPrograms solved with HiGHS, and cannot be combined
+                with the matrix API. Defaults to "gurobi".
+            pool (ModelPool, optional): Pool of models to reuse. Models with the
+                same units as a pooled model are updated in place instead of
+                built again. Cannot be combined with the matrix API. Default is
+                None, which means a new model is built every time.
+
+        """
+        if matrix_api and solver != "gurobi":
+            raise ValueError("The matrix API is only available with Gurobi.")
+        if matrix_api and pool is not None:
+            raise ValueError("Models built with the matrix API cannot be pooled.")
+        self.solver = solver
+        self.env = env
+        self.cache = cache
+        self._cache_keys: dict[str, str] = {}
+        self.pool = pool
+        self._pool_keys: dict[str, tuple] = {}
+        self.matrix_api = matrix_api
+        if self.matrix_api:
+            # Convert the unit data to arrays once, shared by all the models
+            gen_arrays = as_unit_arrays(gen_data)
+            demand_arrays = as_unit_arrays(demand_data)
+            self.gen_names = gen_arrays.ids
+            self.demand_names = demand_arrays.ids
+            self.gen_capacity = gen_arrays.capacity[:, 0]
+            self.gen_cost = gen_arrays.cost[:, 0]
+            self.demand_capacity = demand_arrays.capacity[:, 0]
+            self.demand_cost = demand_arrays.cost[:, 0]
+        self.gen_data = as_unit_dict(gen_data)
+        self.demand_data = as_unit_dict(demand_data)
         self.dayahead_model_created = False
         self.dayahead_model_optimized = False
         self.imbalance_model_created = False
@@ -23,6 +90,61 @@ class SinglePeriodNoNetwork:
         self.reserve_data_defined = False
         self.reserve_model_optimized = False
 
+    def _load_cached(self, name: str, *inputs: object) -> tuple | None:
+        """Look up the solution of a model in the cache, and keep its key."""
+        if self.cache is None:
+            return None
+        self._cache_keys[name] = self.cache.key(
+            name,
+            self.gen_data,
+            self.demand_data,
+            *inputs,
+            matrix_api=self.matrix_api,
+            solver=self.solver,
+        )
+        return self.cache.load(self._cache_keys[name])
+
+    def _store_cached(
+        self, name: str, model: gp.Model, var: dict, constr: dict
+    ) -> None:
+        """Store the solution of a solved (not cached) model in the cache."""
+        if (
+            self.cache is not None
+            and is_solver_model(model)
+            and model.status == GRB.OPTIMAL
+        ):
+            self.cache.store(self._cache_keys[name], model, var, constr)
+
+    def _load_pooled(self, name: str, *structure: object) -> tuple | None:
+        """Look up a model with the same structure in the pool, and keep its key."""
+        if self.pool is None:
+            return None
+        self._pool_keys[name] = (name, self.solver, *structure)
+        return self.pool.get(self._pool_keys[name])
+
+    def _store_pooled(
+        self, name: str, model: gp.Model, var: dict, constr: dict
+    ) -> None:
+        """Add a newly built model to the pool."""
+        if self.pool is not None:
+            self.pool.put(self._pool_keys[name], model, var, constr)
+
+    def _dayahead_gen_bounds(
+        self, use_restricitons_from_reserve_model: bool
+    ) -> dict[str, tuple[float, float]]:
+        """Lower and upper bounds of the generation in the day-ahead model."""
+        bounds = {}
+        for gen, data in self.gen_data.items():
+            if use_restricitons_from_reserve_model and gen in self.reserve_gens:
+                bounds[gen] = (
+                    self.gen_down_reserve[gen],
+                    data["capacity"] - self.gen_up_reserve[gen],
+                )
+            else:
+                bounds[gen] = (0, data["capacity"])
+        return bounds
+
+    @tracked("dayahead", "build", model_attr="model")
     def create_dayahead_model(
         self,
         use_restricitons_from_reserve_model: bool = False,
@@ -45,8 +167,52 @@ class SinglePeriodNoNetwork:
                 " with reserve constraints."
             )
 
+        cached = self._load_cached(
+            "dayahead",
+            (self.reserve_gens, self.gen_up_reserve, self.gen_down_reserve)
+            if use_restricitons_from_reserve_model
+            else None,
+        )
+        if cached is not None:
+            self.model, var, self.constr = cached
+            if self.matrix_api:
+                self.mvar = var
+            else:
+                self.var = var
+            self.dayahead_model_created = True
+            return
+
+        if self.matrix_api:
+            self._create_dayahead_model_matrix(use_restricitons_from_reserve_model)
+            self.dayahead_model_created = True
+            return
+
+        gen_bounds = self._dayahead_gen_bounds(use_restricitons_from_reserve_model)
+
+        pooled = self._load_pooled(
+            "dayahead", tuple(self.demand_data), tuple(self.gen_data)
+        )
+        if pooled is not None:
+            # Same units: only update the bounds and costs of the pooled model
+            self.model, self.var, self.constr = pooled
+            demand_vars = [self.var[demand] for demand in self.demand_data]
+            gen_vars = [self.var[gen] for gen in self.gen_data]
+            demand_values = list(self.demand_data.values())
+            gen_values = list(self.gen_data.values())
+            self.model.setAttr(
+                "UB", demand_vars, [data["capacity"] for data in demand_values]
+            )
+            self.model.setAttr(
+                "Obj", demand_vars, [data["cost"] for data in demand_values]
+            )
+            self.model.setAttr("LB", gen_vars, [lb for lb, _ in gen_bounds.values()])
+            self.model.setAttr("UB", gen_vars, [ub for _, ub in gen_bounds.values()])
+            self.model.setAttr("Obj", gen_vars, [-data["cost"] for data in gen_values])
+            self.dayahead_model_created = True
+            return
+
         # Create a new model
-        self.model = gp.Model("single_period_no_network")
+        self.model = create_model("single_period_no_network", self.solver, self.env)
         self.var: dict[str, gp.Var] = {}
         self.constr: dict[str, gp.Constr] = {}
 
@@ -58,14 +224,7 @@ class SinglePeriodNoNetwork:
             )
 
         # Add generation variables
-        for gen, data in self.gen_data.items():
-            if use_restricitons_from_reserve_model and gen in self.reserve_gens:
-                lower_bound = self.gen_down_reserve[gen]
-                upper_bound = self.gen_data[gen]["capacity"] - self.gen_up_reserve[gen]
-            else:
-                lower_bound = 0
-                upper_bound = data["capacity"]
-
+        for gen, (lower_bound, upper_bound) in gen_bounds.items():
             self.var[gen] = self.model.addVar(
                 lb=lower_bound,
                 ub=upper_bound,
@@ -75,11 +234,11 @@ class SinglePeriodNoNetwork:
 
         # Set objective to maximize social welfare (consumer utility - generation cost)
         self.model.setObjective(
-            gp.quicksum(
+            quicksum(
                 data["cost"] * self.var[demand]
                 for demand, data in self.demand_data.items()
             )  # Consumer utility
-            - gp.quicksum(
+            - quicksum(
                 data["cost"] * self.var[gen] for gen, data in self.gen_data.items()
             ),  # Generation cost
             GRB.MAXIMIZE,
@@ -87,12 +246,48 @@ class SinglePeriodNoNetwork:
 
         # Add power balance constraint (supply = demand)
         self.constr["power_balance"] = self.model.addLConstr(
-            gp.quicksum(self.var[demand] for demand in self.demand_data)
-            == gp.quicksum(self.var[gen] for gen in self.gen_data)
+            quicksum(self.var[demand] for demand in self.demand_data)
+            == quicksum(self.var[gen] for gen in self.gen_data)
         )
 
+        self._store_pooled("dayahead", self.model, self.var, self.constr)
         self.dayahead_model_created = True
 
+    def _create_dayahead_model_matrix(
+        self, use_restricitons_from_reserve_model: bool
+    ) -> None:
+        """Create the day-ahead model with the Gurobi matrix API."""
+        self.model = create_model("single_period_no_network", "gurobi", self.env)
+        self.mvar: dict[str, gp.MVar] = {}
+        self.constr = {}
+
+        lower_bound = np.zeros(len(self.gen_names))
+        upper_bound = self.gen_capacity.copy()
+        if use_restricitons_from_reserve_model:
+            for i, gen in enumerate(self.gen_names):
+                if gen in self.reserve_gens:
+                    lower_bound[i] = self.gen_down_reserve[gen]
+                    upper_bound[i] -= self.gen_up_reserve[gen]
+
+        # Add demand and generation variables
+        self.mvar["demand"] = self.model.addMVar(
+            len(self.demand_names), lb=0, ub=self.demand_capacity
+        )
+        self.mvar["gen"] = self.model.addMVar(
+            len(self.gen_names), lb=lower_bound, ub=upper_bound
+        )
+
+        # Set objective to maximize social welfare (consumer utility - generation cost)
+        self.model.setObjective(
+            self.demand_cost @ self.mvar["demand"] - self.gen_cost @ self.mvar["gen"],
+            GRB.MAXIMIZE,
+        )
+
+        # Add power balance constraint (supply = demand)
+        self.constr["power_balance"] = self.model.addConstr(
+            self.mvar["demand"].sum() == self.mvar["gen"].sum()
+        )
+
     def optimize_dayahead_model(self) -> None:
         """Optimize the model, and store the results in the instance."""
         if not self.dayahead_model_created:
@@ -100,28 +295,56 @@ class SinglePeriodNoNetwork:
                 "Model has not been created yet. Call create_dayahead_model() first."
             )
 
+        tracker = track("dayahead")
         try:
             self.model.optimize()
         except Exception as e:
             print(f"Error occurred while optimizing the model: {e}")
+        tracker.lap("optimize", self.model)
+        self._store_cached(
+            "dayahead",
+            self.model,
+            self.mvar if self.matrix_api else self.var,
+            self.constr,
+        )
 
-        if self.model.status == GRB.OPTIMAL:
+        if self.model.status == GRB.OPTIMAL and self.matrix_api:
+            gen_x = self.mvar["gen"].X
+            demand_x = self.mvar["demand"].X
+            self.social_welfare = self.model.ObjVal
+            self.day_ahead_price = float(self.constr["power_balance"].Pi)
+            self.total_generation_cost = float(self.gen_cost @ gen_x)
+            self.total_utility = float(self.demand_cost @ demand_x)
+            self.generation = dict(zip(self.gen_names, gen_x.tolist(), strict=True))
+            self.demand = dict(zip(self.demand_names, demand_x.tolist(), strict=True))
+
+            self.dayahead_model_optimized = True
+
+        elif self.model.status == GRB.OPTIMAL:
+            gen_x = get_attr(self.model, "X", [self.var[gen] for gen in self.gen_data])
+            demand_x = get_attr(
+                self.model, "X", [self.var[demand] for demand in self.demand_data]
+            )
             self.social_welfare = self.model.ObjVal
             self.day_ahead_price = self.constr["power_balance"].Pi
             self.total_generation_cost = sum(
-                data["cost"] * self.var[gen].X for gen, data in self.gen_data.items()
+                data["cost"] * x
+                for data, x in zip(self.gen_data.values(), gen_x.tolist(), strict=True)
             )
             self.total_utility = sum(
-                data["cost"] * self.var[demand].X
-                for demand, data in self.demand_data.items()
+                data["cost"] * x
+                for data, x in zip(
+                    self.demand_data.values(), demand_x.tolist(), strict=True
+                )
             )
-            self.generation = {gen: self.var[gen].X for gen in self.gen_data}
-            self.demand = {demand: self.var[demand].X for demand in self.demand_data}
+            self.generation = dict(zip(self.gen_data, gen_x.tolist(), strict=True))
+            self.demand = dict(zip(self.demand_data, demand_x.tolist(), strict=True))
 
             self.dayahead_model_optimized = True
 
         else:
             print(f"Optimization ended with status {self.model.status}")
+        tracker.lap("extract")
 
     def define_imbalance(
         self,
@@ -208,6 +431,7 @@ class SinglePeriodNoNetwork:
 
         self.imbalance_data_defined = True
 
+    @tracked("imbalance", "build", model_attr="imbalance_model")
     def create_imbalance_model(self) -> None:
         """Create a model to clear the imbalance market."""
         if not self.imbalance_data_defined:
@@ -215,7 +439,62 @@ class SinglePeriodNoNetwork:
                 "Imbalance data has not been defined yet. Call define_imbalance() before creating the imbalance model."
             )
 
-        self.imbalance_model = gp.Model("imbalance_clearing_model")
+        cached = self._load_cached(
+            "imbalance", self.gen_imbalance, self.demand_imbalance
+        )
+        if cached is not None:
+            self.imbalance_model, var, self.imbalance_constr = cached
+            if self.matrix_api:
+                self.imbalance_mvar = var
+            else:
+                self.imbalance_var = var
+            self.imbalance_model_created = True
+            return
+
+        if self.matrix_api:
+            self._create_imbalance_model_matrix()
+            self.imbalance_model_created = True
+            return
+
+        # Imbalance to be covered by regulation
+        imbalance = sum(
+            data["down_reg"] - data["up_reg"] for data in self.gen_imbalance.values()
+        ) + sum(
+            data["down_reg"] - data["up_reg"] for data in self.demand_imbalance.values()
+        )
+
+        pooled = self._load_pooled(
+            "imbalance", tuple(self.gen_imbalance), tuple(self.demand_imbalance)
+        )
+        if pooled is not None:
+            # Same units: only update the regulation limits, costs and imbalance
+            self.imbalance_model, self.imbalance_var, self.imbalance_constr = pooled
+            for kind, units in (
+                ("gen", self.gen_imbalance),
+                ("demand", self.demand_imbalance),
+            ):
+                up_vars = [self.imbalance_var[f"{kind}_up_reg_{u}"] for u in units]
+                down_vars = [self.imbalance_var[f"{kind}_down_reg_{u}"] for u in units]
+                values = list(units.values())
+                self.imbalance_model.setAttr(
+                    "UB", up_vars, [data["max_up_reg"] for data in values]
+                )
+                self.imbalance_model.setAttr(
+                    "UB", down_vars, [data["max_down_reg"] for data in values]
+                )
+                self.imbalance_model.setAttr(
+                    "Obj", up_vars, [data["cost_up_reg"] for data in values]
+                )
+                self.imbalance_model.setAttr(
+                    "Obj", down_vars, [-data["cost_down_reg"] for data in values]
+                )
+            self.imbalance_constr["imbalance_balance"].RHS = imbalance
+            self.imbalance_model_created = True
+            return
+
+        self.imbalance_model = create_model(
+            "imbalance_clearing_model", self.solver, self.env
+        )
         self.imbalance_var: dict[str, gp.Var] = {}
         self.imbalance_constr: dict[str, gp.Constr] = {}
 
@@ -245,12 +524,12 @@ class SinglePeriodNoNetwork:
 
         # Set objective to minimize imbalance cost
         self.imbalance_model.setObjective(
-            gp.quicksum(
+            quicksum(
                 data["cost_up_reg"] * self.imbalance_var[f"gen_up_reg_{gen}"]
                 - data["cost_down_reg"] * self.imbalance_var[f"gen_down_reg_{gen}"]
                 for gen, data in self.gen_imbalance.items()
             )
-            + gp.quicksum(
+            + quicksum(
                 data["cost_up_reg"] * self.imbalance_var[f"demand_up_reg_{demand}"]
                 - data["cost_down_reg"]
                 * self.imbalance_var[f"demand_down_reg_{demand}"]
@@ -261,27 +540,78 @@ class SinglePeriodNoNetwork:
 
         # Add imbalance balance constraint (up_reg - down_reg = imbalance)
         self.imbalance_constr["imbalance_balance"] = self.imbalance_model.addLConstr(
-            gp.quicksum(
+            quicksum(
                 self.imbalance_var[f"gen_up_reg_{gen}"]
                 - self.imbalance_var[f"gen_down_reg_{gen}"]
                 for gen in self.gen_imbalance
             )
-            + gp.quicksum(
+            + quicksum(
                 self.imbalance_var[f"demand_up_reg_{demand}"]
                 - self.imbalance_var[f"demand_down_reg_{demand}"]
                 for demand in self.demand_imbalance
             )
-            == gp.quicksum(
-                data["down_reg"] - data["up_reg"]
-                for gen, data in self.gen_imbalance.items()
+            == imbalance
+        )
+
+        self._store_pooled(
+            "imbalance",
+            self.imbalance_model,
+            self.imbalance_var,
+            self.imbalance_constr,
+        )
+        self.imbalance_model_created = True
+
+    def _create_imbalance_model_matrix(self) -> None:
+        """Create the imbalance model with the Gurobi matrix API."""
+
+        def to_array(imbalance: dict[str, dict[str, float]], key: str) -> np.ndarray:
+            return np.array([data[key] for data in imbalance.values()], dtype=float)
+
+        self.imbalance_model = create_model(
+            "imbalance_clearing_model", "gurobi", self.env
+        )
+        self.imbalance_mvar: dict[str, gp.MVar] = {}
+        self.imbalance_constr = {}
+
+        # Add imbalance variables for generators and demands
+        for unit, imbalance in (
+            ("gen", self.gen_imbalance),
+            ("demand", self.demand_imbalance),
+        ):
+            self.imbalance_mvar[f"{unit}_up_reg"] = self.imbalance_model.addMVar(
+                len(imbalance), lb=0, ub=to_array(imbalance, "max_up_reg")
             )
-            + gp.quicksum(
-                data["down_reg"] - data["up_reg"]
-                for demand, data in self.demand_imbalance.items()
+            self.imbalance_mvar[f"{unit}_down_reg"] = self.imbalance_model.addMVar(
+                len(imbalance), lb=0, ub=to_array(imbalance, "max_down_reg")
             )
+
+        # Set objective to minimize imbalance cost
+        self.imbalance_model.setObjective(
+            to_array(self.gen_imbalance, "cost_up_reg")
+            @ self.imbalance_mvar["gen_up_reg"]
+            - to_array(self.gen_imbalance, "cost_down_reg")
+            @ self.imbalance_mvar["gen_down_reg"]
+            + to_array(self.demand_imbalance, "cost_up_reg")
+            @ self.imbalance_mvar["demand_up_reg"]
+            - to_array(self.demand_imbalance, "cost_down_reg")
+            @ self.imbalance_mvar["demand_down_reg"],
+            GRB.MINIMIZE,
         )
 
-        self.imbalance_model_created = True
+        # Add imbalance balance constraint (up_reg - down_reg = imbalance)
+        imbalance = float(
+            np.sum(to_array(self.gen_imbalance, "down_reg"))
+            - np.sum(to_array(self.gen_imbalance, "up_reg"))
+            + np.sum(to_array(self.demand_imbalance, "down_reg"))
+            - np.sum(to_array(self.demand_imbalance, "up_reg"))
+        )
+        self.imbalance_constr["imbalance_balance"] = self.imbalance_model.addConstr(
+            self.imbalance_mvar["gen_up_reg"].sum()
+            - self.imbalance_mvar["gen_down_reg"].sum()
+            + self.imbalance_mvar["demand_up_reg"].sum()
+            - self.imbalance_mvar["demand_down_reg"].sum()
+            == imbalance
+        )
 
     def optimize_imbalance_model(self) -> None:
         """Optimize the imbalance model, and store the results in the instance."""
@@ -290,40 +620,72 @@ class SinglePeriodNoNetwork:
                 "Imbalance model has not been created yet. Call create_imbalance_model() before optimizing the imbalance model."
             )
 
+        tracker = track("imbalance")
         try:
             self.imbalance_model.optimize()
         except Exception as e:
             print(f"Error occurred while optimizing the imbalance model: {e}")
+        tracker.lap("optimize", self.imbalance_model)
+        self._store_cached(
+            "imbalance",
+            self.imbalance_model,
+            self.imbalance_mvar if self.matrix_api else self.imbalance_var,
+            self.imbalance_constr,
+        )
 
-        if self.imbalance_model.status == GRB.OPTIMAL:
+        if self.imbalance_model.status == GRB.OPTIMAL and self.matrix_api:
+            reg = {name: mvar.X for name, mvar in self.imbalance_mvar.items()}
             self.total_imbalance_cost = self.imbalance_model.ObjVal
-            self.imbalance_price = self.imbalance_constr["imbalance_balance"].Pi
-            self.gen_up_reg = {
-                gen: self.imbalance_var[f"gen_up_reg_{gen}"].X
-                for gen in self.gen_imbalance
-            }
-            self.gen_down_reg = {
-                gen: self.imbalance_var[f"gen_down_reg_{gen}"].X
-                for gen in self.gen_imbalance
-            }
-            self.demand_up_reg = {
-                demand: self.imbalance_var[f"demand_up_reg_{demand}"].X
-                for demand in self.demand_imbalance
-            }
-            self.demand_down_reg = {
-                demand: self.imbalance_var[f"demand_down_reg_{demand}"].X
-                for demand in self.demand_imbalance
-            }
+            self.imbalance_price = float(self.imbalance_constr["imbalance_balance"].Pi)
+            self.gen_up_reg = dict(
+                zip(self.gen_imbalance, reg["gen_up_reg"].tolist(), strict=True)
+            )
+            self.gen_down_reg = dict(
+                zip(self.gen_imbalance, reg["gen_down_reg"].tolist(), strict=True)
+            )
+            self.demand_up_reg = dict(
+                zip(self.demand_imbalance, reg["demand_up_reg"].tolist(), strict=True)
+            )
+            self.demand_down_reg = dict(
+                zip(self.demand_imbalance, reg["demand_down_reg"].tolist(), strict=True)
+            )
             self.imbalance_direction = (
                 "downward"
-                if sum(
-                    self.imbalance_var[f"gen_up_reg_{gen}"].X
-                    for gen in self.gen_imbalance
+                if reg["gen_up_reg"].sum() > reg["gen_down_reg"].sum()
+                else "upward"
+            )
+
+        elif self.imbalance_model.status == GRB.OPTIMAL:
+            self.total_imbalance_cost = self.imbalance_model.ObjVal
+            self.imbalance_price = self.imbalance_constr["imbalance_balance"].Pi
+            reg = {
+                name: get_attr(
+                    self.imbalance_model,
+                    "X",
+                    [self.imbalance_var[f"{name}_{unit}"] for unit in units],
                 )
-                > sum(
-                    self.imbalance_var[f"gen_down_reg_{gen}"].X
-                    for gen in self.gen_imbalance
+                for name, units in (
+                    ("gen_up_reg", self.gen_imbalance),
+                    ("gen_down_reg", self.gen_imbalance),
+                    ("demand_up_reg", self.demand_imbalance),
+                    ("demand_down_reg", self.demand_imbalance),
                 )
+            }
+            self.gen_up_reg = dict(
+                zip(self.gen_imbalance, reg["gen_up_reg"].tolist(), strict=True)
+            )
+            self.gen_down_reg = dict(
+                zip(self.gen_imbalance, reg["gen_down_reg"].tolist(), strict=True)
+            )
+            self.demand_up_reg = dict(
+                zip(self.demand_imbalance, reg["demand_up_reg"].tolist(), strict=True)
+            )
+            self.demand_down_reg = dict(
+                zip(self.demand_imbalance, reg["demand_down_reg"].tolist(), strict=True)
+            )
+            self.imbalance_direction = (
+                "downward"
+                if reg["gen_up_reg"].sum() > reg["gen_down_reg"].sum()
                 else "upward"
             )
 
@@ -331,6 +693,7 @@ class SinglePeriodNoNetwork:
             print(
                 f"Imbalance optimization ended with status {self.imbalance_model.status}"
             )
+        tracker.lap("extract")
 
     def define_reserve(
         self, reserve_up_reg: float, reserve_down_reg: float, reserve_gens: list[str]
@@ -348,6 +711,7 @@ class SinglePeriodNoNetwork:
 
         self.reserve_data_defined = True
 
+    @tracked("reserve", "build", model_attr="reserve_model")
     def create_reserve_model(self) -> None:
         """Create a model to clear the reserve market."""
         if not self.reserve_data_defined:
@@ -355,7 +719,52 @@ class SinglePeriodNoNetwork:
                 "Reserve data has not been defined yet. Call define_reserve() before creating the reserve model."
             )
 
-        self.reserve_model = gp.Model("reserve_clearing_model")
+        cached = self._load_cached(
+            "reserve", self.reserve_up_reg, self.reserve_down_reg, self.reserve_gens
+        )
+        if cached is not None:
+            self.reserve_model, var, self.reserve_constr = cached
+            if self.matrix_api:
+                self.reserve_mvar = var
+            else:
+                self.reserve_var = var
+            self.reserve_model_created = True
+            return
+
+        if self.matrix_api:
+            self._create_reserve_model_matrix()
+            self.reserve_model_created = True
+            return
+
+        pooled = self._load_pooled("reserve", tuple(self.reserve_gens))
+        if pooled is not None:
+            # Same reserve generators: only update capacities, costs and requirements
+            self.reserve_model, self.reserve_var, self.reserve_constr = pooled
+            capacity = [self.gen_data[gen]["capacity"] for gen in self.reserve_gens]
+            cost = [self.gen_data[gen]["cost"] for gen in self.reserve_gens]
+            for direction in ("up", "down"):
+                reserve_vars = [
+                    self.reserve_var[f"gen_{direction}_reserve_{gen}"]
+                    for gen in self.reserve_gens
+                ]
+                self.reserve_model.setAttr("UB", reserve_vars, capacity)
+                self.reserve_model.setAttr("Obj", reserve_vars, cost)
+            self.reserve_constr["up_reserve_requirement"].RHS = self.reserve_up_reg
+            self.reserve_constr["down_reserve_requirement"].RHS = self.reserve_down_reg
+            self.reserve_model.setAttr(
+                "RHS",
+                [
+                    self.reserve_constr[f"reserve_capacity_{gen}"]
+                    for gen in self.reserve_gens
+                ],
+                capacity,
+            )
+            self.reserve_model_created = True
+            return
+
+        self.reserve_model = create_model(
+            "reserve_clearing_model", self.solver, self.env
+        )
         self.reserve_var: dict[str, gp.Var] = {}
         self.reserve_constr: dict[str, gp.Constr] = {}
 
@@ -374,7 +783,7 @@ class SinglePeriodNoNetwork:
 
         # Set objective to minimize reserve cost
         self.reserve_model.setObjective(
-            gp.quicksum(
+            quicksum(
                 self.reserve_var[f"gen_up_reserve_{gen}"] * self.gen_data[gen]["cost"]
                 + self.reserve_var[f"gen_down_reserve_{gen}"]
                 * self.gen_data[gen]["cost"]
@@ -385,13 +794,13 @@ class SinglePeriodNoNetwork:
 
         # Set reserve requirements constraints
         self.reserve_constr["up_reserve_requirement"] = self.reserve_model.addLConstr(
-            gp.quicksum(
+            quicksum(
                 self.reserve_var[f"gen_up_reserve_{gen}"] for gen in self.reserve_gens
             )
             >= self.reserve_up_reg
         )
         self.reserve_constr["down_reserve_requirement"] = self.reserve_model.addLConstr(
-            gp.quicksum(
+            quicksum(
                 self.reserve_var[f"gen_down_reserve_{gen}"] for gen in self.reserve_gens
             )
             >= self.reserve_down_reg
@@ -407,8 +816,53 @@ class SinglePeriodNoNetwork:
                 )
             )
 
+        self._store_pooled(
+            "reserve", self.reserve_model, self.reserve_var, self.reserve_constr
+        )
         self.reserve_model_created = True
 
+    def _create_reserve_model_matrix(self) -> None:
+        """Create the reserve model with the Gurobi matrix API."""
+        gen_index = {gen: i for i, gen in enumerate(self.gen_names)}
+        reserve_index = np.array(
+            [gen_index[gen] for gen in self.reserve_gens], dtype=int
+        )
+        capacity = self.gen_capacity[reserve_index]
+        cost = self.gen_cost[reserve_index]
+
+        self.reserve_model = create_model("reserve_clearing_model", "gurobi", self.env)
+        self.reserve_mvar: dict[str, gp.MVar] = {}
+        self.reserve_constr = {}
+
+        # Adding reserve variables for generators
+        self.reserve_mvar["gen_up_reserve"] = self.reserve_model.addMVar(
+            len(reserve_index), lb=0, ub=capacity
+        )
+        self.reserve_mvar["gen_down_reserve"] = self.reserve_model.addMVar(
+            len(reserve_index), lb=0, ub=capacity
+        )
+
+        # Set objective to minimize reserve cost
+        self.reserve_model.setObjective(
+            cost @ self.reserve_mvar["gen_up_reserve"]
+            + cost @ self.reserve_mvar["gen_down_reserve"],
+            GRB.MINIMIZE,
+        )
+
+        # Set reserve requirements constraints
+        self.reserve_constr["up_reserve_requirement"] = self.reserve_model.addConstr(
+            self.reserve_mvar["gen_up_reserve"].sum() >= self.reserve_up_reg
+        )
+        self.reserve_constr["down_reserve_requirement"] = self.reserve_model.addConstr(
+            self.reserve_mvar["gen_down_reserve"].sum() >= self.reserve_down_reg
+        )
+
+        # Combined up and down reserve from each generator within its capacity
+        self.reserve_constr["reserve_capacity"] = self.reserve_model.addConstr(
+            self.reserve_mvar["gen_up_reserve"] + self.reserve_mvar["gen_down_reserve"]
+            <= capacity
+        )
+
     def optimize_reserve_model(self) -> None:
         """Optimize the reserve model, and store the results in the instance."""
         if not self.reserve_model_created:
@@ -416,25 +870,79 @@ class SinglePeriodNoNetwork:
                 "Reserve model has not been created yet. Call create_reserve_model() before optimizing the reserve model."
             )
 
+        tracker = track("reserve")
         try:
             self.reserve_model.optimize()
         except Exception as e:
             print(f"Error occurred while optimizing the reserve model: {e}")
+        tracker.lap("optimize", self.reserve_model)
+        self._store_cached(
+            "reserve",
+            self.reserve_model,
+            self.reserve_mvar if self.matrix_api else self.reserve_var,
+            self.reserve_constr,
+        )
 
-        if self.reserve_model.status == GRB.OPTIMAL:
+        if self.reserve_model.status == GRB.OPTIMAL and self.matrix_api:
+            self.total_reserve_cost = self.reserve_model.ObjVal
+            self.reserve_price_up = float(
+                self.reserve_constr["up_reserve_requirement"].Pi
+            )
+            self.reserve_price_down = float(
+                self.reserve_constr["down_reserve_requirement"].Pi
+            )
+            self.gen_up_reserve = dict(
+                zip(
+                    self.reserve_gens,
+                    self.reserve_mvar["gen_up_reserve"].X.tolist(),
+                    strict=True,
+                )
+            )
+            self.gen_down_reserve = dict(
+                zip(
+                    self.reserve_gens,
+                    self.reserve_mvar["gen_down_reserve"].X.tolist(),
+                    strict=True,
+                )
+            )
+
+            self.reserve_model_optimized = True
+
+        elif self.reserve_model.status == GRB.OPTIMAL:
             self.total_reserve_cost = self.reserve_model.ObjVal
             self.reserve_price_up = self.reserve_constr["up_reserve_requirement"].Pi
             self.reserve_price_down = self.reserve_constr["down_reserve_requirement"].Pi
-            self.gen_up_reserve = {
-                gen: self.reserve_var[f"gen_up_reserve_{gen}"].X
-                for gen in self.reserve_gens
-            }
-            self.gen_down_reserve = {
-                gen: self.reserve_var[f"gen_down_reserve_{gen}"].X
-                for gen in self.reserve_gens
-            }
+            self.gen_up_reserve = dict(
+                zip(
+                    self.reserve_gens,
+                    get_attr(
+                        self.reserve_model,
+                        "X",
+                        [
+                            self.reserve_var[f"gen_up_reserve_{gen}"]
+                            for gen in self.reserve_gens
+                        ],
+                    ).tolist(),
+                    strict=True,
+                )
+            )
+            self.gen_down_reserve = dict(
+                zip(
+                    self.reserve_gens,
+                    get_attr(
+                        self.reserve_model,
+                        "X",
+                        [
+                            self.reserve_var[f"gen_down_reserve_{gen}"]
+                            for gen in self.reserve_gens
+                        ],
+                    ).tolist(),
+                    strict=True,
+                )
+            )
 
             self.reserve_model_optimized = True
 
         else:
             print(f"Reserve optimization ended with status {self.reserve_model.status}")
+        tracker.lap("extract")
@@ -1,13 +1,10 @@
 """Assignment 1, Step 1: Copper-Plate, Single Hour."""
 
-import gurobipy as gp
-import matplotlib.pyplot as plt
-from gurobipy import GRB
-
 from assignment_1.data.demand import Demand
 from assignment_1.data.generation import Generation
 from assignment_1.models.single_period_no_network import SinglePeriodNoNetwork
 from assignment_1.utils.colors import demand_color, gen_color
+from assignment_1.utils.plotting import pyplot, show
 
 
 def main(plot: bool = True) -> None:
@@ -50,6 +47,7 @@ def main(plot: bool = True) -> None:
 
     # %% Plot supply and demand curves
     if plot:
+        plt = pyplot()
         plt.figure(figsize=(10, 6))
         # Sorted for merit order
         sorted_gen = sorted(gen_data.items(), key=lambda item: item[1]["cost"])
@@ -136,7 +134,7 @@ def main(plot: bool = True) -> None:
         plt.title("Supply and Demand Curves")
         plt.legend()
         plt.grid()
-        plt.show()
+        show()
 
 
 if __name__ == "__main__":
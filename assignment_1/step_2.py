@@ -1,71 +1,85 @@
 """Assignment 1, Step 2: Copper-Plate, Multiple Hours."""
 
+from __future__ import annotations
+
 import copy
+from functools import partial
+from typing import Literal
 
-import gurobipy as gp
-import matplotlib.pyplot as plt
 import numpy as np
-from gurobipy import GRB
 
 from assignment_1.data.demand import Demand
 from assignment_1.data.generation import Generation
 from assignment_1.data.storage import Storage
+from assignment_1.data.unit_arrays import UnitArrays, as_unit_arrays
+from assignment_1.models.linear_program import GRB, LinExpr, create_model, quicksum
+from assignment_1.models.merit_order import clear_hourly_markets
+from assignment_1.utils.cache import SolutionCache
 from assignment_1.utils.colors import demand_color, gen_color
+from assignment_1.utils.environment import ModelPool
+from assignment_1.utils.lazy import lazy_import
+from assignment_1.utils.plotting import pyplot, show
+from assignment_1.utils.results import get_attr, get_table
+from assignment_1.utils.sweep import get_env, run_chunked_sweep
+from assignment_1.utils.telemetry import track
+
+gp = lazy_import("gurobipy")
+
+
+def _update_pooled_model(
+    model: gp.Model,
+    var: dict,
+    constr: dict,
+    gens: UnitArrays,
+    demands: UnitArrays,
+    storage_data: dict,
+    T: int,
+) -> None:
+    """Update a pooled step 2 model with the same units to new data."""
+    for units, sign in ((gens, -1), (demands, 1)):
+        unit_vars = [var[f"{unit}_{t}"] for unit in units.ids for t in range(T)]
+        model.setAttr("UB", unit_vars, units.capacity.ravel().tolist())
+        model.setAttr("Obj", unit_vars, (sign * units.cost).ravel().tolist())
+    for storage, data in storage_data.items():
+        for key, bound in (
+            ("charge", "charge_cap"),
+            ("discharge", "discharge_cap"),
+            ("soc", "capacity"),
+        ):
+            model.setAttr(
+                "UB",
+                [var[f"{storage}_{key}_{t}"] for t in range(T)],
+                [data[bound]] * T,
+            )
+        constr[f"soc_balance_{storage}_0"].RHS = data["initial_soc"] * data["capacity"]
 
 
-def multi_period_optimization_model(
-    gen_data: dict,
-    demand_data: dict,
+def _build_model(
+    gens: UnitArrays,
+    demands: UnitArrays,
     storage_data: dict,
     T: int,
+    solver: str,
+    env: gp.Env | None,
 ) -> tuple[gp.Model, dict, dict]:
-    """Create optimization model for step 2.
-
-    Args:
-        gen_data (dict): Generation data.
-        demand_data (dict): Demand data.
-        storage_data (dict): Storage data.
-        T (int): Number of time periods.
-
-    Returns:
-        model (gp.Model): Gurobi optimization model.
-        var (dict): Dictionary of optimization variables.
-        constr (dict): Dictionary of optimization constraints.
-
-    """
-    # Checking if input data has correct time series length
-    for demand, data in demand_data.items():
-        if len(data["capacity"]) != T:
-            raise ValueError(f"Demand {demand} has incorrect time series length.")
-        if len(data["cost"]) != T:
-            raise ValueError(f"Demand {demand} has incorrect time series length.")
-    for gen, data in gen_data.items():
-        if len(data["capacity"]) != T:
-            raise ValueError(f"Generation {gen} has incorrect time series length.")
-        if len(data["cost"]) != T:
-            raise ValueError(f"Generation {gen} has incorrect time series length.")
-
-    # %% Optimization model
-    # Create a new model
-    model = gp.Model("step_2")
+    """Build a new step 2 model from the unit arrays."""
+    model = create_model("step_2", solver, env)
     var = {}
     constr = {}
 
+    # Capacities by period, one list of all units per period
+    demand_capacity = demands.capacity.T.tolist()
+    gen_capacity = gens.capacity.T.tolist()
+
     # Add variables
     for t in range(T):
         # Add demand variables for each time period
-        for demand, data in demand_data.items():
-            var[f"{demand}_{t}"] = model.addVar(
-                lb=0,
-                ub=data["capacity"][t],
-            )
+        for demand, capacity in zip(demands.ids, demand_capacity[t], strict=True):
+            var[f"{demand}_{t}"] = model.addVar(lb=0, ub=capacity)
 
         # Add generation variables
-        for gen, data in gen_data.items():
-            var[f"{gen}_{t}"] = model.addVar(
-                lb=0,
-                ub=data["capacity"][t],
-            )
+        for gen, capacity in zip(gens.ids, gen_capacity[t], strict=True):
+            var[f"{gen}_{t}"] = model.addVar(lb=0, ub=capacity)
 
         # Add Charge/Discharge variables for storage unit
         for storage, data in storage_data.items():
@@ -86,21 +100,19 @@ def multi_period_optimization_model(
 
     model.update()
 
-    # Set objective to maximize social welfare (consumer utility - generation cost)
+    # Set objective to maximize social welfare (consumer utility - generation
+    # cost), with the coefficients of all units and periods in one expression
+    expr_type = gp.LinExpr if solver == "gurobi" else LinExpr
     model.setObjective(
-        gp.quicksum(
-            gp.quicksum(
-                data["cost"][t] * var[f"{demand}_{t}"]
-                for demand, data in demand_data.items()
-            )
-            for t in range(T)
-        )  # Consumer utility
-        - gp.quicksum(
-            gp.quicksum(
-                data["cost"][t] * var[f"{gen}_{t}"] for gen, data in gen_data.items()
-            )
-            for t in range(T)
-        ),  # Generation cost
+        expr_type(
+            np.concatenate((demands.cost.ravel(), -gens.cost.ravel())).tolist(),
+            [
+                var[f"{unit}_{t}"]
+                for units in (demands, gens)
+                for unit in units.ids
+                for t in range(T)
+            ],
+        ),
         GRB.MAXIMIZE,
     )
 
@@ -108,10 +120,10 @@ def multi_period_optimization_model(
     for t in range(T):
         # Add power balance constraint (supply = demand)
         constr[f"power_balance_{t}"] = model.addLConstr(
-            gp.quicksum(var[f"{demand}_{t}"] for demand in demand_data)
-            + gp.quicksum(var[f"{storage}_charge_{t}"] for storage in storage_data)
-            == gp.quicksum(var[f"{gen}_{t}"] for gen in gen_data)
-            + gp.quicksum(var[f"{storage}_discharge_{t}"] for storage in storage_data),
+            quicksum(var[f"{demand}_{t}"] for demand in demands.ids)
+            + quicksum(var[f"{storage}_charge_{t}"] for storage in storage_data)
+            == quicksum(var[f"{gen}_{t}"] for gen in gens.ids)
+            + quicksum(var[f"{storage}_discharge_{t}"] for storage in storage_data),
         )
 
         # Add storage state of charge constraints
@@ -129,14 +141,445 @@ def multi_period_optimization_model(
                 * var[f"{storage}_discharge_{t}"],
             )
 
+    return model, var, constr
+
+
+def _time_series(unit_data: dict | UnitArrays, T: int, kind: str) -> UnitArrays:
+    """Get generation or demand data as arrays, checking the time series length."""
+    if isinstance(unit_data, UnitArrays):
+        units = unit_data
+    else:
+        for unit, data in unit_data.items():
+            if np.shape(data["capacity"]) != (T,) or np.shape(data["cost"]) != (T,):
+                raise ValueError(f"{kind} {unit} has incorrect time series length.")
+        units = UnitArrays.from_dict(unit_data, T=T)
+    if units.n_periods != T:
+        raise ValueError(f"{kind} data has incorrect time series length.")
+    return units
+
+
+def multi_period_optimization_model(
+    gen_data: dict | UnitArrays,
+    demand_data: dict | UnitArrays,
+    storage_data: dict,
+    T: int,
+    env: gp.Env | None = None,
+    cache: SolutionCache | None = None,
+    optimize: bool = True,
+    solver: str | Literal["gurobi", "highs"] = "gurobi",
+    pool: ModelPool | None = None,
+) -> tuple[gp.Model, dict, dict]:
+    """Create optimization model for step 2.
+
+    Args:
+        gen_data (dict | UnitArrays): Generation data.
+        demand_data (dict | UnitArrays): Demand data.
+        storage_data (dict): Storage data.
+        T (int): Number of time periods.
+        env (gp.Env, optional): Gurobi environment to create the model in.
+            Default is None, which means the shared environment.
+        cache (SolutionCache, optional): Cache of solutions. If the inputs are
+            cached, the cached solution is returned without building the model.
+            Default is None, which means no caching.
+        optimize (bool, optional): Whether to optimize the model before returning
+            it. Defaults to True.
+        solver ("gurobi" | "highs", optional): Solver of the model. "highs" builds
+            a LinearProgram solved with HiGHS. Defaults to "gurobi".
+        pool (ModelPool, optional): Pool of models to reuse. If a model with the
+            same units, storage efficiencies and T is pooled, its bounds,
+            objective and initial state of charge are updated instead of
+            building a new model. Default is None, which means no reuse.
+
+    Returns:
+        model (gp.Model): Gurobi optimization model (a LinearProgram for HiGHS, a
+            CachedModel on a cache hit).
+        var (dict): Dictionary of optimization variables.
+        constr (dict): Dictionary of optimization constraints.
+
+    """
+    if cache is not None:
+        cache_key = cache.key(
+            "step_2", gen_data, demand_data, storage_data, T=T, solver=solver
+        )
+        cached = cache.load(cache_key)
+        if cached is not None:
+            return cached
+
+    tracker = track("step_2", T=T, solver=solver)
+    gens = _time_series(gen_data, T, "Generation")
+    demands = _time_series(demand_data, T, "Demand")
+
+    # %% Optimization model
+    if pool is not None:
+        pool_key = (
+            "step_2",
+            solver,
+            T,
+            tuple(demands.ids),
+            tuple(gens.ids),
+            tuple(
+                (storage, data["charge_eff"], data["discharge_eff"])
+                for storage, data in storage_data.items()
+            ),
+        )
+    pooled = pool.get(pool_key) if pool is not None else None
+    if pooled is not None:
+        model, var, constr = pooled
+        _update_pooled_model(model, var, constr, gens, demands, storage_data, T)
+        tracker.lap("update")
+    else:
+        model, var, constr = _build_model(gens, demands, storage_data, T, solver, env)
+        tracker.lap("build")
+        if pool is not None:
+            pool.put(pool_key, model, var, constr)
+
     # Optimize model
-    model.optimize()
+    if optimize:
+        model.optimize()
+        tracker.lap("optimize", model)
+        if cache is not None and model.status == GRB.OPTIMAL:
+            cache.store(cache_key, model, var, constr)
 
     return model, var, constr
 
 
-def print_merit_order(gen_data: dict, var: dict, spot_price: list, T: int) -> None:
-    """Print merit order and marginal generator for each hour."""
+class StorageSensitivityModel:
+    """Multi-period model with storage parameters that can be changed in place.
+
+    The model is built and solved once. Changing the storage energy capacity or
+    power only changes variable bounds and the initial state of charge, so the
+    model is re-optimized with dual simplex from the previous basis instead of
+    being rebuilt and solved from scratch.
+    """
+
+    def __init__(
+        self,
+        gen_data: dict | UnitArrays,
+        demand_data: dict | UnitArrays,
+        storage_data: dict,
+        T: int,
+        env: gp.Env | None = None,
+    ) -> None:
+        """Build and solve the model with the base storage parameters.
+
+        Args:
+            gen_data (dict | UnitArrays): Generation data.
+            demand_data (dict | UnitArrays): Demand data.
+            storage_data (dict): Storage data with the base parameters.
+            T (int): Number of time periods.
+            env (gp.Env, optional): Gurobi environment to create the model in.
+                Default is None, which means the shared environment.
+
+        """
+        self.storage_data = copy.deepcopy(storage_data)
+        self.T = T
+        self.model, self.var, self.constr = multi_period_optimization_model(
+            gen_data, demand_data, self.storage_data, T, env=env
+        )
+        self.model.Params.Method = 1
+
+    def set_factor(
+        self, param: str | Literal["capacity", "power"], factor: float
+    ) -> None:
+        """Scale a storage parameter of all storage units relative to its base value.
+
+        Args:
+            param ("capacity" | "power"): Parameter to scale. "capacity" scales the
+                energy capacity (and with it the initial state of charge), "power"
+                scales the charge and discharge capacities.
+            factor (float): Factor to scale the base value by.
+
+        """
+        for storage, data in self.storage_data.items():
+            match param:
+                case "capacity":
+                    for t in range(self.T):
+                        self.var[f"{storage}_soc_{t}"].UB = factor * data["capacity"]
+                    self.constr[f"soc_balance_{storage}_0"].RHS = (
+                        factor * data["initial_soc"] * data["capacity"]
+                    )
+                case "power":
+                    for t in range(self.T):
+                        self.var[f"{storage}_charge_{t}"].UB = (
+                            factor * data["charge_cap"]
+                        )
+                        self.var[f"{storage}_discharge_{t}"].UB = (
+                            factor * data["discharge_cap"]
+                        )
+                case _:
+                    raise ValueError("Invalid parameter for sensitivity analysis.")
+
+    def optimize(self) -> float:
+        """Re-optimize the model from the previous basis.
+
+        Returns:
+            float: Optimal social welfare.
+
+        """
+        self.model.optimize()
+        if self.model.status != GRB.OPTIMAL:
+            raise ValueError(f"No optimal solution found, status {self.model.status}.")
+        return self.model.ObjVal
+
+    def sweep(
+        self, factors: list[float], param: str | Literal["capacity", "power"]
+    ) -> list[tuple[float, float]]:
+        """Social welfare for a range of factors on a storage parameter.
+
+        The parameter is reset to its base value afterwards.
+
+        Args:
+            factors (list[float]): Factors to scale the base value by.
+            param ("capacity" | "power"): Parameter to scale.
+
+        Returns:
+            list[tuple[float, float]]: (factor, social welfare) for each factor.
+
+        """
+        social_welfare_results = []
+        for factor in factors:
+            self.set_factor(param, factor)
+            try:
+                social_welfare_results.append((factor, self.optimize()))
+            except ValueError as e:
+                raise ValueError(
+                    f"No optimal solution found for sensitivity factor {factor} for parameter {param}."
+                ) from e
+        self.set_factor(param, 1.0)
+
+        return social_welfare_results
+
+
+class RollingHorizonModel:
+    """Multi-period model solved as a sequence of overlapping time windows.
+
+    Instead of one LP over all T periods, the horizon is cleared window by
+    window. Each window covers `window` periods, of which the first
+    `window - overlap` are committed, and the next window starts at the first
+    period that was not committed. The state of charge at the end of the
+    committed periods is the initial state of charge of the next window, so the
+    overlap lets storage look ahead past the committed periods.
+
+    Only one window model exists at a time and the results are stored in
+    preallocated arrays, so memory stays bounded and solve time grows linearly
+    with T. With warm starts, the window model is built once and updated in
+    place (bounds, objective coefficients and initial state of charge) for the
+    next window, so each window is re-optimized from the previous basis.
+
+    A window often has several optimal storage schedules, e.g. charging in
+    either of two hours with the same price. A warm-started and a new model can
+    end up at different ones, and carry a different state of charge into the
+    next window, which changes the committed results of the full horizon. To
+    make the choice deterministic, every state of charge is valued at
+    `SOC_TIE_BREAK` per MWh in the window objective, which prefers keeping
+    energy stored among otherwise equal schedules. The social welfare of the
+    horizon is computed from the dispatch, without this value.
+    """
+
+    # Value of stored energy in the window objectives (per MWh and period)
+    SOC_TIE_BREAK = 1e-6
+
+    def __init__(
+        self,
+        gen_data: dict | UnitArrays,
+        demand_data: dict | UnitArrays,
+        storage_data: dict,
+        T: int,
+        window: int = 24,
+        overlap: int = 12,
+        warm_start: bool = True,
+        env: gp.Env | None = None,
+    ) -> None:
+        """Initialize the rolling horizon model.
+
+        Args:
+            gen_data (dict | UnitArrays): Generation data over the full horizon.
+            demand_data (dict | UnitArrays): Demand data over the full horizon.
+            storage_data (dict): Storage data.
+            T (int): Number of time periods of the full horizon.
+            window (int, optional): Number of time periods of each window.
+                Defaults to 24.
+            overlap (int, optional): Number of periods at the end of each window
+                that are not committed and solved again in the next window.
+                Defaults to 12.
+            warm_start (bool, optional): Whether to update the previous window
+                model in place instead of building a new one. Defaults to True.
+            env (gp.Env, optional): Gurobi environment to create the models in.
+                Default is None, which means the shared environment.
+
+        """
+        if window < 1 or not 0 <= overlap < window:
+            raise ValueError("The window must be positive and longer than overlap.")
+
+        self.gen_data = as_unit_arrays(gen_data, T=T)
+        self.demand_data = as_unit_arrays(demand_data, T=T)
+        if self.gen_data.n_periods != T or self.demand_data.n_periods != T:
+            raise ValueError("Generation and demand data must have T time periods.")
+        self.storage_data = copy.deepcopy(storage_data)
+        self.T = T
+        self.window = window
+        self.overlap = overlap
+        self.warm_start = warm_start
+        self.env = env
+
+        self.model = None
+        self.var = {}
+        self.constr = {}
+        self.n_windows = 0
+
+        # Results of the committed periods
+        n_storage = len(storage_data)
+        self.spot_price = np.full(T, np.nan)
+        self.generation = np.zeros((self.gen_data.n_units, T))
+        self.demand = np.zeros((self.demand_data.n_units, T))
+        self.charge = np.zeros((n_storage, T))
+        self.discharge = np.zeros((n_storage, T))
+        self.soc = np.zeros((n_storage, T))
+
+    def _build_window(self, start: int, stop: int, initial_soc: np.ndarray) -> None:
+        """Build and solve a new model for the periods [start, stop)."""
+        storage_data = copy.deepcopy(self.storage_data)
+        for s, data in enumerate(storage_data.values()):
+            data["initial_soc"] = initial_soc[s] / data["capacity"]
+
+        if self.model is not None:
+            self.model.dispose()
+        self.model, self.var, self.constr = multi_period_optimization_model(
+            self.gen_data.window(start, stop),
+            self.demand_data.window(start, stop),
+            storage_data,
+            stop - start,
+            env=self.env,
+            optimize=False,
+        )
+        soc_vars = [
+            self.var[f"{storage}_soc_{t}"]
+            for storage in self.storage_data
+            for t in range(stop - start)
+        ]
+        self.model.setAttr("Obj", soc_vars, [self.SOC_TIE_BREAK] * len(soc_vars))
+        self.model.optimize()
+
+    def _update_window(self, start: int, initial_soc: np.ndarray) -> None:
+        """Update the previous window model to the periods from start, and solve it."""
+        length = self.window
+        for units, sign in ((self.gen_data, -1), (self.demand_data, 1)):
+            unit_vars = [
+                self.var[f"{unit}_{t}"] for unit in units.ids for t in range(length)
+            ]
+            self.model.setAttr(
+                "UB",
+                unit_vars,
+                units.capacity[:, start : start + length].ravel().tolist(),
+            )
+            self.model.setAttr(
+                "Obj",
+                unit_vars,
+                (sign * units.cost[:, start : start + length]).ravel().tolist(),
+            )
+        for s, storage in enumerate(self.storage_data):
+            self.constr[f"soc_balance_{storage}_0"].RHS = initial_soc[s]
+        self.model.optimize()
+
+    def _store_window(self, start: int, n_commit: int) -> None:
+        """Store the results of the first n_commit periods of the current window."""
+        stop = start + n_commit
+        self.spot_price[start:stop] = get_attr(
+            self.model,
+            "Pi",
+            [self.constr[f"power_balance_{t}"] for t in range(n_commit)],
+        )
+        for results, ids, key in (
+            (self.generation, self.gen_data.ids, "{name}_{t}"),
+            (self.demand, self.demand_data.ids, "{name}_{t}"),
+            (self.charge, self.storage_data, "{name}_charge_{t}"),
+            (self.discharge, self.storage_data, "{name}_discharge_{t}"),
+            (self.soc, self.storage_data, "{name}_soc_{t}"),
+        ):
+            results[:, start:stop] = get_table(
+                self.model, "X", self.var, ids, key, n_commit
+            ).to_numpy()
+
+    def optimize(self) -> float:
+        """Solve all windows in order and store the committed results.
+
+        Returns:
+            float: Social welfare of the full horizon.
+
+        """
+        initial_soc = np.array(
+            [
+                data["initial_soc"] * data["capacity"]
+                for data in self.storage_data.values()
+            ]
+        )
+        step = self.window - self.overlap
+        self.n_windows = 0
+        start = 0
+        while start < self.T:
+            stop = min(start + self.window, self.T)
+            if (
+                self.warm_start
+                and self.model is not None
+                and stop - start == self.window
+            ):
+                self._update_window(start, initial_soc)
+            else:
+                self._build_window(start, stop, initial_soc)
+            self.n_windows += 1
+            if self.model.status != GRB.OPTIMAL:
+                raise ValueError(
+                    f"No optimal solution found for the window starting at period "
+                    f"{start}, status {self.model.status}."
+                )
+
+            # Commit all remaining periods in the last window
+            n_commit = step if stop < self.T else stop - start
+            self._store_window(start, n_commit)
+            if len(self.storage_data) > 0:
+                initial_soc = self.soc[:, start + n_commit - 1].copy()
+            start += n_commit
+
+        return float(
+            (self.demand_data.cost * self.demand).sum()
+            - (self.gen_data.cost * self.generation).sum()
+        )
+
+
+def storage_sensitivity_chunk(
+    gen_data: dict | UnitArrays,
+    demand_data: dict | UnitArrays,
+    storage_data: dict,
+    T: int,
+    param: str,
+    factors: list[float],
+) -> list[tuple[float, float]]:
+    """Storage sensitivity sweep over a chunk of factors, for a sweep worker."""
+    sensitivity_model = StorageSensitivityModel(
+        gen_data, demand_data, storage_data, T, env=get_env()
+    )
+    return sensitivity_model.sweep(factors, param)
+
+
+def print_merit_order(
+    gen_data: dict | UnitArrays,
+    var: dict | np.ndarray,
+    spot_price: list | np.ndarray,
+    T: int,
+) -> None:
+    """Print merit order and marginal generator for each hour.
+
+    Args:
+        gen_data (dict | UnitArrays): Generation data.
+        var (dict | np.ndarray): Dictionary of optimization variables, or the
+            dispatch of shape (n_gens, T), e.g. from `clear_hourly_markets`.
+        spot_price (list | np.ndarray): Market clearing price of each hour.
+        T (int): Number of time periods.
+
+    """
+    gens = as_unit_arrays(gen_data, T=T)
+    capacities = gens.capacity.T.tolist()
+    costs = gens.cost.T.tolist()
     print("\nMERIT ORDER BY HOUR")
 
     for t in range(T):
@@ -144,12 +587,9 @@ def print_merit_order(gen_data: dict, var: dict, spot_price: list, T: int) -> No
 
         # Collect generator info
         generators = []
-        for gen, data in gen_data.items():
-            output = var[f"{gen}_{t}"].X
-            capacity = data["capacity"][t]
-            cost = data["cost"][t]
-
-            generators.append((gen, cost, output, capacity))
+        for i, gen in enumerate(gens.ids):
+            output = var[i, t] if isinstance(var, np.ndarray) else var[f"{gen}_{t}"].X
+            generators.append((gen, costs[t][i], output, capacities[t][i]))
 
         # Sort by offer price (merit order)
         generators.sort(key=lambda x: x[1])
@@ -169,13 +609,15 @@ def print_merit_order(gen_data: dict, var: dict, spot_price: list, T: int) -> No
             )
 
 
-def main(plot: bool = True) -> None:
+def main(plot: bool = True, processes: int = 1) -> None:
     """Main code for step 2.
 
     A multi-period, single-bidding-zone (copper-plate) market clearing model.
 
     Args:
         plot (bool, optional): Whether to plot. Defaults to True.
+        processes (int, optional): Number of worker processes for the sensitivity
+            analysis. Defaults to 1.
 
     """
     # %% Load data
@@ -189,54 +631,50 @@ def main(plot: bool = True) -> None:
         gen_data, demand_data, storage_data, T
     )
 
-    model_without_storage, var_without_storage, constr_without_storage = (
-        multi_period_optimization_model(gen_data, demand_data, {}, T)
-    )
+    # Without storage, the hours are independent and cleared by merit order
+    clearing_without_storage = clear_hourly_markets(gen_data, demand_data)
 
     # %% Evaluate results
     if model.status == GRB.OPTIMAL:
         print("\nRESULTS:")
-        spot_price = [round(constr[f"power_balance_{t}"].Pi, 2) for t in range(T)]
+        spot_price = np.round(
+            get_table(model, "Pi", constr, ["power_balance"], T=T).iloc[0], 2
+        ).tolist()
+        generation = get_table(model, "X", var, gen_data, T=T, index_name="unit")
+        demand = get_table(model, "X", var, demand_data, T=T, index_name="unit")
+        prices = np.array(spot_price)
+        gen_cost = np.array([data["cost"] for data in gen_data.values()])
+        demand_cost = np.array([data["cost"] for data in demand_data.values()])
+
         print(f"Market clearing price: {spot_price} €/MWh")
-        print_merit_order(gen_data, var, spot_price, T)
+        print_merit_order(gen_data, generation.to_numpy(), spot_price, T)
         print(f"Optimal social welfare: {model.ObjVal:.2f} €")
-        total_cost = sum(
-            data["cost"][t] * var[f"{gen}_{t}"].X
-            for gen, data in gen_data.items()
-            for t in range(T)
-        )
+        total_cost = (gen_cost * generation.to_numpy()).sum()
         print(f"Total generation cost: {total_cost:.2f} €")
 
         print("Generation:")
-        for gen, data in gen_data.items():
-            profit = sum(
-                (spot_price[t] - data["cost"][t]) * var[f"{gen}_{t}"].X
-                for t in range(T)
-            )
+        profits = ((prices - gen_cost) * generation.to_numpy()).sum(axis=1)
+        for gen, profit in zip(gen_data, profits, strict=True):
             print(f"  {gen} total profit: {profit:.2f} €")
 
         print("Demand:")
-        for demand, data in demand_data.items():
-            utility = sum(
-                (data["cost"][t] - spot_price[t]) * var[f"{demand}_{t}"].X
-                for t in range(T)
-            )
-            print(f"  {demand}: total utility: {utility:.2f} €")
+        utilities = ((demand_cost - prices) * demand.to_numpy()).sum(axis=1)
+        for demand_name, utility in zip(demand_data, utilities, strict=True):
+            print(f"  {demand_name}: total utility: {utility:.2f} €")
 
         print("Storage:")
-        for storage in storage_data:
-            profit = sum(
-                spot_price[t]
-                * (var[f"{storage}_discharge_{t}"].X - var[f"{storage}_charge_{t}"].X)
-                for t in range(T)
-            )
+        charge = get_table(model, "X", var, storage_data, "{name}_charge_{t}", T)
+        discharge = get_table(model, "X", var, storage_data, "{name}_discharge_{t}", T)
+        profits = (prices * (discharge - charge)).sum(axis=1)
+        for storage, profit in profits.items():
             print(f"  {storage} total profit: {profit:.2f} €")
 
-        spot_price_without_storage = [
-            round(constr_without_storage[f"power_balance_{t}"].Pi, 2) for t in range(T)
-        ]
+        spot_price_without_storage = np.round(
+            clearing_without_storage.price, 2
+        ).tolist()
 
         if plot:
+            plt = pyplot()
             plt.figure(figsize=(10, 6))
             plt.step(
                 range(T + 1),
@@ -258,7 +696,7 @@ def main(plot: bool = True) -> None:
             plt.title("Market Clearing Price")
             plt.legend()
             plt.grid(True)
-            plt.show()
+            show()
 
     else:
         print("No optimal solution found.")
@@ -268,32 +706,13 @@ def main(plot: bool = True) -> None:
     def storage_param_sensitivity_analysis(
         storage_data: dict, factors: list[float], param: str
     ) -> list[tuple[float, float]]:
-        social_welfare_results = []
-        for factor in factors:
-            # Update storage data with sensitivity factor
-            storage_data_sensitivity = copy.deepcopy(storage_data)
-            for storage in storage_data_sensitivity:
-                match param:
-                    case "capacity":
-                        storage_data_sensitivity[storage]["capacity"] *= factor
-                    case "power":
-                        storage_data_sensitivity[storage]["charge_cap"] *= factor
-                        storage_data_sensitivity[storage]["discharge_cap"] *= factor
-                    case _:
-                        raise ValueError("Invalid parameter for sensitivity analysis.")
-
-            model_sensitivity, _, _ = multi_period_optimization_model(
-                gen_data, demand_data, storage_data_sensitivity, T
-            )
-
-            if model_sensitivity.status == GRB.OPTIMAL:
-                social_welfare_results.append((factor, model_sensitivity.ObjVal))
-            else:
-                raise ValueError(
-                    f"No optimal solution found for sensitivity factor {factor} for parameter {param}."
-                )
-
-        return social_welfare_results
+        return run_chunked_sweep(
+            partial(
+                storage_sensitivity_chunk, gen_data, demand_data, storage_data, T, param
+            ),
+            factors,
+            processes=processes,
+        )
 
     if plot:
         factors = np.arange(0.5, 1.6, 0.1).tolist()
@@ -304,6 +723,7 @@ def main(plot: bool = True) -> None:
             storage_data, factors, "power"
         )
 
+        plt = pyplot()
         plt.figure(figsize=(10, 6))
         plt.plot(
             [factor for factor, _ in results_capacity],
@@ -322,7 +742,7 @@ def main(plot: bool = True) -> None:
         plt.title("Sensitivity Analysis of Storage Parameters")
         plt.legend()
         plt.grid(True)
-        plt.show()
+        show()
 
 
 if __name__ == "__main__":
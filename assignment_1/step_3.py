@@ -1,108 +1,79 @@
 """Assignment 1, Step 3: Network Constraints."""
 
-import copy
+from __future__ import annotations
+
+from functools import partial
+from typing import Literal
 
-import gurobipy as gp
-import matplotlib.pyplot as plt
 import numpy as np
-from gurobipy import GRB
 
 from assignment_1.data.demand import Demand
 from assignment_1.data.generation import Generation
-from assignment_1.data.network import NetworkData
+from assignment_1.data.network import NetworkData, Topology
+from assignment_1.data.unit_arrays import UnitArrays, as_unit_arrays
+from assignment_1.models.contingency import secure_optimize
+from assignment_1.models.linear_program import GRB, LinExpr, create_model, quicksum
+from assignment_1.models.parametric import PriceCurve, add_parameter, price_curve
+from assignment_1.models.ptdf_dc_opf import ptdf_optimization_model
+from assignment_1.utils.cache import SolutionCache
+from assignment_1.utils.environment import ModelPool
+from assignment_1.utils.lazy import lazy_import
+from assignment_1.utils.plotting import pyplot, show
+from assignment_1.utils.results import get_attr, get_table
+from assignment_1.utils.sweep import get_env, run_chunked_sweep, run_sweep
+from assignment_1.utils.telemetry import track
 
+gp = lazy_import("gurobipy")
+sp = lazy_import("scipy.sparse")
 
-def optimization_model(
-    gen_data: dict,
-    demand_data: dict,
-    network_data: dict,
-    zonal_model: bool = False,
-    borders_for_atc_factor: list[str] | None = None,
-    atc_factor: float = 1.0,
-    create_missing_nodes: bool = False,
-) -> tuple[gp.Model, dict, dict]:
-    """Optimization model for step 3.
 
-    Args:
-        gen_data (dict): Generation data.
-        demand_data (dict): Demand data.
-        network_data (dict): Network data.
-        zonal_model (bool, optional): Whether to analyze the network as combined bidding zones.
-            Default is False.
-        borders_for_atc_factor (list[str], optional): List of borders to apply the ATC factor to.
-            Use the format "<bz_1>_<bz_2>".
-            Default is None, which means the ATC factor will be applied to all borders.
-        atc_factor (float, optional): Adjust the ATC by a fixed factor.
-            Default is 1.0 (no adjustment).
-        create_missing_nodes (bool, optional): Whether to create missing nodes in the network data based on generation and demand data.
-            Default is False.
+def _update_pooled_model(
+    model: gp.Model,
+    var: dict,
+    constr: dict,
+    gens: UnitArrays,
+    demands: UnitArrays,
+    network_data: dict,
+    zonal_model: bool,
+    atc: dict[str, float],
+) -> None:
+    """Update a pooled step 3 model with the same structure to new data."""
+    for units, sign in ((gens, -1), (demands, 1)):
+        unit_vars = [var[unit] for unit in units.ids]
+        model.setAttr("UB", unit_vars, units.capacity[:, 0].tolist())
+        model.setAttr("Obj", unit_vars, (sign * units.cost[:, 0]).tolist())
+    if zonal_model:
+        flow_vars = [var[f"flow_{flow}"] for flow in atc]
+        model.setAttr("LB", flow_vars, [-limit for limit in atc.values()])
+        model.setAttr("UB", flow_vars, list(atc.values()))
+    else:
+        for line, data in network_data["lines"].items():
+            constr[f"line_flow_{line}_pos"].RHS = data["capacity"]
+            constr[f"line_flow_{line}_neg"].RHS = -data["capacity"]
 
-    Returns:
-        model (gp.Model): Gurobi optimization model.
-        var (dict): Dictionary of variables.
-        constr (dict): Dictionary of constraints.
 
-    """
-    # Create a new model
-    model = gp.Model("step_3")
+def _build_model(
+    gens: UnitArrays,
+    demands: UnitArrays,
+    network_data: dict,
+    topology: Topology,
+    zonal_model: bool,
+    atc: dict[str, float],
+    atc_zones: dict[str, tuple[str, str]],
+    solver: str,
+    env: gp.Env | None,
+) -> tuple[gp.Model, dict, dict]:
+    """Build a new step 3 model (angle formulation or zonal) from the unit arrays."""
+    model = create_model("step_3", solver, env)
     var = {}
     constr = {}
 
-    # Adding missing nodes in the network data
-    nodes = [gen["node"] for gen in gen_data.values()] + [
-        demand["node"] for demand in demand_data.values()
-    ]
-    for node in nodes:
-        if node not in network_data["nodes"]:
-            if create_missing_nodes:
-                network_data["nodes"][node] = {"bz": f"no_bz_node_{node}"}
-            else:
-                raise ValueError(f"Node {node} is missing in the network data.")
-
-    bzs = list(set(node["bz"] for node in network_data["nodes"].values()))
-    atc: dict[str, float] = {}
-    for line_data in network_data["lines"].values():
-        from_bz = network_data["nodes"][line_data["from"]]["bz"]
-        to_bz = network_data["nodes"][line_data["to"]]["bz"]
-        if from_bz != to_bz:
-            capacity = line_data["capacity"]
-            if f"{from_bz}_{to_bz}" not in atc:
-                if f"{to_bz}_{from_bz}" not in atc:
-                    atc[f"{from_bz}_{to_bz}"] = 0
-                    atc[f"{from_bz}_{to_bz}"] += capacity * (
-                        atc_factor
-                        if borders_for_atc_factor is None
-                        or f"{from_bz}_{to_bz}" in borders_for_atc_factor
-                        else 1.0
-                    )
-                else:
-                    atc[f"{to_bz}_{from_bz}"] += capacity * (
-                        atc_factor
-                        if borders_for_atc_factor is None
-                        or f"{to_bz}_{from_bz}" in borders_for_atc_factor
-                        else 1.0
-                    )
-            else:
-                atc[f"{from_bz}_{to_bz}"] += capacity * (
-                    atc_factor
-                    if borders_for_atc_factor is None
-                    or f"{from_bz}_{to_bz}" in borders_for_atc_factor
-                    else 1.0
-                )
-
-    # Add demand variables
-    for demand, data in demand_data.items():
-        var[demand] = model.addVar(
-            lb=0,
-            ub=data["capacity"],
-        )
-
-    # Add generation variables
-    for gen, data in gen_data.items():
-        var[gen] = model.addVar(
-            lb=0,
-            ub=data["capacity"],
-        )
+    # Add demand and generation variables
+    for units in (demands, gens):
+        for unit, capacity in zip(
+            units.ids, units.capacity[:, 0].tolist(), strict=True
+        ):
+            var[unit] = model.addVar(lb=0, ub=capacity)
 
     # Add node voltage angle variables or powerflow variables
     if zonal_model:
@@ -115,13 +86,12 @@ def optimization_model(
     model.update()
 
     # Set objective to maximize social welfare (consumer utility - generation cost)
+    expr_type = gp.LinExpr if solver == "gurobi" else LinExpr
     model.setObjective(
-        gp.quicksum(
-            data["cost"] * var[demand] for demand, data in demand_data.items()
-        )  # Consumer utility
-        - gp.quicksum(
-            data["cost"] * var[gen] for gen, data in gen_data.items()
-        ),  # Generation cost
+        expr_type(
+            np.concatenate((demands.cost[:, 0], -gens.cost[:, 0])).tolist(),
+            [var[unit] for unit in (*demands.ids, *gens.ids)],
+        ),
         GRB.MAXIMIZE,
     )
 
@@ -132,46 +102,41 @@ def optimization_model(
 
     # Add power balance constraint
     if zonal_model:
-        for bz in bzs:
+        demands_in_zone = topology.units_by_zone(demands)
+        gens_in_zone = topology.units_by_zone(gens)
+        flows_in_zone: list[list[tuple[str, int]]] = [[] for _ in topology.zone_ids]
+        for flow, (from_bz, to_bz) in atc_zones.items():
+            flows_in_zone[topology.zone_index[from_bz]].append((flow, 1))
+            flows_in_zone[topology.zone_index[to_bz]].append((flow, -1))
+
+        for i, bz in enumerate(topology.zone_ids):
             constr[f"power_balance_{bz}"] = model.addLConstr(
-                gp.quicksum(
-                    var[demand]
-                    for demand in demand_data
-                    if network_data["nodes"][demand_data[demand]["node"]]["bz"] == bz
-                )
-                + gp.quicksum(
-                    var[f"flow_{flow}"] * (1 if flow.startswith(bz) else -1)
-                    for flow in atc
-                    if bz in flow
-                )
-                - gp.quicksum(
-                    var[gen]
-                    for gen in gen_data
-                    if network_data["nodes"][gen_data[gen]["node"]]["bz"] == bz
+                quicksum(var[demand] for demand in demands_in_zone[i])
+                + quicksum(
+                    var[f"flow_{flow}"] * direction
+                    for flow, direction in flows_in_zone[i]
                 )
+                - quicksum(var[gen] for gen in gens_in_zone[i])
                 == 0,
             )
     else:
-        for node in network_data["nodes"]:
+        demands_at_node = topology.units_by_node(demands)
+        gens_at_node = topology.units_by_node(gens)
+        lines = list(network_data["lines"].values())
+
+        for i, node in enumerate(topology.node_ids):
             constr[f"power_balance_{node}"] = model.addLConstr(
-                gp.quicksum(
-                    var[demand]
-                    for demand in demand_data
-                    if demand_data[demand]["node"] == node
-                )
-                + gp.quicksum(
+                quicksum(var[demand] for demand in demands_at_node[i])
+                + quicksum(
                     (
-                        var[f"theta_{line_data['from']}"]
-                        - var[f"theta_{line_data['to']}"]
+                        var[f"theta_{lines[line]['from']}"]
+                        - var[f"theta_{lines[line]['to']}"]
                     )
-                    / line_data["reactance"]
-                    * (1 if line_data["from"] == node else -1)
-                    for line_data in network_data["lines"].values()
-                    if line_data["from"] == node or line_data["to"] == node
-                )
-                - gp.quicksum(
-                    var[gen] for gen in gen_data if gen_data[gen]["node"] == node
+                    / lines[line]["reactance"]
+                    * (1 if lines[line]["from"] == node else -1)
+                    for line in topology.node_lines[i]
                 )
+                - quicksum(var[gen] for gen in gens_at_node[i])
                 == 0,
             )
 
@@ -189,12 +154,612 @@ def optimization_model(
                 >= -line_data["capacity"]
             )
 
+    return model, var, constr
+
+
+def _build_nodal_model_matrix(
+    gens: UnitArrays,
+    demands: UnitArrays,
+    network_data: dict,
+    topology: Topology,
+    env: gp.Env | None,
+) -> tuple[gp.Model, dict, dict]:
+    """Build a new nodal step 3 model with the Gurobi matrix API.
+
+    All variables are added in one call, and the reference bus, the power
+    balances and the line limits in one `addMConstr` call each, from the unit
+    arrays and the sparse susceptance matrices of the topology. The variables
+    and constraints, and their order, are the same as in the angle formulation
+    of `_build_model`, and so are the keys of the dictionaries.
+    """
+    n_units = demands.n_units + gens.n_units
+    n_vars = n_units + topology.n_nodes
+    line_capacity = np.array(
+        [data["capacity"] for data in network_data["lines"].values()], dtype=float
+    )
+
+    # Variables: demands, generators and voltage angles
+    model = create_model("step_3", "gurobi", env)
+    x = model.addMVar(
+        n_vars,
+        lb=np.concatenate((np.zeros(n_units), np.full(topology.n_nodes, -np.inf))),
+        ub=np.concatenate(
+            (
+                demands.capacity[:, 0],
+                gens.capacity[:, 0],
+                np.full(topology.n_nodes, np.inf),
+            )
+        ),
+        # Maximize social welfare (consumer utility - generation cost)
+        obj=np.concatenate(
+            (demands.cost[:, 0], -gens.cost[:, 0], np.zeros(topology.n_nodes))
+        ),
+    )
+    model.ModelSense = GRB.MAXIMIZE
+
+    # Reference bus (voltage angle of the first node is 0)
+    ref_node = model.addMConstr(
+        sp.csr_array(([1.0], ([0], [n_units])), shape=(1, n_vars)), x, "=", [0.0]
+    )
+
+    # Power balance (demand + net outflow - generation = 0)
+    power_balance = model.addMConstr(
+        sp.hstack(
+            (
+                topology.unit_matrix(demands),
+                -topology.unit_matrix(gens),
+                topology.bus_susceptance,
+            ),
+            format="csr",
+        ),
+        x,
+        "=",
+        np.zeros(topology.n_nodes),
+    )
+
+    # Line flow limits, the upper and lower limit of each line after each other
+    line_flow = sp.hstack(
+        (sp.csr_array((topology.n_lines, n_units)), topology.branch_susceptance),
+        format="csr",
+    )
+    line_rows = np.arange(2 * topology.n_lines) // 2
+    line_flow_limits = model.addMConstr(
+        line_flow[line_rows],
+        x,
+        np.tile(np.array(["<", ">"]), topology.n_lines),
+        np.column_stack((line_capacity, -line_capacity)).ravel(),
+    )
+    model.update()
+
+    var = dict(
+        zip(
+            [
+                *demands.ids,
+                *gens.ids,
+                *(f"theta_{node}" for node in topology.node_ids),
+            ],
+            x.tolist(),
+            strict=True,
+        )
+    )
+    constr = {"ref_node": ref_node.tolist()[0]}
+    constr.update(
+        zip(
+            (f"power_balance_{node}" for node in topology.node_ids),
+            power_balance.tolist(),
+            strict=True,
+        )
+    )
+    constr.update(
+        zip(
+            (
+                f"line_flow_{line}_{direction}"
+                for line in topology.line_ids
+                for direction in ("pos", "neg")
+            ),
+            line_flow_limits.tolist(),
+            strict=True,
+        )
+    )
+
+    return model, var, constr
+
+
+def optimization_model(
+    gen_data: dict | UnitArrays,
+    demand_data: dict | UnitArrays,
+    network_data: dict,
+    zonal_model: bool = False,
+    borders_for_atc_factor: list[str] | None = None,
+    atc_factor: float = 1.0,
+    create_missing_nodes: bool = False,
+    topology: Topology | None = None,
+    formulation: str | Literal["angle", "ptdf"] = "angle",
+    env: gp.Env | None = None,
+    cache: SolutionCache | None = None,
+    optimize: bool = True,
+    solver: str | Literal["gurobi", "highs"] = "gurobi",
+    pool: ModelPool | None = None,
+    matrix_api: bool = False,
+    security_constrained: bool = False,
+    contingency_rating: float = 1.0,
+) -> tuple[gp.Model, dict, dict]:
+    """Optimization model for step 3.
+
+    Args:
+        gen_data (dict | UnitArrays): Generation data.
+        demand_data (dict | UnitArrays): Demand data.
+        network_data (dict): Network data.
+        zonal_model (bool, optional): Whether to analyze the network as combined bidding zones.
+            Default is False.
+        borders_for_atc_factor (list[str], optional): List of borders to apply the ATC factor to.
+            Use the format "<bz_1>_<bz_2>".
+            Default is None, which means the ATC factor will be applied to all borders.
+        atc_factor (float, optional): Adjust the ATC by a fixed factor.
+            Default is 1.0 (no adjustment).
+        create_missing_nodes (bool, optional): Whether to create missing nodes in the network data based on generation and demand data.
+            Default is False.
+        topology (Topology, optional): Topology index of the network data, e.g.
+            `NetworkData.topology`. Default is None, which means it is built from
+            the network data.
+        formulation ("angle" | "ptdf", optional): Formulation of the nodal model.
+            "angle" uses voltage angle variables and limits on every line.
+            "ptdf" uses net injections with cached PTDFs, and only adds the line
+            limits that are violated (see `ptdf_optimization_model`).
+            Ignored for the zonal model. Default is "angle".
+        env (gp.Env, optional): Gurobi environment to create the model in.
+            Default is None, which means the shared environment.
+        cache (SolutionCache, optional): Cache of solutions. If the inputs and
+            options are cached, the cached solution is returned without building
+            the model. Default is None, which means no caching.
+        optimize (bool, optional): Whether to optimize the model before returning
+            it. Ignored for the PTDF formulation, which is solved iteratively.
+            Defaults to True.
+        solver ("gurobi" | "highs", optional): Solver of the model. "highs" builds
+            a LinearProgram solved with HiGHS. Defaults to "gurobi".
+        pool (ModelPool, optional): Pool of models to reuse. If a model with the
+            same units, nodes and lines (or borders for the zonal model) is
+            pooled, its capacities, costs and line or ATC limits are updated
+            instead of building a new model. Not used for the PTDF formulation.
+            Default is None, which means no reuse.
+        matrix_api (bool, optional): Whether to build the nodal model with the
+            Gurobi matrix API, from the sparse susceptance matrices of the
+            topology, instead of one constraint per node and line. The model and
+            results are the same, but building it scales much better for large
+            networks. Only for Gurobi, and ignored for the zonal model and the
+            PTDF formulation. Defaults to False.
+        security_constrained (bool, optional): Whether to clear the nodal market
+            N-1 secure. The base case is solved, screened for line overloads
+            after single line outages, and only the violated post-outage limits
+            are added before re-optimizing, until no outage overloads a line
+            (see `secure_optimize`). The number of iterations and limits added
+            are stored in `model._iterations` and
+            `model._contingency_limits_added`. Only for the angle formulation of
+            the nodal model, always optimizes the model, and cannot be pooled.
+            Defaults to False.
+        contingency_rating (float, optional): Factor on the line capacities
+            after an outage, e.g. 1.2 for a short-term emergency rating. Only
+            used with `security_constrained`. Defaults to 1.0.
+
+    Returns:
+        model (gp.Model): Gurobi optimization model (a LinearProgram for HiGHS, a
+            CachedModel on a cache hit).
+        var (dict): Dictionary of variables.
+        constr (dict): Dictionary of constraints.
+
+    """
+    if matrix_api and solver != "gurobi":
+        raise ValueError("The matrix API is only available with Gurobi.")
+    if security_constrained:
+        if zonal_model or formulation != "angle":
+            raise ValueError(
+                "Security-constrained clearing needs the angle formulation of"
+                " the nodal model."
+            )
+        if pool is not None:
+            raise ValueError("Security-constrained models cannot be pooled.")
+
+    if cache is not None:
+        cache_key = cache.key(
+            "step_3",
+            gen_data,
+            demand_data,
+            network_data,
+            zonal_model=zonal_model,
+            borders_for_atc_factor=borders_for_atc_factor,
+            atc_factor=atc_factor,
+            create_missing_nodes=create_missing_nodes,
+            formulation=None if zonal_model else formulation,
+            solver=solver,
+            # Only in the key when set, so that cached nodal solutions stay valid
+            **(
+                {"contingency_rating": contingency_rating}
+                if security_constrained
+                else {}
+            ),
+        )
+        cached = cache.load(cache_key)
+        if cached is not None:
+            return cached
+
+    tracker = track("step_3", zonal_model=zonal_model, solver=solver)
+    gens = as_unit_arrays(gen_data)
+    demands = as_unit_arrays(demand_data)
+    if gens.multi_period or demands.multi_period:
+        raise ValueError("Step 3 needs single period generation and demand data.")
+
+    # Adding missing nodes in the network data
+    for node in dict.fromkeys([*gens.node_ids, *demands.node_ids]):
+        if node not in network_data["nodes"]:
+            if create_missing_nodes:
+                network_data["nodes"][node] = {"bz": f"no_bz_node_{node}"}
+                topology = None
+            else:
+                raise ValueError(f"Node {node} is missing in the network data.")
+
+    if topology is None:
+        topology = Topology(network_data)
+
+    if not zonal_model:
+        match formulation:
+            case "angle":
+                pass
+            case "ptdf":
+                model, var, constr = ptdf_optimization_model(
+                    gens,
+                    demands,
+                    network_data,
+                    topology=topology,
+                    env=env,
+                    solver=solver,
+                )
+                if cache is not None and model.status == GRB.OPTIMAL:
+                    cache.store(cache_key, model, var, constr)
+                return model, var, constr
+            case _:
+                raise ValueError(f"Undefined formulation {formulation}.")
+
+    # ATC of each border between bidding zones, from the cached border index
+    atc: dict[str, float] = {}
+    atc_zones: dict[str, tuple[str, str]] = {}
+    if zonal_model:
+        atc = dict(
+            zip(
+                topology.border_ids,
+                topology.border_atc(
+                    network_data, atc_factor, borders_for_atc_factor
+                ).tolist(),
+                strict=True,
+            )
+        )
+        atc_zones = {
+            border: (topology.zone_ids[from_bz], topology.zone_ids[to_bz])
+            for border, (from_bz, to_bz) in zip(
+                topology.border_ids, topology.border_zones.tolist(), strict=True
+            )
+        }
+
+    if pool is not None:
+        units = tuple(
+            zip([*demands.ids, *gens.ids], [*demands.nodes, *gens.nodes], strict=True)
+        )
+        if zonal_model:
+            structure = (
+                tuple(
+                    (node, data["bz"]) for node, data in network_data["nodes"].items()
+                ),
+                tuple(atc_zones.items()),
+            )
+        else:
+            structure = (
+                tuple(network_data["nodes"]),
+                tuple(
+                    (line, data["from"], data["to"], data["reactance"])
+                    for line, data in network_data["lines"].items()
+                ),
+            )
+        pool_key = ("step_3", solver, zonal_model, units, *structure)
+
+    pooled = pool.get(pool_key) if pool is not None else None
+    if pooled is not None:
+        model, var, constr = pooled
+        _update_pooled_model(
+            model, var, constr, gens, demands, network_data, zonal_model, atc
+        )
+        tracker.lap("update")
+    else:
+        if matrix_api and not zonal_model:
+            model, var, constr = _build_nodal_model_matrix(
+                gens, demands, network_data, topology, env
+            )
+        else:
+            model, var, constr = _build_model(
+                gens,
+                demands,
+                network_data,
+                topology,
+                zonal_model,
+                atc,
+                atc_zones,
+                solver,
+                env,
+            )
+        tracker.lap("build")
+        if pool is not None:
+            pool.put(pool_key, model, var, constr)
+
     # Optimize model
-    model.optimize()
+    if security_constrained:
+        secure_optimize(
+            model, var, constr, network_data, topology, rating=contingency_rating
+        )
+        tracker.lap("optimize", model, iterations=model._iterations)
+        if cache is not None and model.status == GRB.OPTIMAL:
+            cache.store(cache_key, model, var, constr)
+    elif optimize:
+        model.optimize()
+        tracker.lap("optimize", model)
+        if cache is not None and model.status == GRB.OPTIMAL:
+            cache.store(cache_key, model, var, constr)
 
     return model, var, constr
 
 
+def line_capacity_sweep(
+    gen_data: dict | UnitArrays,
+    demand_data: dict | UnitArrays,
+    network_data: dict,
+    lines: list[str],
+    capacity_factors: list[float],
+    topology: Topology | None = None,
+    processes: int = 1,
+) -> np.ndarray:
+    """Nodal prices for a range of capacity factors on some lines.
+
+    The nodal model is built once. For each capacity factor, only the RHS of the
+    `line_flow_*` constraints of the given lines is changed, and the model is
+    re-optimized with dual simplex from the previous basis.
+
+    Args:
+        gen_data (dict | UnitArrays): Generation data.
+        demand_data (dict | UnitArrays): Demand data.
+        network_data (dict): Network data with the base line capacities.
+        lines (list[str]): Lines to apply the capacity factors to.
+        capacity_factors (list[float]): Factors to scale the line capacities by.
+        topology (Topology, optional): Topology index of the network data.
+            Default is None, which means it is built from the network data.
+        processes (int, optional): Number of worker processes. The capacity
+            factors are split into contiguous chunks, one per worker, and each
+            worker builds the model once for its chunk. Defaults to 1.
+
+    Returns:
+        np.ndarray: Nodal prices of shape (len(capacity_factors), n_nodes), with
+            nodes in the order of `network_data["nodes"]`.
+
+    """
+    if processes != 1:
+        return np.array(
+            run_chunked_sweep(
+                partial(
+                    line_capacity_sweep,
+                    gen_data,
+                    demand_data,
+                    network_data,
+                    lines,
+                    topology=topology,
+                ),
+                capacity_factors,
+                processes=processes,
+            )
+        )
+
+    model, _, constr = optimization_model(
+        gen_data,
+        demand_data,
+        network_data,
+        topology=topology,
+        env=get_env(),
+        optimize=False,
+    )
+    try:
+        model.Params.Method = 1
+        power_balance = [
+            constr[f"power_balance_{node}"] for node in network_data["nodes"]
+        ]
+
+        nodal_prices = np.empty((len(capacity_factors), len(power_balance)))
+        for i, capacity_factor in enumerate(capacity_factors):
+            for line in lines:
+                capacity = network_data["lines"][line]["capacity"] * capacity_factor
+                constr[f"line_flow_{line}_pos"].RHS = capacity
+                constr[f"line_flow_{line}_neg"].RHS = -capacity
+
+            model.optimize()
+            if model.status != GRB.OPTIMAL:
+                raise ValueError(
+                    f"No optimal solution found for capacity factor {capacity_factor}."
+                )
+            nodal_prices[i] = model.getAttr("Pi", power_balance)
+    finally:
+        # The model is not pooled, so free it (and its Gurobi memory) here
+        model.dispose()
+
+    return nodal_prices
+
+
+def line_capacity_price_curve(
+    gen_data: dict | UnitArrays,
+    demand_data: dict | UnitArrays,
+    network_data: dict,
+    lines: list[str],
+    start: float = 0.0,
+    stop: float = 2.0,
+    topology: Topology | None = None,
+) -> PriceCurve:
+    """Exact nodal prices as a step function of a capacity factor on some lines.
+
+    The capacity of the given lines is `capacity * factor`, with the factor a
+    parameter of the nodal model, and the price curve is found from the
+    sensitivity ranges of the factor (see `models.parametric`).
+
+    Args:
+        gen_data (dict | UnitArrays): Generation data.
+        demand_data (dict | UnitArrays): Demand data.
+        network_data (dict): Network data with the base line capacities.
+        lines (list[str]): Lines to apply the capacity factor to.
+        start (float, optional): Smallest capacity factor. Defaults to 0.0.
+        stop (float, optional): Largest capacity factor. Defaults to 2.0.
+        topology (Topology, optional): Topology index of the network data.
+            Default is None, which means it is built from the network data.
+
+    Returns:
+        PriceCurve: Nodal prices, with nodes in the order of
+            `network_data["nodes"]`.
+
+    """
+    model, _, constr = optimization_model(
+        gen_data,
+        demand_data,
+        network_data,
+        topology=topology,
+        env=get_env(),
+        optimize=False,
+    )
+    try:
+        factor, fixing = add_parameter(model, start)
+        for line in lines:
+            capacity = network_data["lines"][line]["capacity"]
+            constr[f"line_flow_{line}_pos"].RHS = 0
+            model.chgCoeff(constr[f"line_flow_{line}_pos"], factor, -capacity)
+            constr[f"line_flow_{line}_neg"].RHS = 0
+            model.chgCoeff(constr[f"line_flow_{line}_neg"], factor, capacity)
+
+        return price_curve(
+            model,
+            fixing,
+            {node: constr[f"power_balance_{node}"] for node in network_data["nodes"]},
+            start,
+            stop,
+        )
+    finally:
+        model.dispose()
+
+
+def atc_price_curve(
+    gen_data: dict | UnitArrays,
+    demand_data: dict | UnitArrays,
+    network_data: dict,
+    borders: list[str] | None = None,
+    start: float = 0.0,
+    stop: float = 2.0,
+    topology: Topology | None = None,
+) -> PriceCurve:
+    """Exact zonal prices as a step function of the ATC factor.
+
+    The ATC of the given borders is `atc * factor`, with the factor a parameter
+    of the zonal model, and the price curve is found from the sensitivity ranges
+    of the factor (see `models.parametric`).
+
+    Args:
+        gen_data (dict | UnitArrays): Generation data.
+        demand_data (dict | UnitArrays): Demand data.
+        network_data (dict): Network data.
+        borders (list[str] | None, optional): Borders to apply the ATC factor to,
+            in the format "<bz_1>_<bz_2>". Default is None, which means all
+            borders.
+        start (float, optional): Smallest ATC factor. Defaults to 0.0.
+        stop (float, optional): Largest ATC factor. Defaults to 2.0.
+        topology (Topology, optional): Topology index of the network data.
+            Default is None, which means it is built from the network data.
+
+    Returns:
+        PriceCurve: Zonal prices, with zones in the order of their first node in
+            `network_data["nodes"]`.
+
+    Raises:
+        ValueError: If a border is not in the network.
+
+    """
+    model, var, constr = optimization_model(
+        gen_data,
+        demand_data,
+        network_data,
+        zonal_model=True,
+        topology=topology,
+        env=get_env(),
+        optimize=False,
+    )
+    try:
+        all_borders = [
+            name.removeprefix("flow_") for name in var if name.startswith("flow_")
+        ]
+        if borders is None:
+            borders = all_borders
+        for border in borders:
+            if border not in all_borders:
+                raise ValueError(f"Unknown border {border}, use one of {all_borders}.")
+
+        # The ATC limits become constraints on the flows, with the factor in the RHS
+        factor, fixing = add_parameter(model, start)
+        for border in borders:
+            flow = var[f"flow_{border}"]
+            atc = flow.UB
+            flow.LB = -GRB.INFINITY
+            flow.UB = GRB.INFINITY
+            constr[f"atc_{border}_pos"] = model.addLConstr(flow - atc * factor <= 0)
+            constr[f"atc_{border}_neg"] = model.addLConstr(flow + atc * factor >= 0)
+
+        zones = dict.fromkeys(node["bz"] for node in network_data["nodes"].values())
+        return price_curve(
+            model,
+            fixing,
+            {bz: constr[f"power_balance_{bz}"] for bz in zones},
+            start,
+            stop,
+        )
+    finally:
+        model.dispose()
+
+
+def zonal_prices(
+    gen_data: dict | UnitArrays,
+    demand_data: dict | UnitArrays,
+    network_data: dict,
+    borders: list[str] | None,
+    atc_factor: float,
+    topology: Topology | None = None,
+) -> dict[str, float]:
+    """Zonal prices for one ATC factor, for a sweep worker.
+
+    Args:
+        gen_data (dict | UnitArrays): Generation data.
+        demand_data (dict | UnitArrays): Demand data.
+        network_data (dict): Network data.
+        borders (list[str] | None): Borders to apply the ATC factor to.
+        atc_factor (float): Factor to adjust the ATC by.
+        topology (Topology, optional): Topology index of the network data, whose
+            border index is reused for every ATC factor. Default is None, which
+            means it is built from the network data.
+
+    Returns:
+        dict[str, float]: Price of each bidding zone.
+
+    """
+    model, _, constr = optimization_model(
+        gen_data,
+        demand_data,
+        network_data,
+        zonal_model=True,
+        borders_for_atc_factor=borders,
+        atc_factor=atc_factor,
+        topology=topology,
+        env=get_env(),
+    )
+    zones = list(dict.fromkeys(node["bz"] for node in network_data["nodes"].values()))
+    prices = get_attr(model, "Pi", [constr[f"power_balance_{bz}"] for bz in zones])
+    return dict(zip(zones, prices.tolist(), strict=True))
+
+
 def main_1() -> None:
     """Main code for step 3 - Nodal Market Prices.
 
@@ -204,30 +769,39 @@ def main_1() -> None:
     # Load data
     gen_data = Generation(type="single_period").generation_data
     demand_data = Demand(type="single_period").demand_data
-    network_data = NetworkData(type="24_bus").network_data
+    network = NetworkData(type="24_bus")
+    network_data = network.network_data
+    topology = network.topology
 
     # Run optimization model
-    model, var, constr = optimization_model(gen_data, demand_data, network_data)
+    model, var, constr = optimization_model(
+        gen_data, demand_data, network_data, topology=topology
+    )
 
     if model.status == GRB.OPTIMAL:
         print("\nRESULTS:")
         print(f"Optimal social welfare: {model.ObjVal:.2f} €")
-        market_clearing_prices = {
-            node: constr[f"power_balance_{node}"].Pi for node in network_data["nodes"]
-        }
+        market_clearing_prices = get_table(
+            model, "Pi", constr, network_data["nodes"], key="power_balance_{name}"
+        )["Pi"].to_dict()
         print("Market clearing prices: ", market_clearing_prices)
 
+        generation = get_table(model, "X", var, gen_data, key="{name}")["X"]
         for gen in gen_data:
-            print(f"Generation {gen}: {var[gen].X} MW")
+            print(f"Generation {gen}: {generation[gen]} MW")
 
-        for demand in demand_data:
-            print(f"Demand {demand}: {var[demand].X} MW")
+        demand = get_table(model, "X", var, demand_data, key="{name}")["X"]
+        for demand_name in demand_data:
+            print(f"Demand {demand_name}: {demand[demand_name]} MW")
 
+        # Line flows from the voltage angle differences
+        theta = get_table(model, "X", var, topology.node_ids, key="theta_{name}")[
+            "X"
+        ].to_numpy()
+        flows = (topology.incidence @ theta) / topology.reactance
         print("Line flows:")
-        for line_name, line_data in network_data["lines"].items():
-            flow = (
-                var[f"theta_{line_data['from']}"].X - var[f"theta_{line_data['to']}"].X
-            ) / line_data["reactance"]
+        for line_name, flow in zip(topology.line_ids, flows.tolist(), strict=True):
+            line_data = network_data["lines"][line_name]
             print(
                 f"  {line_name}: {line_data['from']} -> {line_data['to']} : {flow} MW"
             )
@@ -236,7 +810,12 @@ def main_1() -> None:
         print("No optimal solution found.")
 
 
-def main_2(lines: str | list[str], capacity_factors: list[float] | None = None) -> None:
+def main_2(
+    lines: str | list[str],
+    capacity_factors: list[float] | None = None,
+    processes: int = 1,
+    parametric: bool = False,
+) -> None:
     """Main code for step 3 - Sensitivity Analysis.
 
     Analyze nodal prices to changes in line capacities.
@@ -245,6 +824,12 @@ def main_2(lines: str | list[str], capacity_factors: list[float] | None = None)
         lines (str | list[str]): Line name(s) to analyze.
         capacity_factors (list[float], optional): List of capacity factors to apply to the line capacity.
             Default is np.arange(0, 2.1, 0.1).tolist().
+        processes (int, optional): Number of worker processes for the sweep.
+            Defaults to 1.
+        parametric (bool, optional): Whether to plot the exact price curve
+            between the smallest and largest capacity factor (see
+            `line_capacity_price_curve`) instead of the prices at each capacity
+            factor. Defaults to False.
 
     """
     if capacity_factors is None:
@@ -253,44 +838,69 @@ def main_2(lines: str | list[str], capacity_factors: list[float] | None = None)
     # Load data
     gen_data = Generation(type="single_period").generation_data
     demand_data = Demand(type="single_period").demand_data
-    network_data = NetworkData(type="24_bus").network_data
+    network = NetworkData(type="24_bus")
+    network_data = network.network_data
 
     # Making sure lines is a list
     if isinstance(lines, str):
         lines = [lines]
 
-    # Loop with different line capacities
-    nodal_prices: dict[str, list[float]] = {}
-    for capacity_factor in capacity_factors:
-        # Initialize network data with modified line capacity
-        network_data_sensitivity = copy.deepcopy(network_data)
-        for line in lines:
-            network_data_sensitivity["lines"][line]["capacity"] *= capacity_factor
-
-        # Run optimization model
-        model, var, constr = optimization_model(
-            gen_data, demand_data, network_data_sensitivity
+    plt = pyplot()
+    plt.figure(figsize=(10, 6))
+    if parametric:
+        # Exact nodal prices between the smallest and largest capacity factor
+        curve = line_capacity_price_curve(
+            gen_data,
+            demand_data,
+            network_data,
+            lines,
+            start=min(capacity_factors),
+            stop=max(capacity_factors),
+            topology=network.topology,
         )
+        print(
+            f"Nodal prices: {len(curve.prices)} regions, "
+            f"breakpoints {np.round(curve.breakpoints, 4).tolist()}, "
+            f"{curve.solves} solves"
+        )
+        for node, prices in curve.to_dict().items():
+            plt.stairs(prices, curve.breakpoints, label=f"Node {node}")
+        plt.xlabel("Line Capacity Factor")
+        plt.ylabel("Nodal Price")
+        plt.title("Sensitivity Analysis: Nodal Prices vs Line Capacity")
+        plt.legend()
+        show()
+        return
 
-        # Get nodal prices
-        for node in network_data["nodes"]:
-            if node not in nodal_prices:
-                nodal_prices[node] = []
-            nodal_prices[node].append(constr[f"power_balance_{node}"].Pi)
+    # Nodal prices with different line capacities
+    prices = line_capacity_sweep(
+        gen_data,
+        demand_data,
+        network_data,
+        lines,
+        capacity_factors,
+        topology=network.topology,
+        processes=processes,
+    )
+    nodal_prices = {
+        node: prices[:, i].tolist() for i, node in enumerate(network_data["nodes"])
+    }
 
     # Plot nodal prices vs line capacity factor
-    plt.figure(figsize=(10, 6))
     for node, prices in nodal_prices.items():
         plt.plot(capacity_factors, prices, label=f"Node {node}")
     plt.xlabel("Line Capacity Factor")
     plt.ylabel("Nodal Price")
     plt.title("Sensitivity Analysis: Nodal Prices vs Line Capacity")
     plt.legend()
-    plt.show()
+    show()
 
 
 def main_3(
-    borders: str | list[str] | None = None, capacity_factors: list[float] | None = None
+    borders: str | list[str] | None = None,
+    capacity_factors: list[float] | None = None,
+    processes: int = 1,
+    parametric: bool = False,
 ) -> None:
     """Main code for step 3 - Zonal Market Prices.
 
@@ -302,16 +912,23 @@ def main_3(
             Default is None which means all borders are considered.
         capacity_factors (list[float], optional): List of capacity factors to apply to the line capacity.
             Default is None.
+        processes (int, optional): Number of worker processes for the sweep.
+            Defaults to 1.
+        parametric (bool, optional): Whether to plot the exact price curve
+            between the smallest and largest capacity factor (see
+            `atc_price_curve`) instead of the prices at each capacity factor.
+            Defaults to False.
 
     """
     # Load data
     gen_data = Generation(type="single_period").generation_data
     demand_data = Demand(type="single_period").demand_data
-    network_data = NetworkData(type="24_bus").network_data
+    network = NetworkData(type="24_bus")
+    network_data = network.network_data
 
     # Run optimization model
     model, var, constr = optimization_model(
-        gen_data, demand_data, network_data, zonal_model=True
+        gen_data, demand_data, network_data, zonal_model=True, topology=network.topology
     )
 
     if model.status == GRB.OPTIMAL:
@@ -343,34 +960,60 @@ def main_3(
     if capacity_factors is None:
         capacity_factors = np.arange(0, 2.1, 0.1).tolist()
 
-    # Loop with different ATC capacities
-    bz_prices: dict[str, list[float]] = {}
-    for capacity_factor in capacity_factors:
-        # Run optimization model
-        model, var, constr = optimization_model(
+    plt = pyplot()
+    plt.figure(figsize=(10, 6))
+    if parametric:
+        # Exact zonal prices between the smallest and largest capacity factor
+        curve = atc_price_curve(
             gen_data,
             demand_data,
             network_data,
-            zonal_model=True,
-            borders_for_atc_factor=borders,
-            atc_factor=capacity_factor,
+            borders,
+            start=min(capacity_factors),
+            stop=max(capacity_factors),
+            topology=network.topology,
         )
+        print(
+            f"Zonal prices: {len(curve.prices)} regions, "
+            f"breakpoints {np.round(curve.breakpoints, 4).tolist()}, "
+            f"{curve.solves} solves"
+        )
+        for bz, prices in curve.to_dict().items():
+            plt.stairs(prices, curve.breakpoints, label=f"Zone {bz}")
+        plt.xlabel("ATC Capacity Factor")
+        plt.ylabel("Zonal Price")
+        plt.title("Sensitivity Analysis: Zonal Prices vs ATC Capacity")
+        plt.legend()
+        show()
+        return
 
-        # Get bz prices
-        for bz in set(node["bz"] for node in network_data["nodes"].values()):
+    # Zonal prices with different ATC capacities
+    bz_prices: dict[str, list[float]] = {}
+    for prices in run_sweep(
+        partial(
+            zonal_prices,
+            gen_data,
+            demand_data,
+            network_data,
+            borders,
+            topology=network.topology,
+        ),
+        capacity_factors,
+        processes=processes,
+    ):
+        for bz, price in prices.items():
             if bz not in bz_prices:
                 bz_prices[bz] = []
-            bz_prices[bz].append(constr[f"power_balance_{bz}"].Pi)
+            bz_prices[bz].append(price)
 
     # Plot bz prices vs ATC capacity factor
-    plt.figure(figsize=(10, 6))
     for bz, prices in bz_prices.items():
         plt.plot(capacity_factors, prices, label=f"Zone {bz}")
     plt.xlabel("ATC Capacity Factor")
     plt.ylabel("Zonal Price")
     plt.title("Sensitivity Analysis: Zonal Prices vs ATC Capacity")
     plt.legend()
-    plt.show()
+    show()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,255 @@
+"""On-disk cache of solved models, keyed by a stable hash of the model inputs."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from assignment_1.data.unit_arrays import UnitArrays
+from assignment_1.models import linear_program as lp
+from assignment_1.utils.lazy import is_loaded, lazy_import
+
+gp = lazy_import("gurobipy")
+
+# Bump to invalidate all cache entries when the model formulations change
+CACHE_VERSION = 1
+
+
+def _to_json(obj: object) -> object:
+    """Convert objects that json cannot serialize to plain data."""
+    if isinstance(obj, UnitArrays):
+        return obj.to_dict()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, set | frozenset):
+        return sorted(obj)
+    raise TypeError(f"Cannot hash object of type {type(obj).__name__}.")
+
+
+class CachedItem:
+    """Stored solution attributes of a variable or constraint (or a matrix of them).
+
+    Exposes the attributes like gp.Var/gp.Constr (or gp.MVar/gp.MConstr), e.g.
+    `.X`, `.RC`, `.Pi` and `.Slack`, so that cached results are read the same way
+    as those of a solved model.
+    """
+
+    def __init__(self, **attrs: float | np.ndarray) -> None:
+        """Initialize the item with its attribute values."""
+        self.__dict__.update(attrs)
+
+    def getAttr(self, attr: str) -> float | np.ndarray:  # noqa: N802
+        """Get an attribute value, like gp.Var.getAttr."""
+        return getattr(self, attr)
+
+
+class CachedModel:
+    """Stored solution of a model, standing in for the solved gp.Model.
+
+    Attributes:
+        status (int): Optimization status.
+        ObjVal (float): Objective value.
+        Runtime (float): Always 0.0, nothing is solved.
+        cached (bool): Always True, to tell a cached model from a solved one.
+
+    """
+
+    def __init__(self, status: int, obj_val: float) -> None:
+        """Initialize the cached model."""
+        self.status = status
+        self.ObjVal = obj_val
+        self.Runtime = 0.0
+        self.cached = True
+
+    def getAttr(self, attr: str, items: list[CachedItem]) -> list:  # noqa: N802
+        """Get an attribute of a list of items, like gp.Model.getAttr."""
+        return [getattr(item, attr) for item in items]
+
+    def optimize(self) -> None:
+        """Do nothing, the solution is already known."""
+
+    def update(self) -> None:
+        """Do nothing, the model cannot be changed."""
+
+    def dispose(self) -> None:
+        """Do nothing, there is no Gurobi model to free."""
+
+
+class SolutionCache:
+    """Content-addressed cache of model solutions on disk.
+
+    Each entry is the primal values, duals, objective and status of one solved
+    model, stored as a compressed .npz file named by the SHA-256 hash of the
+    model inputs (in canonical JSON). When the total size of the entries exceeds
+    `max_bytes`, the least recently used entries are deleted.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike | None = None,
+        max_bytes: int = 256 * 1024**2,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            path (str | os.PathLike | None, optional): Cache directory. Default is
+                None, which means $ASSIGNMENT_1_CACHE_DIR if set, otherwise
+                ~/.cache/assignment_1.
+            max_bytes (int, optional): Maximum total size of the entries.
+                Defaults to 256 MiB.
+
+        """
+        if path is None:
+            path = os.environ.get(
+                "ASSIGNMENT_1_CACHE_DIR", Path.home() / ".cache" / "assignment_1"
+            )
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def key(self, name: str, *inputs: object, **options: object) -> str:
+        """Get the cache key of a model.
+
+        Args:
+            name (str): Name of the model, e.g. "step_2".
+            *inputs (object): Model inputs, e.g. generation, demand and network data.
+                Dicts, lists, numbers, strings, NumPy arrays and UnitArrays.
+            **options (object): Model options, e.g. zonal_model=True.
+
+        Returns:
+            str: Hex digest identifying the inputs.
+
+        """
+        canonical = json.dumps(
+            [CACHE_VERSION, name, inputs, options],
+            sort_keys=True,
+            separators=(",", ":"),
+            default=_to_json,
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _file(self, key: str) -> Path:
+        """Path of the entry of a key."""
+        return self.path / f"{key}.npz"
+
+    def load(self, key: str) -> tuple[CachedModel, dict, dict] | None:
+        """Load a cached solution.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            tuple[CachedModel, dict, dict] | None: The cached model, variables and
+                constraints, in the same layout as the dictionaries of the solved
+                model, or None if the key is not cached.
+
+        """
+        file = self._file(key)
+        try:
+            with np.load(file) as data:
+                entry = {name: data[name] for name in data.files}
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        # Mark the entry as recently used
+        os.utime(file)
+
+        model = CachedModel(int(entry["status"]), float(entry["obj_val"]))
+        var = {}
+        constr = {}
+        for group, attrs, prefix in (
+            (var, ("X", "RC"), "var"),
+            (constr, ("Pi", "Slack"), "constr"),
+        ):
+            names = entry[f"{prefix}_names"].tolist()
+            columns = [entry[f"{prefix}_{attr}"].tolist() for attr in attrs]
+            for name, *values in zip(names, *columns, strict=True):
+                group[name] = CachedItem(**dict(zip(attrs, values, strict=True)))
+            for i, name in enumerate(entry[f"{prefix}_matrix_names"].tolist()):
+                group[name] = CachedItem(
+                    **{attr: entry[f"{prefix}_matrix_{i}_{attr}"] for attr in attrs}
+                )
+
+        return model, var, constr
+
+    def store(
+        self, key: str, model: gp.Model | lp.LinearProgram, var: dict, constr: dict
+    ) -> None:
+        """Store the solution of a solved model.
+
+        Args:
+            key (str): Cache key.
+            model (gp.Model | LinearProgram): Solved model.
+            var (dict): Dictionary of variables (gp.Var, gp.MVar or Var).
+            constr (dict): Dictionary of constraints (gp.Constr, gp.MConstr or
+                Constr).
+
+        """
+        entry: dict[str, np.ndarray] = {
+            "status": np.array(model.status),
+            "obj_val": np.array(model.ObjVal),
+        }
+        # Gurobi items only exist once gurobipy is loaded, do not load it to check
+        gurobi = is_loaded("gurobipy")
+        for group, attrs, prefix, scalar_type in (
+            (var, ("X", "RC"), "var", (lp.Var, gp.Var) if gurobi else lp.Var),
+            (
+                constr,
+                ("Pi", "Slack"),
+                "constr",
+                (lp.Constr, gp.Constr) if gurobi else lp.Constr,
+            ),
+        ):
+            # Single items with one getAttr call per attribute, matrices one by one
+            names = [
+                name for name, item in group.items() if isinstance(item, scalar_type)
+            ]
+            matrix_names = [
+                name
+                for name, item in group.items()
+                if not isinstance(item, scalar_type)
+            ]
+            entry[f"{prefix}_names"] = np.array(names, dtype=str)
+            entry[f"{prefix}_matrix_names"] = np.array(matrix_names, dtype=str)
+            for attr in attrs:
+                entry[f"{prefix}_{attr}"] = np.array(
+                    model.getAttr(attr, [group[name] for name in names]), dtype=float
+                )
+                for i, name in enumerate(matrix_names):
+                    entry[f"{prefix}_matrix_{i}_{attr}"] = np.asarray(
+                        group[name].getAttr(attr), dtype=float
+                    )
+
+        # Write to a temporary file first, so that readers never see partial files
+        file = self._file(key)
+        temp_file = file.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp_file, "wb") as f:
+            np.savez_compressed(f, **entry)
+        os.replace(temp_file, file)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Delete the least recently used entries until the size limit is met."""
+        entries = []
+        for file in self.path.glob("*.npz"):
+            try:
+                stat = file.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file))
+        total = sum(size for _, size, _ in entries)
+        for _, size, file in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            file.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        """Delete all entries."""
+        for file in self.path.glob("*.npz"):
+            file.unlink(missing_ok=True)
@@ -0,0 +1,163 @@
+"""Shared Gurobi environment of the process, and a pool of models to reuse.
+
+All models are created in one Gurobi environment per process (`shared_env`),
+instead of the default environment of each model, so the license is checked
+out and the environment set up once. Sweep workers create theirs with their
+own parameters (see `utils.sweep`).
+
+A `ModelPool` keeps built models by their structure, so that a model with the
+same variables and constraints but different numbers (capacities, costs,
+right-hand sides) is updated in place and re-optimized instead of being built
+again. Models evicted from the pool, and all models when the pool is closed,
+are disposed at once, so memory stays flat over long sweeps:
+
+    with ModelPool() as pool:
+        for gen_data in scenarios:
+            model, var, constr = multi_period_optimization_model(
+                gen_data, demand_data, storage_data, T, pool=pool
+            )
+            results.append(model.ObjVal)  # read before the next call reuses it
+"""
+
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from collections.abc import Hashable
+
+from assignment_1.utils.lazy import lazy_import
+
+gp = lazy_import("gurobipy")
+
+# Environment of the current process, and the process that created it
+_env: gp.Env | None = None
+_env_pid: int | None = None
+
+
+def shared_env() -> gp.Env:
+    """Get the Gurobi environment shared by all models of the current process.
+
+    It is created at the first call (with the default parameters), or set by
+    `set_shared_env`. A forked child process gets its own environment, since an
+    environment cannot be shared between processes.
+
+    Returns:
+        gp.Env: The environment.
+
+    """
+    global _env, _env_pid
+    if _env is None or _env_pid != os.getpid():
+        _env = gp.Env()
+        _env_pid = os.getpid()
+    return _env
+
+
+def set_shared_env(env: gp.Env) -> None:
+    """Set the Gurobi environment shared by all models of the current process.
+
+    Args:
+        env (gp.Env): The environment, e.g. with worker-specific parameters.
+
+    """
+    global _env, _env_pid
+    _env = env
+    _env_pid = os.getpid()
+
+
+def dispose_shared_env() -> None:
+    """Dispose the shared environment. The next `shared_env` call creates a new one."""
+    global _env, _env_pid
+    if _env is not None and _env_pid == os.getpid():
+        _env.dispose()
+    _env = None
+    _env_pid = None
+
+
+class ModelPool:
+    """Built models kept for reuse, keyed by their structure.
+
+    The builders look up a model by a structure key (e.g. the unit names and
+    number of time periods). On a hit, they update the bounds, objective and
+    right-hand sides of the pooled model to the new data, instead of building a
+    new model. The least recently used models are disposed when the pool is
+    full.
+
+    A pooled model is handed out again by the next call with the same structure,
+    so its results must be read before that call.
+
+    Attributes:
+        max_models (int): Maximum number of models kept.
+        hits (int): Number of lookups that found a model.
+        misses (int): Number of lookups that did not.
+
+    """
+
+    def __init__(self, max_models: int = 8) -> None:
+        """Initialize an empty pool.
+
+        Args:
+            max_models (int, optional): Maximum number of models kept. Defaults
+                to 8.
+
+        """
+        if max_models < 1:
+            raise ValueError("The pool must hold at least one model.")
+        self.max_models = max_models
+        self.hits = 0
+        self.misses = 0
+        self._models: OrderedDict[Hashable, tuple] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Number of models in the pool."""
+        return len(self._models)
+
+    def get(self, key: Hashable) -> tuple | None:
+        """Look up a model by its structure key.
+
+        Args:
+            key (Hashable): Structure key.
+
+        Returns:
+            tuple | None: The model, variables and constraints, or None if no
+                model with this structure is pooled.
+
+        """
+        entry = self._models.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._models.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, model: gp.Model, var: dict, constr: dict) -> None:
+        """Add a model, disposing the least recently used models if full.
+
+        Args:
+            key (Hashable): Structure key.
+            model (gp.Model | LinearProgram): Model.
+            var (dict): Dictionary of variables.
+            constr (dict): Dictionary of constraints.
+
+        """
+        old = self._models.pop(key, None)
+        if old is not None and old[0] is not model:
+            old[0].dispose()
+        self._models[key] = (model, var, constr)
+        while len(self._models) > self.max_models:
+            _, (evicted, _, _) = self._models.popitem(last=False)
+            evicted.dispose()
+
+    def close(self) -> None:
+        """Dispose all models in the pool."""
+        while self._models:
+            _, (model, _, _) = self._models.popitem()
+            model.dispose()
+
+    def __enter__(self) -> ModelPool:
+        """Use the pool in a with block, which closes it at the end."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the pool."""
+        self.close()
@@ -0,0 +1,61 @@
+"""Lazy imports of heavy modules (gurobipy, pandas, scipy.sparse, scipy.optimize).
+
+`lazy_import` returns a module object whose code only runs at the first
+attribute access, e.g.
+
+    gp = lazy_import("gurobipy")  # nothing is loaded yet
+    model = gp.Model()  # gurobipy is loaded here
+
+so scripts that only use the data classes, or only solve with HiGHS, never pay
+for loading gurobipy. Modules that use the lazy module in type hints need
+`from __future__ import annotations`, so that the hints are not evaluated.
+"""
+
+import importlib.util
+import sys
+import types
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Import a module lazily.
+
+    Args:
+        name (str): Name of the module, e.g. "gurobipy".
+
+    Returns:
+        types.ModuleType: The module if it is already imported, otherwise a
+            module that is loaded at the first attribute access.
+
+    Raises:
+        ModuleNotFoundError: If the module is not installed.
+
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def is_loaded(name: str) -> bool:
+    """Whether a module has been imported and (if lazy) actually loaded.
+
+    Objects of a module (e.g. a gp.Model) can only exist once it is loaded, so
+    this allows isinstance checks that do not load the module themselves.
+
+    Args:
+        name (str): Name of the module, e.g. "gurobipy".
+
+    Returns:
+        bool: Whether the module is loaded.
+
+    """
+    module = sys.modules.get(name)
+    # LazyLoader replaces the module class by a plain module once it is loaded
+    return module is not None and type(module).__name__ != "_LazyModule"
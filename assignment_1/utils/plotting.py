@@ -0,0 +1,71 @@
+"""Matplotlib access for the step scripts, loaded only when a plot is made.
+
+In headless mode (`set_headless()` or the environment variable
+ASSIGNMENT_1_HEADLESS=1), matplotlib uses the non-interactive Agg backend and
+never touches a GUI toolkit. Figures are then saved to $ASSIGNMENT_1_FIGURE_DIR
+if it is set, instead of being shown, and closed.
+"""
+
+import os
+import types
+from pathlib import Path
+
+HEADLESS_ENV = "ASSIGNMENT_1_HEADLESS"
+FIGURE_DIR_ENV = "ASSIGNMENT_1_FIGURE_DIR"
+
+# Number of figures saved in headless mode, to name them
+_saved_figures = 0
+
+
+def set_headless(headless: bool = True) -> None:
+    """Turn headless mode on or off for this process and its child processes.
+
+    Must be called before the first plot, matplotlib keeps the backend once
+    pyplot is loaded.
+
+    Args:
+        headless (bool, optional): Whether to run headless. Defaults to True.
+
+    """
+    os.environ[HEADLESS_ENV] = "1" if headless else "0"
+
+
+def is_headless() -> bool:
+    """Whether headless mode is on."""
+    return os.environ.get(HEADLESS_ENV, "0").lower() not in ("", "0", "false", "no")
+
+
+def pyplot() -> types.ModuleType:
+    """Load matplotlib.pyplot, with the Agg backend in headless mode.
+
+    Returns:
+        types.ModuleType: The matplotlib.pyplot module.
+
+    """
+    import matplotlib
+
+    if is_headless():
+        matplotlib.use("Agg")
+
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def show() -> None:
+    """Show the current figures, or save and close them in headless mode."""
+    global _saved_figures
+    plt = pyplot()
+    if not is_headless():
+        plt.show()
+        return
+
+    figure_dir = os.environ.get(FIGURE_DIR_ENV)
+    for number in plt.get_fignums():
+        if figure_dir:
+            Path(figure_dir).mkdir(parents=True, exist_ok=True)
+            _saved_figures += 1
+            plt.figure(number).savefig(
+                Path(figure_dir) / f"figure_{os.getpid()}_{_saved_figures}.png"
+            )
+    plt.close("all")
@@ -0,0 +1,73 @@
+"""Read solution attributes of whole variable and constraint groups at once."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import numpy as np
+
+from assignment_1.utils.lazy import lazy_import
+
+gp = lazy_import("gurobipy")
+pd = lazy_import("pandas")
+
+
+def get_attr(
+    model: gp.Model, attr: str, items: Sequence[gp.Var] | Sequence[gp.Constr]
+) -> np.ndarray:
+    """Get an attribute of a group of variables or constraints with one call.
+
+    Args:
+        model (gp.Model): Optimized Gurobi model.
+        attr (str): Attribute name, e.g. "X" or "RC" for variables and "Pi" for
+            constraints.
+        items (Sequence[gp.Var] | Sequence[gp.Constr]): Variables or constraints.
+
+    Returns:
+        np.ndarray: Attribute values, in the order of the items.
+
+    """
+    return np.asarray(model.getAttr(attr, list(items)), dtype=float)
+
+
+def get_table(
+    model: gp.Model,
+    attr: str,
+    group: dict,
+    names: Sequence[str],
+    key: str = "{name}_{t}",
+    T: int | None = None,
+    index_name: str | None = None,
+) -> pd.DataFrame:
+    """Get an attribute of a group of variables or constraints as a table.
+
+    The items are looked up in `group` by formatting `key` with each name (and
+    each hour), and the attribute is read with a single `getAttr` call.
+
+    Args:
+        model (gp.Model): Optimized Gurobi model.
+        attr (str): Attribute name, e.g. "X", "RC" or "Pi".
+        group (dict): Dictionary of variables or constraints, e.g. `var` or `constr`.
+        names (Sequence[str]): Unit, node or line names, the rows of the table.
+        key (str, optional): Format of the keys in `group`, with the fields
+            {name} and {t}. Defaults to "{name}_{t}".
+        T (int | None, optional): Number of time periods, the columns of the
+            table. Default is None, which means single period keys without {t}
+            and a single column named after the attribute.
+        index_name (str | None, optional): Name of the index, e.g. "unit".
+            Defaults to None.
+
+    Returns:
+        pd.DataFrame: Attribute values indexed by name, with one column per hour.
+
+    """
+    names = list(names)
+    if T is None:
+        items = [group[key.format(name=name)] for name in names]
+        values = get_attr(model, attr, items)[:, None]
+        columns = pd.Index([attr])
+    else:
+        items = [group[key.format(name=name, t=t)] for name in names for t in range(T)]
+        values = get_attr(model, attr, items).reshape(len(names), T)
+        columns = pd.RangeIndex(T, name="hour")
+    return pd.DataFrame(values, index=pd.Index(names, name=index_name), columns=columns)
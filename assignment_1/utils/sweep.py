@@ -0,0 +1,153 @@
+"""Run scenario sweeps in parallel over a process pool."""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from assignment_1.utils.environment import set_shared_env
+from assignment_1.utils.lazy import lazy_import
+
+gp = lazy_import("gurobipy")
+
+
+# Gurobi environment of the current worker process
+_worker_env: gp.Env | None = None
+
+
+def _init_worker(threads: int, params: dict[str, Any] | None) -> None:
+    """Create the Gurobi environment of a worker process, shared by its models."""
+    global _worker_env
+    _worker_env = gp.Env(params={"Threads": threads, **(params or {})})
+    set_shared_env(_worker_env)
+
+
+def get_env() -> gp.Env | None:
+    """Get the Gurobi environment to build models on in the current process.
+
+    Returns:
+        gp.Env | None: The environment of the worker process when called from a
+            sweep, otherwise None (the shared environment of the process).
+
+    """
+    return _worker_env
+
+
+def split_points(points: Sequence, n_chunks: int) -> list[list]:
+    """Split points into contiguous chunks of (almost) equal size.
+
+    Args:
+        points (Sequence): Points to split.
+        n_chunks (int): Number of chunks.
+
+    Returns:
+        list[list]: Non-empty chunks, in order.
+
+    """
+    n_chunks = max(1, min(n_chunks, len(points)))
+    size, extra = divmod(len(points), n_chunks)
+    chunks = []
+    start = 0
+    for i in range(n_chunks):
+        stop = start + size + (1 if i < extra else 0)
+        chunks.append(list(points[start:stop]))
+        start = stop
+    return chunks
+
+
+def worker_pool(
+    processes: int, threads: int = 1, params: dict[str, Any] | None = None
+) -> ProcessPoolExecutor:
+    """Create a process pool whose workers each have one Gurobi environment.
+
+    Args:
+        processes (int): Number of worker processes.
+        threads (int, optional): Gurobi threads per worker. Defaults to 1.
+        params (dict[str, Any] | None, optional): Additional Gurobi parameters of
+            the worker environments. Default is None.
+
+    Returns:
+        ProcessPoolExecutor: The pool. The environments are available to the
+            submitted functions through `get_env()`.
+
+    """
+    return ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(threads, params),
+    )
+
+
+def run_sweep(
+    func: Callable[[Any], Any],
+    points: Sequence,
+    processes: int | None = None,
+    threads: int = 1,
+    params: dict[str, Any] | None = None,
+) -> list:
+    """Evaluate a function for each scenario point, spread over a process pool.
+
+    Each worker process creates one Gurobi environment, which is reused for all
+    of its points and available through `get_env()`. Its `Threads` parameter is
+    set so that the workers do not oversubscribe the cores.
+
+    Args:
+        func (Callable): Function of one point. Must be picklable, i.e. defined at
+            module level (or a functools.partial of such a function).
+        points (Sequence): Scenario points.
+        processes (int | None, optional): Number of worker processes. Default is
+            None, which means one per CPU core. With 1, the points are evaluated
+            in the current process.
+        threads (int, optional): Gurobi threads per worker. Defaults to 1.
+        params (dict[str, Any] | None, optional): Additional Gurobi parameters of
+            the worker environments, e.g. {"OutputFlag": 0}. Default is None.
+
+    Returns:
+        list: Results, in the order of the points.
+
+    """
+    points = list(points)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(points))
+
+    if processes <= 1:
+        return [func(point) for point in points]
+
+    with worker_pool(processes, threads, params) as executor:
+        return list(executor.map(func, points))
+
+
+def run_chunked_sweep(
+    func: Callable[[list], Sequence],
+    points: Sequence,
+    processes: int | None = None,
+    threads: int = 1,
+    params: dict[str, Any] | None = None,
+) -> list:
+    """Evaluate a function on contiguous chunks of points, one chunk per worker.
+
+    Use this for sweeps that build a model once and re-solve it for consecutive
+    points, so that each worker keeps its warm starts.
+
+    Args:
+        func (Callable): Function of a list of points, returning one result per
+            point. Must be picklable.
+        points (Sequence): Scenario points.
+        processes (int | None, optional): Number of worker processes. Default is
+            None, which means one per CPU core.
+        threads (int, optional): Gurobi threads per worker. Defaults to 1.
+        params (dict[str, Any] | None, optional): Additional Gurobi parameters of
+            the worker environments. Default is None.
+
+    Returns:
+        list: Results, in the order of the points.
+
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    chunks = split_points(points, processes)
+    results = run_sweep(func, chunks, processes, threads, params)
+    return [result for chunk_results in results for result in chunk_results]
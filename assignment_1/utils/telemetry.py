@@ -0,0 +1,266 @@
+"""Timing and solver statistics of model building and solving, sent to hooks.
+
+The models report the wall time of each phase (e.g. "build", "optimize" and
+"extract") through a `Tracker`. After a solve, the record also holds the
+solver `Runtime`, `IterCount`, `NumVars`, `NumConstrs` and `status`, so a slow
+run can be split into time spent in Python and time spent in the solver.
+
+Records are dicts passed to every registered hook, e.g.
+
+    collector = MemoryHook()
+    with hooks(collector, LoggingHook()):
+        model, var, constr = multi_period_optimization_model(...)
+    print(collector.records)
+
+When no hooks are registered, `track` returns a tracker that does nothing, so
+the instrumentation costs one function call per phase.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import os
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from assignment_1.models.linear_program import GRB, LinearProgram, is_solver_model
+from assignment_1.utils.lazy import lazy_import
+
+gp = lazy_import("gurobipy")
+
+# Hooks that receive the records, see add_hook
+_hooks: list[Callable[[dict], None]] = []
+
+
+def add_hook(hook: Callable[[dict], None]) -> None:
+    """Register a hook that receives every record.
+
+    Args:
+        hook (Callable[[dict], None]): Function of a record, e.g. a LoggingHook,
+            JsonLinesHook or MemoryHook.
+
+    """
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Callable[[dict], None]) -> None:
+    """Unregister a hook.
+
+    Args:
+        hook (Callable[[dict], None]): A registered hook.
+
+    """
+    _hooks.remove(hook)
+
+
+@contextmanager
+def hooks(*new_hooks: Callable[[dict], None]) -> Iterator[None]:
+    """Register hooks for the duration of a with block.
+
+    Args:
+        *new_hooks (Callable[[dict], None]): Hooks to register.
+
+    """
+    for hook in new_hooks:
+        add_hook(hook)
+    try:
+        yield
+    finally:
+        for hook in new_hooks:
+            remove_hook(hook)
+
+
+def enabled() -> bool:
+    """Whether any hooks are registered."""
+    return bool(_hooks)
+
+
+def _emit(record: dict) -> None:
+    """Send a record to all hooks."""
+    for hook in list(_hooks):
+        hook(record)
+
+
+class Tracker:
+    """Records the wall time of consecutive phases of one model.
+
+    Each call to `lap` ends a phase that started at the previous call (or at the
+    creation of the tracker), and emits a record for it.
+    """
+
+    def __init__(self, name: str, **tags: object) -> None:
+        """Start tracking.
+
+        Args:
+            name (str): Name of the model, e.g. "step_2" or "dayahead".
+            **tags (object): Extra fields of every record, e.g. zonal_model=True.
+
+        """
+        self.name = name
+        self.tags = tags
+        self._start = time.perf_counter()
+
+    def lap(
+        self,
+        phase: str,
+        model: gp.Model | LinearProgram | None = None,
+        **fields: object,
+    ) -> None:
+        """End a phase and emit its record.
+
+        Args:
+            phase (str): Name of the phase, e.g. "build" or "optimize".
+            model (gp.Model | LinearProgram | None, optional): Model of the phase.
+                Its solver statistics are recorded if it has been optimized.
+                Defaults to None.
+            **fields (object): Extra fields of the record.
+
+        """
+        now = time.perf_counter()
+        record = {
+            "name": self.name,
+            "phase": phase,
+            "wall_time": now - self._start,
+            "timestamp": time.time(),
+            **self.tags,
+            **fields,
+        }
+        if is_solver_model(model) and model.status != GRB.LOADED:
+            record.update(
+                status=model.status,
+                runtime=model.Runtime,
+                iter_count=model.IterCount,
+                num_vars=model.NumVars,
+                num_constrs=model.NumConstrs,
+            )
+        _emit(record)
+        self._start = time.perf_counter()
+
+
+class _NullTracker:
+    """Tracker that does nothing, used when no hooks are registered."""
+
+    def lap(self, phase: str, model: gp.Model | None = None, **fields: object) -> None:
+        """Do nothing."""
+
+
+_null_tracker = _NullTracker()
+
+
+def track(name: str, **tags: object) -> Tracker | _NullTracker:
+    """Start tracking the phases of a model.
+
+    Args:
+        name (str): Name of the model, e.g. "step_2".
+        **tags (object): Extra fields of every record.
+
+    Returns:
+        Tracker | _NullTracker: Tracker, or a tracker that does nothing if no
+            hooks are registered.
+
+    """
+    if not _hooks:
+        return _null_tracker
+    return Tracker(name, **tags)
+
+
+def tracked(name: str, phase: str, model_attr: str | None = None) -> Callable:
+    """Decorate a method to record its wall time as one phase.
+
+    Args:
+        name (str): Name of the model, e.g. "dayahead".
+        phase (str): Name of the phase, e.g. "build".
+        model_attr (str | None, optional): Attribute of the instance holding the
+            Gurobi model, whose statistics are recorded after the call. Defaults
+            to None.
+
+    Returns:
+        Callable: Decorator.
+
+    """
+
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self: object, *args: object, **kwargs: object) -> object:
+            if not _hooks:
+                return method(self, *args, **kwargs)
+            tracker = Tracker(name)
+            result = method(self, *args, **kwargs)
+            tracker.lap(phase, getattr(self, model_attr, None) if model_attr else None)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+class LoggingHook:
+    """Hook that logs each record as one line."""
+
+    def __init__(
+        self, logger: logging.Logger | None = None, level: int = logging.INFO
+    ) -> None:
+        """Initialize the hook.
+
+        Args:
+            logger (logging.Logger | None, optional): Logger to log to. Default is
+                None, which means the logger of this module.
+            level (int, optional): Log level. Defaults to logging.INFO.
+
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+
+    def __call__(self, record: dict) -> None:
+        """Log a record."""
+        message = f"{record['name']} {record['phase']}: {record['wall_time']:.4f} s"
+        if "runtime" in record:
+            message += (
+                f" (Gurobi {record['runtime']:.4f} s, {record['iter_count']:.0f} "
+                f"iterations, {record['num_vars']} vars, "
+                f"{record['num_constrs']} constrs, status {record['status']})"
+            )
+        self.logger.log(self.level, message)
+
+
+class JsonLinesHook:
+    """Hook that appends each record as a JSON line to a file."""
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        """Initialize the hook.
+
+        Args:
+            path (str | os.PathLike): Path of the JSON lines file.
+
+        """
+        self.path = Path(path)
+
+    def __call__(self, record: dict) -> None:
+        """Append a record to the file."""
+        with open(self.path, "a") as file:
+            file.write(json.dumps(record, default=str) + "\n")
+
+
+class MemoryHook:
+    """Hook that collects the records in memory.
+
+    Attributes:
+        records (list[dict]): Collected records, in order.
+
+    """
+
+    def __init__(self) -> None:
+        """Initialize the hook."""
+        self.records: list[dict] = []
+
+    def __call__(self, record: dict) -> None:
+        """Collect a record."""
+        self.records.append(record)
+
+    def clear(self) -> None:
+        """Remove the collected records."""
+        self.records.clear()
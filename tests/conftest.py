@@ -0,0 +1,28 @@
+"""Shared fixtures of the tests."""
+
+import importlib.util
+
+import pytest
+
+HAS_GUROBI = importlib.util.find_spec("gurobipy") is not None
+
+
+@pytest.fixture(scope="session", autouse=True)
+def quiet_gurobi() -> None:
+    """Turn off the Gurobi log of the shared environment."""
+    if HAS_GUROBI:
+        from assignment_1.utils.environment import shared_env
+
+        shared_env().setParam("OutputFlag", 0)
+
+
+@pytest.fixture(scope="session")
+def solver() -> str:
+    """LP solver of the tests: Gurobi if it is installed, HiGHS otherwise."""
+    return "gurobi" if HAS_GUROBI else "highs"
+
+
+@pytest.fixture(params=["gurobi", "highs"] if HAS_GUROBI else ["highs"])
+def each_solver(request: pytest.FixtureRequest) -> str:
+    """Each installed LP solver."""
+    return request.param
@@ -0,0 +1,50 @@
+"""Tests of the benchmark harness."""
+
+import json
+from pathlib import Path
+
+from assignment_1.benchmark import compare_reports, main
+
+OPTIONS = [
+    *("--benchmarks", "dayahead"),
+    *("--scales", "small"),
+    *("--solvers", "highs"),
+    *("--repeat", "1"),
+]
+
+
+def test_update_baseline(tmp_path: Path) -> None:
+    """A run against its own baseline has no regressions, a slower one has."""
+    baseline = tmp_path / "baseline.json"
+    output = tmp_path / "report.json"
+    assert (
+        main(
+            [
+                *OPTIONS,
+                "--output",
+                str(output),
+                "--baseline",
+                str(baseline),
+                "--update-baseline",
+            ]
+        )
+        == 0
+    )
+    report = json.loads(baseline.read_text())
+    assert report == json.loads(output.read_text())
+    assert report["metadata"]["gurobi"] is None
+    assert compare_reports(report, report) == []
+
+    faster = json.loads(baseline.read_text())
+    for result in faster["results"]:
+        result["total"] /= 100
+    assert compare_reports(report, faster, min_seconds=0)
+
+
+def test_missing_baseline(tmp_path: Path) -> None:
+    """A missing baseline given explicitly is an error."""
+    baseline = tmp_path / "baseline.json"
+    output = tmp_path / "report.json"
+    assert main([*OPTIONS, "--output", str(output), "--baseline", str(baseline)]) == 2
+    assert not baseline.exists()
+    assert not output.exists()
@@ -0,0 +1,89 @@
+"""Tests of the on-disk solution cache."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from assignment_1.data.demand import Demand
+from assignment_1.data.generation import Generation
+from assignment_1.data.network import NetworkData
+from assignment_1.data.storage import Storage
+from assignment_1.step_2 import multi_period_optimization_model
+from assignment_1.step_3 import optimization_model
+from assignment_1.utils.cache import CachedModel, SolutionCache
+from assignment_1.utils.results import get_attr
+
+
+def assert_same_solution(
+    cached: tuple[object, dict, dict], solved: tuple[object, dict, dict]
+) -> None:
+    """Check a cached solution against the solved model."""
+    cached_model, cached_var, cached_constr = cached
+    model, var, constr = solved
+    assert isinstance(cached_model, CachedModel)
+    assert cached_model.status == model.status
+    assert cached_model.ObjVal == model.ObjVal
+    assert cached_var.keys() == var.keys()
+    assert cached_constr.keys() == constr.keys()
+    for cached_group, group, attrs in (
+        (cached_var, var, ("X", "RC")),
+        (cached_constr, constr, ("Pi", "Slack")),
+    ):
+        for attr in attrs:
+            for name, item in group.items():
+                np.testing.assert_array_equal(
+                    cached_group[name].getAttr(attr), get_attr(model, attr, [item])[0]
+                )
+
+
+@pytest.mark.parametrize("matrix_api", [False, True])
+def test_step_3_round_trip(tmp_path: Path, solver: str, matrix_api: bool) -> None:
+    """A cached step 3 solution is loaded as it was solved."""
+    if matrix_api and solver != "gurobi":
+        pytest.skip("The matrix API needs Gurobi.")
+    cache = SolutionCache(tmp_path)
+    network = NetworkData(type="24_bus")
+    args = (
+        Generation(type="single_period").generation_data,
+        Demand(type="single_period").demand_data,
+        network.network_data,
+    )
+    solved = optimization_model(
+        *args, cache=cache, solver=solver, matrix_api=matrix_api
+    )
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+    cached = optimization_model(
+        *args, cache=cache, solver=solver, matrix_api=matrix_api
+    )
+    assert_same_solution(cached, solved)
+    # A different option is a different entry
+    zonal = optimization_model(*args, cache=cache, zonal_model=True, solver=solver)
+    assert not isinstance(zonal[0], CachedModel)
+
+
+def test_step_2_round_trip(tmp_path: Path, solver: str) -> None:
+    """A cached step 2 solution is loaded as it was solved."""
+    cache = SolutionCache(tmp_path)
+    args = (
+        Generation(type="multi_period").generation_data,
+        Demand(type="multi_period").demand_data,
+        Storage().storage_data,
+        24,
+    )
+    solved = multi_period_optimization_model(*args, cache=cache, solver=solver)
+    cached = multi_period_optimization_model(*args, cache=cache, solver=solver)
+    assert_same_solution(cached, solved)
+
+
+def test_key(tmp_path: Path) -> None:
+    """Keys only depend on the inputs and options, not on their order."""
+    cache = SolutionCache(tmp_path)
+    data = {"G1": {"capacity": 100.0, "cost": np.float64(10)}}
+    key = cache.key("step_3", data, zonal_model=False)
+    assert key == SolutionCache(tmp_path / "other").key(
+        "step_3", {"G1": {"cost": 10.0, "capacity": 100.0}}, zonal_model=False
+    )
+    assert key != cache.key("step_3", data, zonal_model=True)
+    assert key != cache.key("step_2", data, zonal_model=False)
+    assert cache.load(key) is None
@@ -0,0 +1,24 @@
+"""Tests of the batch driver."""
+
+import pytest
+
+from assignment_1.cli import load_data
+from assignment_1.data.storage import Storage
+
+
+def test_load_storage() -> None:
+    """Storage sources are storage data types or the data itself."""
+    assert load_data({"storage": "single_battery"}) == {
+        "storage": Storage().storage_data
+    }
+    assert load_data({"storage": "none"}) == {"storage": {}}
+    storage_data = {"S2": {**Storage().storage_data["S1"], "capacity": 100}}
+    assert load_data({"storage": storage_data}) == {"storage": storage_data}
+
+
+def test_load_unknown_source() -> None:
+    """Unknown data types are rejected."""
+    with pytest.raises(ValueError, match="Undefined storage data"):
+        load_data({"storage": "no_storage"})
+    with pytest.raises(ValueError, match="Undefined demand data"):
+        load_data({"demand": "single-period"})
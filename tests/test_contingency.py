@@ -0,0 +1,178 @@
+"""Tests of the N-1 contingency screening and secure market clearing."""
+
+import copy
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+from assignment_1.data.demand import Demand
+from assignment_1.data.generation import Generation
+from assignment_1.data.network import NetworkData, Topology
+from assignment_1.data.synthetic import SyntheticCase
+from assignment_1.models.contingency import (
+    dispatch_flows,
+    post_outage_flows,
+    screen_n_1,
+    secure_optimize,
+)
+from assignment_1.models.linear_program import quicksum
+from assignment_1.step_3 import optimization_model
+
+
+def outage_flows(network_data: dict, line: str, injections: np.ndarray) -> np.ndarray:
+    """Flows after an outage, from the PTDFs of the network without the line.
+
+    Args:
+        network_data (dict): Network data.
+        line (str): Line out of service.
+        injections (np.ndarray): Net injection of each node.
+
+    Returns:
+        np.ndarray: Flow on each line, 0 on the line out of service, or NaN if
+            the outage splits the network into islands.
+
+    """
+    index = list(network_data["lines"]).index(line)
+    network_data = copy.deepcopy(network_data)
+    del network_data["lines"][line]
+    topology = Topology(network_data)
+    n_islands, _ = connected_components(
+        sp.coo_array(
+            (np.ones(topology.n_lines), (topology.line_from, topology.line_to)),
+            shape=(topology.n_nodes, topology.n_nodes),
+        ),
+        directed=False,
+    )
+    if n_islands > 1:
+        return np.full(topology.n_lines + 1, np.nan)
+    return np.insert(topology.ptdf() @ injections, index, 0.0)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_screening_matches_line_removal(seed: int) -> None:
+    """The LODF screening finds the overloads of the networks without each line."""
+    rng = np.random.default_rng(seed)
+    network_data = SyntheticCase(30, 10, 10, seed=seed).network_data
+    topology = Topology(network_data)
+    injections = rng.normal(0, 100, topology.n_nodes)
+    injections -= injections.mean()
+    flows = topology.ptdf() @ injections
+    capacity = np.abs(flows) * rng.uniform(1.0, 2.0, topology.n_lines)
+    rating = 1.2
+
+    expected_flows = np.empty((topology.n_lines, topology.n_lines))
+    for k, line in enumerate(topology.line_ids):
+        expected_flows[:, k] = outage_flows(network_data, line, injections)
+    np.testing.assert_allclose(
+        post_outage_flows(topology, flows), expected_flows, atol=1e-9
+    )
+
+    result = screen_n_1(topology, flows, capacity, rating)
+    lines, outages = np.nonzero(
+        np.abs(expected_flows) > rating * capacity[:, None] + 1e-6
+    )
+    order = np.lexsort((lines, outages))
+    assert len(result) > 0
+    assert result.islanding
+    np.testing.assert_array_equal(result.outage_index, outages[order])
+    np.testing.assert_array_equal(result.line_index, lines[order])
+    np.testing.assert_allclose(
+        result.flows, expected_flows[result.line_index, result.outage_index]
+    )
+    assert result.islanding == [
+        line
+        for k, line in enumerate(topology.line_ids)
+        if np.isnan(expected_flows[0, k])
+    ]
+
+
+def full_n_1_objective(
+    gen_data: dict, demand_data: dict, network_data: dict, rating: float
+) -> float:
+    """Objective of the nodal clearing with all post-outage line limits.
+
+    The model is solved with HiGHS, as it is larger than the lazy model.
+    """
+    topology = Topology(network_data)
+    model, var, _ = optimization_model(
+        gen_data, demand_data, network_data, optimize=False, solver="highs"
+    )
+    susceptance = topology.branch_susceptance.toarray()
+    lodf = topology.lodf
+    theta = [var[f"theta_{node}"] for node in topology.node_ids]
+    capacity = [data["capacity"] for data in network_data["lines"].values()]
+    for outage in range(topology.n_lines):
+        if np.isnan(lodf[outage, outage]):
+            continue
+        for line in range(topology.n_lines):
+            if line == outage:
+                continue
+            row = susceptance[line] + lodf[line, outage] * susceptance[outage]
+            flow = quicksum(row[i] * theta[i] for i in np.flatnonzero(row))
+            model.addLConstr(flow <= rating * capacity[line])
+            model.addLConstr(flow >= -rating * capacity[line])
+    model.optimize()
+    return model.ObjVal
+
+
+@pytest.mark.parametrize("rating", [1.0, 1.2])
+def test_secure_matches_full_n_1(each_solver: str, rating: float) -> None:
+    """The lazy N-1 clearing is secure and optimal for all post-outage limits."""
+    gen_data = Generation(type="single_period").generation_data
+    demand_data = Demand(type="single_period").demand_data
+    network = NetworkData(type="24_bus")
+    network_data = network.network_data
+    topology = network.topology
+    model, var, _ = optimization_model(
+        gen_data,
+        demand_data,
+        network_data,
+        topology=topology,
+        solver=each_solver,
+        security_constrained=True,
+        contingency_rating=rating,
+    )
+    base, _, _ = optimization_model(
+        gen_data, demand_data, network_data, topology=topology, solver=each_solver
+    )
+
+    # The contingencies are binding, but only a few limits are needed
+    assert model.ObjVal < base.ObjVal - 1
+    assert 0 < model._contingency_limits_added < topology.n_lines
+    assert model.ObjVal == pytest.approx(
+        full_n_1_objective(gen_data, demand_data, network_data, rating), rel=1e-9
+    )
+    capacity = np.array([data["capacity"] for data in network_data["lines"].values()])
+    flows = dispatch_flows(model, var, gen_data, demand_data, topology)
+    assert screen_n_1(topology, flows, capacity, rating).is_secure
+
+
+def test_secure_iteration_limit(each_solver: str) -> None:
+    """Limits added in the last iteration must be solved, or it is an error."""
+    gen_data = Generation(type="single_period").generation_data
+    demand_data = Demand(type="single_period").demand_data
+    network = NetworkData(type="24_bus")
+    model, var, constr = optimization_model(
+        gen_data,
+        demand_data,
+        network.network_data,
+        topology=network.topology,
+        optimize=False,
+        solver=each_solver,
+    )
+    with pytest.raises(ValueError, match="still violated after 1 iterations"):
+        secure_optimize(
+            model, var, constr, network.network_data, network.topology, max_iterations=1
+        )
+    # Another iteration solves the added limits, and the dispatch is secure
+    secure_optimize(
+        model, var, constr, network.network_data, network.topology, max_iterations=2
+    )
+    assert model._iterations == 1
+    capacity = np.array(
+        [data["capacity"] for data in network.network_data["lines"].values()]
+    )
+    flows = dispatch_flows(model, var, gen_data, demand_data, network.topology)
+    assert screen_n_1(network.topology, flows, capacity).is_secure
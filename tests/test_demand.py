@@ -0,0 +1,61 @@
+"""Tests of the demand data."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from assignment_1.data.demand import Demand, DemandProfile
+from assignment_1.data.generation import GenerationProfile
+
+
+def test_window_keeps_demand_data(tmp_path: Path) -> None:
+    """Windows of a demand profile do not replace its demand data."""
+    path = tmp_path / "load.npy"
+    np.save(path, np.linspace(1500.0, 2700.0, 100))
+    profile = DemandProfile(path, start=10, T=24)
+    demand_data = profile.demand_data
+
+    first = profile.window(0, 24)
+    second = profile.window(50, 48)
+
+    assert profile.demand_data is demand_data
+    assert len(profile.demand_data["D1"]["capacity"]) == 24
+    assert len(first["D1"]["capacity"]) == 24
+    assert len(second["D1"]["capacity"]) == 48
+
+
+def test_multi_period_demand() -> None:
+    """Multi period demand has a value per hour and single period nodes."""
+    demand_data = Demand(type="multi_period").demand_data
+    single_period = Demand(type="single_period").demand_data
+
+    assert demand_data.keys() == single_period.keys()
+    for demand, data in demand_data.items():
+        assert data["node"] == single_period[demand]["node"]
+        assert len(data["capacity"]) == len(data["cost"]) == 24
+
+
+def test_profiles_are_lazy(tmp_path: Path) -> None:
+    """Profile data is only built on access, and windows match as arrays."""
+    load_path = tmp_path / "load.npy"
+    np.save(load_path, np.linspace(1500.0, 2700.0, 8760))
+    wind_path = tmp_path / "wind.npy"
+    np.save(wind_path, np.random.default_rng(0).uniform(0, 100, (8760, 4)))
+
+    for profile, attr in (
+        (DemandProfile(load_path), "demand_data"),
+        (GenerationProfile(wind_path), "generation_data"),
+    ):
+        assert attr not in vars(profile)
+        arrays = profile.window_arrays(100, 48)
+        assert arrays.to_dict() == profile.window(100, 48)
+        assert isinstance(arrays.capacity, np.ndarray)
+        assert attr not in vars(profile)
+        assert profile.as_arrays().n_periods == 8760
+        assert len(next(iter(getattr(profile, attr).values()))["capacity"]) == 8760
+
+    with pytest.raises(ValueError, match="outside the load profile"):
+        DemandProfile(load_path, start=8000, T=1000)
+    with pytest.raises(ValueError, match="outside the wind profiles"):
+        GenerationProfile(wind_path, start=-1)
@@ -0,0 +1,161 @@
+"""Tests of the model pool."""
+
+import copy
+
+import numpy as np
+import pytest
+
+from assignment_1.data.demand import Demand
+from assignment_1.data.generation import Generation
+from assignment_1.data.network import NetworkData
+from assignment_1.data.storage import Storage
+from assignment_1.models.single_period_no_network import SinglePeriodNoNetwork
+from assignment_1.step_2 import multi_period_optimization_model
+from assignment_1.step_3 import optimization_model
+from assignment_1.utils.environment import ModelPool
+
+
+def perturb(unit_data: dict, rng: np.random.Generator) -> dict:
+    """Unit data with capacities and costs scaled by random factors."""
+    unit_data = copy.deepcopy(unit_data)
+    for data in unit_data.values():
+        for key in ("capacity", "cost"):
+            data[key] = (
+                np.asarray(data[key]) * rng.uniform(0.7, 1.3, np.shape(data[key]))
+            ).tolist()
+    return unit_data
+
+
+def test_step_2(each_solver: str) -> None:
+    """A pooled multi period model gives the results of a new model."""
+    rng = np.random.default_rng(0)
+    storage_data = Storage().storage_data
+    with ModelPool() as pool:
+        for _ in range(3):
+            gen_data = perturb(Generation(type="multi_period").generation_data, rng)
+            demand_data = perturb(Demand(type="multi_period").demand_data, rng)
+            results = []
+            for model_pool in (pool, None):
+                model, _, constr = multi_period_optimization_model(
+                    gen_data,
+                    demand_data,
+                    storage_data,
+                    24,
+                    solver=each_solver,
+                    pool=model_pool,
+                )
+                results.append(
+                    [model.ObjVal]
+                    + [constr[f"power_balance_{t}"].Pi for t in range(24)]
+                )
+            np.testing.assert_allclose(results[0], results[1], atol=1e-6)
+        assert pool.hits == 2
+        assert pool.misses == 1
+
+
+@pytest.mark.parametrize("zonal_model", [False, True])
+def test_step_3(each_solver: str, zonal_model: bool) -> None:
+    """A pooled step 3 model gives the results of a new model."""
+    rng = np.random.default_rng(1)
+    with ModelPool() as pool:
+        for _ in range(3):
+            gen_data = perturb(Generation(type="single_period").generation_data, rng)
+            demand_data = perturb(Demand(type="single_period").demand_data, rng)
+            network_data = NetworkData(type="24_bus").network_data
+            for data in network_data["lines"].values():
+                data["capacity"] *= rng.uniform(0.3, 1.0)
+            atc_factor = rng.uniform(0.5, 1.0)
+            results = []
+            for model_pool in (pool, None):
+                model, _, constr = optimization_model(
+                    gen_data,
+                    demand_data,
+                    network_data,
+                    zonal_model=zonal_model,
+                    atc_factor=atc_factor,
+                    solver=each_solver,
+                    pool=model_pool,
+                )
+                results.append(
+                    [model.ObjVal]
+                    + [
+                        item.Pi
+                        for name, item in constr.items()
+                        if name.startswith("power_balance_")
+                    ]
+                )
+            np.testing.assert_allclose(results[0], results[1], atol=1e-6)
+        assert pool.hits == 2
+
+
+def test_single_period_no_network(each_solver: str) -> None:
+    """Pooled reserve and day-ahead models give the results of new models."""
+    rng = np.random.default_rng(2)
+    with ModelPool() as pool:
+        for _ in range(3):
+            gen_data = perturb(Generation(type="single_period").generation_data, rng)
+            demand_data = perturb(Demand(type="single_period").demand_data, rng)
+            reserve_up = 150 * rng.uniform(0.8, 1.2)
+            results = []
+            for model_pool in (pool, None):
+                model = SinglePeriodNoNetwork(
+                    gen_data, demand_data, solver=each_solver, pool=model_pool
+                )
+                model.define_reserve(reserve_up, 100, list(gen_data)[:5])
+                model.create_reserve_model()
+                model.optimize_reserve_model()
+                # The reserve allocation is not unique, so the day-ahead model is
+                # compared without the reserve restrictions
+                model.create_dayahead_model()
+                model.optimize_dayahead_model()
+                results.append(
+                    [
+                        model.reserve_model.ObjVal,
+                        model.social_welfare,
+                        model.day_ahead_price,
+                    ]
+                )
+            np.testing.assert_allclose(results[0], results[1], atol=1e-6)
+        assert pool.hits == 4
+
+
+def test_matrix_api_not_pooled() -> None:
+    """Models built with the matrix API cannot be pooled."""
+    with pytest.raises(ValueError, match="cannot be pooled"):
+        SinglePeriodNoNetwork(
+            Generation(type="single_period").generation_data,
+            Demand(type="single_period").demand_data,
+            matrix_api=True,
+            pool=ModelPool(),
+        )
+
+
+class FakeModel:
+    """Stand-in for a model, recording whether it was disposed."""
+
+    def __init__(self) -> None:
+        """Initialize the model."""
+        self.disposed = False
+
+    def dispose(self) -> None:
+        """Dispose the model."""
+        self.disposed = True
+
+
+def test_pool_eviction() -> None:
+    """The least recently used model is disposed when the pool is full."""
+    models = [FakeModel() for _ in range(3)]
+    pool = ModelPool(max_models=2)
+    pool.put("a", models[0], {}, {})
+    pool.put("b", models[1], {}, {})
+    assert pool.get("a") is not None
+    pool.put("c", models[2], {}, {})
+
+    assert len(pool) == 2
+    assert pool.get("b") is None
+    assert models[1].disposed
+    assert not models[0].disposed
+
+    pool.close()
+    assert len(pool) == 0
+    assert all(model.disposed for model in models)
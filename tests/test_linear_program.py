@@ -0,0 +1,47 @@
+"""Tests of the LinearProgram backend."""
+
+import pytest
+
+from assignment_1.models.linear_program import GRB, LinearProgram, LinExpr, quicksum
+
+
+def test_empty_quicksum() -> None:
+    """Sums without variables are expressions, e.g. for a node without units."""
+    model = LinearProgram()
+    x = model.addVar(ub=2.0)
+
+    assert isinstance(quicksum([]), LinExpr)
+    assert quicksum([1.0, 2]).constant == 3.0
+    model.addLConstr(quicksum([]) == 0)
+    model.addLConstr(quicksum([x]) + quicksum([]) <= 1.0)
+    model.setObjective(-quicksum([x]))
+    model.optimize()
+
+    assert model.status == GRB.OPTIMAL
+    assert model.ObjVal == pytest.approx(-1.0)
+
+
+def test_constant_objective() -> None:
+    """A constant objective is a sum without variables."""
+    model = LinearProgram()
+    model.addVar(ub=1.0)
+    model.setObjective(quicksum([]))
+    model.optimize()
+
+    assert model.ObjVal == 0.0
+
+
+def test_empty_quicksum_with_gurobi() -> None:
+    """Sums without variables stand in for their constant in Gurobi terms."""
+    gp = pytest.importorskip("gurobipy")
+    model = gp.Model()
+    model.Params.OutputFlag = 0
+    x = model.addVar(ub=2.0)
+    model.addLConstr(quicksum([]) + quicksum([x]) <= 1.0)
+    model.addLConstr(quicksum([]) <= x - quicksum([]))
+    model.setObjective(quicksum([x]) + quicksum([]), GRB.MAXIMIZE)
+    model.optimize()
+
+    assert model.ObjVal == pytest.approx(1.0)
+    with pytest.raises(TypeError, match="Gurobi"):
+        LinearProgram().addVar() + x
@@ -0,0 +1,59 @@
+"""Tests of the merit-order market clearing against the LP."""
+
+import numpy as np
+import pytest
+
+from assignment_1.data.demand import Demand
+from assignment_1.data.generation import Generation
+from assignment_1.data.synthetic import SyntheticCase
+from assignment_1.data.unit_arrays import UnitArrays
+from assignment_1.models.merit_order import clear_hourly_markets, clear_merit_order
+from assignment_1.models.single_period_no_network import SinglePeriodNoNetwork
+
+
+def assert_matches_lp(gen_data: dict, demand_data: dict, solver: str) -> None:
+    """Check the merit order against the day-ahead LP of the same market."""
+    result = clear_merit_order(gen_data, demand_data)
+    model = SinglePeriodNoNetwork(gen_data, demand_data, solver=solver)
+    model.create_dayahead_model()
+    model.optimize_dayahead_model()
+
+    assert result.social_welfare == pytest.approx(model.social_welfare, abs=1e-6)
+    assert result.quantity == pytest.approx(sum(model.generation.values()))
+    # The LP dual is one of the market clearing prices, and the only one if a
+    # unit is partially accepted
+    low, high = result.price_range
+    assert low - 1e-6 <= model.day_ahead_price <= high + 1e-6
+    if result.marginal_unit is not None:
+        assert model.day_ahead_price == pytest.approx(result.price)
+
+
+def test_step_1_market(solver: str) -> None:
+    """The step 1 market clears at the price of the LP."""
+    assert_matches_lp(
+        Generation(type="single_period").generation_data,
+        Demand(type="single_period").demand_data,
+        solver,
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_synthetic_markets(seed: int, solver: str) -> None:
+    """Random markets clear at the price of the LP."""
+    case = SyntheticCase(10, 30, 20, seed=seed)
+    assert_matches_lp(case.generation_data, case.demand_data, solver)
+
+
+def test_hourly_markets() -> None:
+    """Clearing all hours at once equals clearing each hour on its own."""
+    case = SyntheticCase(10, 30, 20, T=12, seed=1)
+    gens = UnitArrays.from_dict(case.generation_data)
+    demands = UnitArrays.from_dict(case.demand_data)
+    result = clear_hourly_markets(gens, demands)
+
+    for t in range(case.T):
+        hour = clear_merit_order(gens.window(t, t + 1), demands.window(t, t + 1))
+        assert result.price[t] == pytest.approx(hour.price)
+        np.testing.assert_allclose(
+            result.generation[:, t], list(hour.generation.values())
+        )
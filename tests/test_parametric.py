@@ -0,0 +1,93 @@
+"""Tests of the parametric price curves against grid sweeps."""
+
+import numpy as np
+import pytest
+
+from assignment_1.data.demand import Demand
+from assignment_1.data.generation import Generation
+from assignment_1.data.network import NetworkData
+from assignment_1.step_3 import (
+    atc_price_curve,
+    line_capacity_price_curve,
+    line_capacity_sweep,
+    zonal_prices,
+)
+
+pytest.importorskip("gurobipy")
+
+
+@pytest.fixture(scope="module")
+def data() -> tuple[dict, dict, NetworkData]:
+    """Generation, demand and network data of the 24-bus system."""
+    return (
+        Generation(type="single_period").generation_data,
+        Demand(type="single_period").demand_data,
+        NetworkData(type="24_bus"),
+    )
+
+
+def off_breakpoints(grid: np.ndarray, breakpoints: np.ndarray) -> np.ndarray:
+    """Grid points that are not at a breakpoint, where the prices are unique."""
+    return grid[np.min(np.abs(grid[:, None] - breakpoints), axis=1) > 1e-3]
+
+
+@pytest.mark.parametrize("lines", [["L1", "L2", "L3"], ["L23"], ["L7", "L10"]])
+def test_line_capacity_curve(data: tuple, lines: list[str]) -> None:
+    """The nodal price curve equals the prices of a capacity factor sweep."""
+    gen_data, demand_data, network = data
+    curve = line_capacity_price_curve(
+        gen_data, demand_data, network.network_data, lines, 0.0, 1.0
+    )
+    grid = off_breakpoints(np.linspace(0.0, 1.0, 201), curve.breakpoints)
+    prices = line_capacity_sweep(
+        gen_data, demand_data, network.network_data, lines, grid.tolist()
+    )
+
+    assert curve.breakpoints[0] == 0.0
+    assert curve.breakpoints[-1] == 1.0
+    np.testing.assert_allclose(curve(grid), prices, atol=1e-6)
+
+
+@pytest.mark.parametrize("borders", [None, ["BZ1_BZ2"]])
+def test_atc_curve(data: tuple, borders: list[str] | None) -> None:
+    """The zonal price curve equals the prices of an ATC factor sweep."""
+    gen_data, demand_data, network = data
+    curve = atc_price_curve(
+        gen_data, demand_data, network.network_data, borders, 0.0, 1.5
+    )
+
+    for factor in off_breakpoints(np.linspace(0.0, 1.5, 31), curve.breakpoints):
+        prices = zonal_prices(
+            gen_data, demand_data, network.network_data, borders, factor
+        )
+        assert dict(zip(curve.names, curve(factor), strict=True)) == pytest.approx(
+            prices, abs=1e-6
+        )
+
+
+def test_models_disposed(data: tuple, monkeypatch: pytest.MonkeyPatch) -> None:
+    """The sweep and the price curves free their models, also on errors."""
+    import gurobipy as gp
+
+    from assignment_1 import step_3
+
+    models = []
+
+    def optimization_model(*args: object, **kwargs: object) -> tuple:
+        result = build(*args, **kwargs)
+        models.append(result[0])
+        return result
+
+    build = step_3.optimization_model
+    monkeypatch.setattr(step_3, "optimization_model", optimization_model)
+    gen_data, demand_data, network = data
+    line_capacity_sweep(gen_data, demand_data, network.network_data, ["L1"], [1.0])
+    line_capacity_price_curve(gen_data, demand_data, network.network_data, ["L1"])
+    atc_price_curve(gen_data, demand_data, network.network_data)
+    with pytest.raises(ValueError, match="Unknown border"):
+        atc_price_curve(gen_data, demand_data, network.network_data, ["BZ9_BZ1"])
+
+    assert len(models) == 4
+    for model in models:
+        with pytest.raises(gp.GurobiError, match="freed"):
+            model.NumVars  # noqa: B018
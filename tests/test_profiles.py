@@ -0,0 +1,66 @@
+"""Tests of the profile file loaders."""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from assignment_1.data.profiles import ProfileFile
+
+
+@pytest.fixture
+def csv_path(tmp_path: Path) -> Path:
+    """CSV file with a header row and two profiles."""
+    path = tmp_path / "profiles.csv"
+    path.write_text("load,wind\n1.0,0.5\n2.0,0.25\n3.0,0.125\n")
+    return path
+
+
+def test_csv_without_cache(csv_path: Path) -> None:
+    """A CSV file is read into memory and nothing is written next to it."""
+    profiles = ProfileFile(csv_path)
+
+    assert profiles.columns == ["load", "wind"]
+    np.testing.assert_array_equal(profiles.column("wind"), [0.5, 0.25, 0.125])
+    assert sorted(path.name for path in csv_path.parent.iterdir()) == ["profiles.csv"]
+
+
+def test_csv_cache(csv_path: Path, tmp_path: Path) -> None:
+    """The cache is memory-mapped, reused, and rebuilt when the CSV changes."""
+    cache_path = tmp_path / "cache" / "profiles.npy"
+    profiles = ProfileFile(csv_path, cache_path=cache_path)
+    assert isinstance(profiles.column("load").base, np.memmap)
+    np.testing.assert_array_equal(profiles.column("load"), [1.0, 2.0, 3.0])
+    mtime = cache_path.stat().st_mtime_ns
+
+    ProfileFile(csv_path, cache_path=cache_path)
+    assert cache_path.stat().st_mtime_ns == mtime
+
+    csv_path.write_text("load,wind\n4.0,0.5\n5.0,0.25\n")
+    os.utime(csv_path, ns=(mtime + 10**9, mtime + 10**9))
+    profiles = ProfileFile(csv_path, cache_path=cache_path)
+    np.testing.assert_array_equal(profiles.column("load"), [4.0, 5.0])
+
+
+def test_csv_cache_not_overwritten(csv_path: Path, tmp_path: Path) -> None:
+    """A file at the cache path that the loader did not create is kept."""
+    cache_path = tmp_path / "other.npy"
+    np.save(cache_path, np.arange(3.0))
+
+    with pytest.raises(ValueError, match="not overwriting"):
+        ProfileFile(csv_path, cache_path=cache_path)
+    np.testing.assert_array_equal(np.load(cache_path), np.arange(3.0))
+
+
+def test_npz_close(tmp_path: Path) -> None:
+    """An .npz archive is closed on exit, and its profiles stay valid."""
+    path = tmp_path / "profiles.npz"
+    np.savez(path, load=np.arange(4.0), wind=np.ones(4))
+
+    with ProfileFile(path) as profiles:
+        assert profiles.columns == ["load", "wind"]
+        assert profiles.n_periods == 4
+        load = profiles.column("load")
+    assert profiles._npz.fid is None
+    np.testing.assert_array_equal(load, np.arange(4.0))
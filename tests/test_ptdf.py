@@ -0,0 +1,48 @@
+"""Tests of the PTDF nodal formulation against the angle formulation."""
+
+import numpy as np
+import pytest
+
+from assignment_1.data.synthetic import SyntheticCase
+from assignment_1.models.ptdf_dc_opf import ptdf_optimization_model
+from assignment_1.step_3 import optimization_model
+from assignment_1.utils.results import get_attr
+
+
+def nodal_prices(model: object, constr: dict, node_ids: list[str]) -> np.ndarray:
+    """Duals of the power balance of each node."""
+    return np.array(
+        get_attr(model, "Pi", [constr[f"power_balance_{node}"] for node in node_ids])
+    )
+
+
+@pytest.mark.parametrize("seed", range(1, 4))
+def test_ptdf_matches_angle(each_solver: str, seed: int) -> None:
+    """The lazy PTDF model has the objective and nodal prices of the angle model."""
+    case = SyntheticCase(30, 20, 20, seed=seed)
+    args = case.generation_data, case.demand_data, case.network_data
+    node_ids = list(case.network_data["nodes"])
+    angle, _, angle_constr = optimization_model(*args, solver=each_solver)
+    ptdf, _, ptdf_constr = optimization_model(
+        *args, formulation="ptdf", solver=each_solver
+    )
+
+    assert ptdf.ObjVal == pytest.approx(angle.ObjVal, rel=1e-9)
+    angle_prices = nodal_prices(angle, angle_constr, node_ids)
+    # The cases are congested, so that the line limits matter
+    assert np.ptp(angle_prices) > 1
+    np.testing.assert_allclose(
+        nodal_prices(ptdf, ptdf_constr, node_ids), angle_prices, atol=1e-6
+    )
+    # Only the binding line limits are added
+    assert ptdf._line_limits_added < len(case.network_data["lines"])
+
+
+def test_iteration_limit(each_solver: str) -> None:
+    """Line limits added in the last iteration must be solved, or it is an error."""
+    case = SyntheticCase(30, 20, 20, seed=1)
+    args = case.generation_data, case.demand_data, case.network_data
+    with pytest.raises(ValueError, match="still violated after 1 iterations"):
+        ptdf_optimization_model(*args, max_iterations=1, solver=each_solver)
+    model, _, _ = ptdf_optimization_model(*args, max_iterations=2, solver=each_solver)
+    assert model._iterations == 2
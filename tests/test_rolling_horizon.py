@@ -0,0 +1,79 @@
+"""Tests of the rolling-horizon clearing against the full horizon model."""
+
+import numpy as np
+import pytest
+
+from assignment_1.data.demand import Demand
+from assignment_1.data.generation import Generation
+from assignment_1.data.storage import Storage
+from assignment_1.step_2 import RollingHorizonModel, multi_period_optimization_model
+from assignment_1.utils.results import get_attr
+
+pytest.importorskip("gurobipy")
+
+T = 24
+
+
+@pytest.fixture(scope="module")
+def data() -> tuple[dict, dict, dict]:
+    """Generation, demand and storage data of step 2."""
+    return (
+        Generation(type="multi_period").generation_data,
+        Demand(type="multi_period").demand_data,
+        Storage().storage_data,
+    )
+
+
+def full_horizon(data: tuple[dict, dict, dict]) -> tuple[float, np.ndarray]:
+    """Social welfare and prices of the model over all periods."""
+    model, _, constr = multi_period_optimization_model(*data, T)
+    prices = get_attr(model, "Pi", [constr[f"power_balance_{t}"] for t in range(T)])
+    return model.ObjVal, np.asarray(prices)
+
+
+@pytest.mark.parametrize("warm_start", [True, False])
+def test_single_window(data: tuple[dict, dict, dict], warm_start: bool) -> None:
+    """A window over the full horizon is the full horizon model."""
+    welfare, prices = full_horizon(data)
+    model = RollingHorizonModel(*data, T, window=T, overlap=0, warm_start=warm_start)
+
+    assert model.optimize() == pytest.approx(welfare, rel=1e-9)
+    assert model.n_windows == 1
+    np.testing.assert_allclose(model.spot_price, prices, atol=1e-4)
+
+
+@pytest.mark.parametrize(("window", "overlap"), [(12, 6), (8, 4), (6, 3)])
+def test_warm_start_matches_rebuild(
+    data: tuple[dict, dict, dict], window: int, overlap: int
+) -> None:
+    """Warm-started windows commit the results of windows built from scratch."""
+    results = []
+    for warm_start in (True, False):
+        model = RollingHorizonModel(
+            *data, T, window=window, overlap=overlap, warm_start=warm_start
+        )
+        results.append((model.optimize(), model))
+    (warm_welfare, warm), (welfare, rebuilt) = results
+
+    assert warm_welfare == pytest.approx(welfare, rel=1e-9)
+    for attr in ("charge", "discharge", "soc"):
+        np.testing.assert_allclose(
+            getattr(warm, attr), getattr(rebuilt, attr), atol=1e-6
+        )
+    # Generators with the same cost can share the load differently
+    np.testing.assert_allclose(
+        warm.generation.sum(axis=0), rebuilt.generation.sum(axis=0), atol=1e-6
+    )
+    # The step 2 horizon needs no look ahead past 6 periods
+    if overlap >= 4:
+        assert welfare == pytest.approx(full_horizon(data)[0], rel=1e-9)
+
+
+def test_without_storage(data: tuple[dict, dict, dict]) -> None:
+    """Without storage, the windows are the hours of the full horizon model."""
+    gen_data, demand_data, _ = data
+    welfare, prices = full_horizon((gen_data, demand_data, {}))
+    model = RollingHorizonModel(gen_data, demand_data, {}, T, window=5, overlap=2)
+
+    assert model.optimize() == pytest.approx(welfare, rel=1e-9)
+    np.testing.assert_allclose(model.spot_price, prices, atol=1e-6)
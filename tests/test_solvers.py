@@ -0,0 +1,134 @@
+"""Tests of the HiGHS backend against Gurobi."""
+
+import numpy as np
+import pytest
+
+from assignment_1.data.demand import Demand
+from assignment_1.data.generation import Generation
+from assignment_1.data.network import NetworkData
+from assignment_1.data.storage import Storage
+from assignment_1.data.synthetic import SyntheticCase
+from assignment_1.models.single_period_no_network import SinglePeriodNoNetwork
+from assignment_1.step_2 import multi_period_optimization_model
+from assignment_1.step_3 import optimization_model
+from assignment_1.utils.results import get_attr
+
+pytest.importorskip("gurobipy")
+
+SOLVERS = ("gurobi", "highs")
+
+
+def solution(model: object, constr: dict, prefix: str = "") -> np.ndarray:
+    """Objective and duals of the constraints of a solved model.
+
+    Args:
+        model (object): Solved model.
+        constr (dict): Dictionary of constraints.
+        prefix (str, optional): Only the duals of constraints whose name starts
+            with the prefix. Default is "", which means all constraints.
+
+    Returns:
+        np.ndarray: The objective followed by the duals.
+
+    """
+    items = [item for name, item in constr.items() if name.startswith(prefix)]
+    return np.array([model.ObjVal, *get_attr(model, "Pi", items)])
+
+
+def test_step_2() -> None:
+    """Both solvers give the objective and hourly prices of step 2.
+
+    The state of charge duals are not unique, as the storage has several
+    optimal schedules, so only the prices are compared.
+    """
+    args = (
+        Generation(type="multi_period").generation_data,
+        Demand(type="multi_period").demand_data,
+        Storage().storage_data,
+        24,
+    )
+    gurobi, highs = (
+        solution(
+            *multi_period_optimization_model(*args, solver=solver)[::2],
+            prefix="power_balance",
+        )
+        for solver in SOLVERS
+    )
+    np.testing.assert_allclose(highs, gurobi, atol=1e-6)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{}, {"formulation": "ptdf"}, {"zonal_model": True, "atc_factor": 0.5}],
+)
+def test_step_3(options: dict) -> None:
+    """Both solvers give the objective and prices of step 3."""
+    case = SyntheticCase(30, 20, 20, seed=1)
+    args = case.generation_data, case.demand_data, case.network_data
+    gurobi, highs = (
+        solution(*optimization_model(*args, solver=solver, **options)[::2])
+        for solver in SOLVERS
+    )
+    np.testing.assert_allclose(highs, gurobi, atol=1e-6)
+
+
+def test_step_3_network() -> None:
+    """Both solvers give the objective and prices of the 24 bus network."""
+    network = NetworkData(type="24_bus")
+    args = (
+        Generation(type="single_period").generation_data,
+        Demand(type="single_period").demand_data,
+        network.network_data,
+    )
+    gurobi, highs = (
+        solution(*optimization_model(*args, solver=solver)[::2]) for solver in SOLVERS
+    )
+    np.testing.assert_allclose(highs, gurobi, atol=1e-6)
+
+
+def test_single_period_no_network() -> None:
+    """Both solvers give the day-ahead, imbalance and reserve prices."""
+    gen_data = Generation(type="single_period").generation_data
+    demand_data = Demand(type="single_period").demand_data
+    total_demand = sum(data["capacity"] for data in demand_data.values())
+    results = []
+    for solver in SOLVERS:
+        model = SinglePeriodNoNetwork(gen_data, demand_data, solver=solver)
+        model.create_dayahead_model()
+        model.optimize_dayahead_model()
+        model.define_imbalance(
+            gen_new_imbalance={"G13": 0.85 * gen_data["G13"]["capacity"]},
+            demand_new_imbalance={},
+            gen_regulation={
+                gen: {
+                    "up_reg": gen_data[gen]["capacity"] - model.generation[gen],
+                    "down_reg": model.generation[gen],
+                    "cost_up_reg": model.day_ahead_price + 0.1 * gen_data[gen]["cost"],
+                    "cost_down_reg": model.day_ahead_price
+                    - 0.15 * gen_data[gen]["cost"],
+                }
+                for gen in ("G1", "G2", "G3", "G4")
+            },
+            demand_regulation={},
+        )
+        model.create_imbalance_model()
+        model.optimize_imbalance_model()
+        model.define_reserve(
+            reserve_up_reg=0.15 * total_demand,
+            reserve_down_reg=0.1 * total_demand,
+            reserve_gens=["G1", "G2", "G3", "G4"],
+        )
+        model.create_reserve_model()
+        model.optimize_reserve_model()
+        results.append(
+            [
+                model.social_welfare,
+                model.day_ahead_price,
+                model.total_imbalance_cost,
+                model.imbalance_price,
+                model.total_reserve_cost,
+                model.reserve_price_up,
+                model.reserve_price_down,
+            ]
+        )
+    np.testing.assert_allclose(results[1], results[0], atol=1e-6)
@@ -0,0 +1,133 @@
+"""Tests of the columnar unit data."""
+
+import numpy as np
+import pytest
+
+from assignment_1.data.demand import Demand
+from assignment_1.data.generation import Generation
+from assignment_1.data.storage import Storage
+from assignment_1.data.synthetic import SyntheticCase
+from assignment_1.data.unit_arrays import UnitArrays
+from assignment_1.models.merit_order import clear_hourly_markets, clear_merit_order
+from assignment_1.step_2 import multi_period_optimization_model
+from assignment_1.step_3 import optimization_model
+from assignment_1.utils.results import get_attr
+
+
+@pytest.mark.parametrize("type", ["single_period", "multi_period"])
+def test_round_trip(type: str) -> None:
+    """Converting to arrays and back gives the same data."""
+    gen_data = Generation(type=type).generation_data
+    arrays = UnitArrays.from_dict(gen_data)
+
+    assert arrays.n_units == len(gen_data)
+    assert arrays.n_periods == (1 if type == "single_period" else 24)
+    assert arrays.to_dict() == gen_data
+
+
+def test_empty() -> None:
+    """Empty data gives arrays without rows, single period unless T is given."""
+    arrays = UnitArrays.from_dict({})
+    assert arrays.capacity.shape == arrays.cost.shape == (0, 1)
+    assert not arrays.multi_period
+    assert arrays.to_dict() == {}
+
+    arrays = UnitArrays.from_dict({}, T=24)
+    assert arrays.capacity.shape == arrays.cost.shape == (0, 24)
+    assert arrays.multi_period
+
+
+def test_merit_order_without_demand() -> None:
+    """Markets without demand or generation clear with nothing traded."""
+    gen_data = Generation(type="single_period").generation_data
+    demand_data = Demand(type="single_period").demand_data
+
+    result = clear_merit_order(gen_data, {})
+    assert result.quantity == 0
+    assert result.demand == {}
+    result = clear_merit_order({}, demand_data)
+    assert result.quantity == 0
+    assert result.generation == {}
+
+    result = clear_hourly_markets(Generation(type="multi_period").generation_data, {})
+    np.testing.assert_array_equal(result.quantity, np.zeros(24))
+
+
+def solution(model: object, var: dict, constr: dict) -> list:
+    """Names, primal values and duals of a solved model."""
+    return [
+        list(var),
+        list(constr),
+        model.ObjVal,
+        np.asarray(get_attr(model, "X", list(var.values()))).tolist(),
+        np.asarray(get_attr(model, "Pi", list(constr.values()))).tolist(),
+    ]
+
+
+def test_step_2_from_arrays(solver: str) -> None:
+    """Step 2 builds the same model from unit arrays as from dicts."""
+    gen_data = Generation(type="multi_period").generation_data
+    demand_data = Demand(type="multi_period").demand_data
+    storage_data = Storage().storage_data
+    expected = solution(
+        *multi_period_optimization_model(
+            gen_data, demand_data, storage_data, 24, solver=solver
+        )
+    )
+    assert (
+        solution(
+            *multi_period_optimization_model(
+                UnitArrays.from_dict(gen_data),
+                UnitArrays.from_dict(demand_data),
+                storage_data,
+                24,
+                solver=solver,
+            )
+        )
+        == expected
+    )
+    with pytest.raises(ValueError, match="incorrect time series length"):
+        multi_period_optimization_model(
+            UnitArrays.from_dict(gen_data).window(0, 12),
+            demand_data,
+            storage_data,
+            24,
+            solver=solver,
+        )
+
+
+@pytest.mark.parametrize(
+    "options", [{}, {"formulation": "ptdf"}, {"zonal_model": True}]
+)
+def test_step_3_from_arrays(solver: str, options: dict) -> None:
+    """Step 3 builds the same model from unit arrays as from dicts."""
+    case = SyntheticCase(30, 20, 20, seed=1)
+    network_data = case.network_data
+    expected = solution(
+        *optimization_model(
+            case.generation_data,
+            case.demand_data,
+            network_data,
+            solver=solver,
+            **options,
+        )
+    )
+    assert (
+        solution(
+            *optimization_model(
+                UnitArrays.from_dict(case.generation_data),
+                UnitArrays.from_dict(case.demand_data),
+                network_data,
+                solver=solver,
+                **options,
+            )
+        )
+        == expected
+    )
+    with pytest.raises(ValueError, match="single period"):
+        optimization_model(
+            UnitArrays.from_dict(Generation(type="multi_period").generation_data),
+            case.demand_data,
+            network_data,
+            solver=solver,
+        )